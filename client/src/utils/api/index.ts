@@ -34,6 +34,7 @@ export { server__models__schema__ModelSchema__Type } from './models/server__mode
 export { server__models__schema__Schema__Type } from './models/server__models__schema__Schema__Type';
 export type { SignupRequest } from './models/SignupRequest';
 export type { TableSchema } from './models/TableSchema';
+export type { TablePageView } from './models/TablePageView';
 export type { TableView } from './models/TableView';
 export type { TaskResponse } from './models/TaskResponse';
 export type { TokenResponse } from './models/TokenResponse';
@@ -16,6 +16,7 @@ export type ProjNode = {
     runningtime?: (number | null);
     schema_out?: Record<string, Schema>;
     data_out?: Record<string, DataRef>;
+    is_preview?: boolean;
     hint?: Record<string, any>;
     error?: (ProjNodeError | null);
 };
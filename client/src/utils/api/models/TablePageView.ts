@@ -0,0 +1,14 @@
+/* generated using openapi-typescript-codegen -- do not edit */
+/* istanbul ignore file */
+/* tslint:disable */
+/* eslint-disable */
+import type { TableView } from './TableView';
+/**
+ * A page of rows of a table, for viewing large tables.
+ */
+export type TablePageView = {
+    table: TableView;
+    offset: number;
+    total_rows: number;
+};
+
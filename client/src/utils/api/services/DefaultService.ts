@@ -12,6 +12,7 @@ import type { ProjectList } from '../models/ProjectList';
 import type { ProjectSetting } from '../models/ProjectSetting';
 import type { ProjUIState } from '../models/ProjUIState';
 import type { SignupRequest } from '../models/SignupRequest';
+import type { TablePageView } from '../models/TablePageView';
 import type { TaskResponse } from '../models/TaskResponse';
 import type { TokenResponse } from '../models/TokenResponse';
 import type { UserFileList } from '../models/UserFileList';
@@ -340,6 +341,49 @@ export class DefaultService {
             },
         });
     }
+    /**
+     * Get Node Table Page
+     * Get a page of rows of a table generated by a node, optionally only some columns, sorted by a column.
+     * Only the requested part of the table is read.
+     * @param dataId
+     * @param offset
+     * @param limit
+     * @param columns
+     * @param sort
+     * @param descending
+     * @returns TablePageView Table page retrieved successfully
+     * @throws ApiError
+     */
+    public static getNodeTablePageApiDataDataIdTableGet(
+        dataId: number,
+        offset: number = 0,
+        limit: number = 100,
+        columns?: (Array<string> | null),
+        sort?: (string | null),
+        descending: boolean = false,
+    ): CancelablePromise<TablePageView> {
+        return __request(OpenAPI, {
+            method: 'GET',
+            url: '/api/data/{data_id}/table',
+            path: {
+                'data_id': dataId,
+            },
+            query: {
+                'offset': offset,
+                'limit': limit,
+                'columns': columns,
+                'sort': sort,
+                'descending': descending,
+            },
+            errors: {
+                400: `Invalid page parameters, or the data is not a table`,
+                403: `User has no access to this data`,
+                404: `Project, Data or column not found`,
+                422: `Validation Error`,
+                500: `Internal server error`,
+            },
+        });
+    }
     /**
      * Signup
      * sign up a new user, return a JWT token (no need to login again)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from .admin import router as admin_router
 from .auth import router as auth_router
 from .data import router as data_router
 from .explore import router as explore_router
@@ -17,5 +18,6 @@ router.include_router(data_router, prefix="/data")
 router.include_router(auth_router, prefix="/auth")
 router.include_router(explore_router, prefix="/explore")
 router.include_router(user_router, prefix="/user")
+router.include_router(admin_router, prefix="/admin")
 
 __all__ = ["router"]
@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from server.config import ADMIN_USERNAMES
+from server.lib.AuthUtils import get_current_user
+from server.lib.CacheManager import CacheManager
+from server.models.cache_stats import CacheStatsView
+from server.models.database import UserRecord
+
+"""
+API router for admin-related endpoints.
+"""
+
+router = APIRouter()
+
+
+async def get_admin_user(current_user: UserRecord = Depends(get_current_user)) -> UserRecord:
+    """ Check that the current user is an admin, configured by ADMIN_USERNAMES. """
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin permission required")
+    return current_user
+
+
+@router.get(
+    "/cache/stats",
+    responses={
+        200: {"description": "Cache statistics retrieved successfully"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Admin permission required"},
+    },
+)
+async def get_cache_stats(
+    admin_user: UserRecord = Depends(get_admin_user),
+) -> CacheStatsView:
+    """
+    Get cache statistics per node type, sorted by time saved.
+    Statistics are flushed by workers periodically and at the end of each task.
+    """
+    # reading the stats scans Redis synchronously, keep the event loop responsive
+    return await asyncio.to_thread(CacheManager().get_stats)
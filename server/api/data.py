@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from loguru import logger
 
+from server.config import DATA_PAGE_MAX_ROWS
 from server.lib.AuthUtils import get_current_user
 from server.lib.DataManager import DataManager
-from server.models.data_view import DataRef, DataView
+from server.models.data_view import DataRef, DataView, TablePageView
 from server.models.database import (
     AsyncSession,
     NodeOutputRecord,
@@ -14,6 +15,20 @@ from server.models.database import (
 
 router = APIRouter()
 
+async def check_data_access(db_client: AsyncSession, data_id: int, user_id: int) -> None:
+    """ Raise HTTPException if the data does not exist or the user has no access to it. """
+    data_record = await db_client.get(NodeOutputRecord, data_id)
+    if data_record is None:
+        raise HTTPException(status_code=404, detail="Data not found")
+    db_project = await db_client.get(ProjectRecord, data_record.project_id)
+    if db_project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if db_project.owner_id != user_id:  # type: ignore
+        if db_project.show_in_explore is False:
+            raise HTTPException(
+                status_code=403, detail="User has no access to this data"
+            )
+
 @router.get(
     "/{data_id}",
     status_code=200,
@@ -35,20 +50,9 @@ async def get_node_data(
     user_id = int(user_record.id) # type: ignore
     data_manager = DataManager(async_db_session=db_client)
     try:
-        # 1. get data row from db
-        data_record = await db_client.get(NodeOutputRecord, data_id)
-        if data_record is None:
-            raise HTTPException(status_code=404, detail="Data not found")
-        # 2. check user access right here
-        db_project = await db_client.get(ProjectRecord, data_record.project_id)
-        if db_project is None:
-            raise HTTPException(status_code=404, detail="Project not found")
-        if db_project.owner_id != user_id:  # type: ignore
-            if db_project.show_in_explore is False:
-                raise HTTPException(
-                    status_code=403, detail="User has no access to this data"
-                )
-        # 3. get data view and return
+        # 1. check user access right here
+        await check_data_access(db_client, data_id, user_id)
+        # 2. get data view and return
         data = await data_manager.read_async(data_ref = DataRef(data_id=data_id))
         return data.to_view()
     except HTTPException:
@@ -56,3 +60,52 @@ async def get_node_data(
     except Exception as e:
         logger.exception(f"Error retrieving node data {data_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/{data_id}/table",
+    status_code=200,
+    responses={
+        200: {"description": "Table page retrieved successfully", "model": TablePageView},
+        400: {"description": "Invalid page parameters, or the data is not a table"},
+        404: {"description": "Project, Data or column not found"},
+        403: {"description": "User has no access to this data"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_node_table_page(
+    data_id: int,
+    offset: int = 0,
+    limit: int = 100,
+    columns: list[str] | None = Query(None),
+    sort: str | None = None,
+    descending: bool = False,
+    db_client: AsyncSession = Depends(get_async_session),
+    user_record: UserRecord = Depends(get_current_user),
+) -> TablePageView:
+    """
+    Get a page of rows of a table generated by a node, optionally only some columns, sorted by a column.
+    Only the requested part of the table is read, the index column is always included.
+    """
+    user_id = int(user_record.id) # type: ignore
+    data_manager = DataManager(async_db_session=db_client)
+    if offset < 0 or limit < 1 or limit > DATA_PAGE_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Offset must be non-negative and limit in [1, {DATA_PAGE_MAX_ROWS}]")
+    try:
+        # 1. check user access right here
+        await check_data_access(db_client, data_id, user_id)
+        # 2. read the page and return
+        try:
+            table, total_rows = await data_manager.read_table_page_async(
+                DataRef(data_id=data_id), offset, limit, columns, sort, descending
+            )
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return TablePageView(table=table.to_view(), offset=offset, total_rows=total_rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error retrieving table page of node data {data_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -12,15 +12,25 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from server.celery import celery_app
+from server.interpreter.analysis import analyse_workflow
 from server.interpreter.task import execute_project_task, revoke_project_task
 from server.lib.AuthUtils import get_current_user
+from server.lib.DataManager import DataManager
 from server.lib.ProjectLock import ProjectLock
 from server.lib.StreamQueue import Status, StreamQueue
 from server.lib.utils import get_project_by_id, set_project_record
+from server.models.data_view import DataRef
 from server.models.database import ProjectRecord, UserRecord, get_async_session
 from server.models.exception import ProjectLockError, ProjLockIdentityError
-from server.models.project import Project, ProjectSetting, ProjUIState, ProjWorkflow
+from server.models.project import (
+    ProjAnalysis,
+    Project,
+    ProjectSetting,
+    ProjUIState,
+    ProjWorkflow,
+)
 from server.models.project_list import ProjectList, ProjectListItem
+from server.models.schema import Schema
 
 """
 The api for nodes runing, reporting and so on,
@@ -113,7 +123,24 @@ async def copy_project(
             )
         )
         db_client.add(new_project)
-        # No need to copy node results and files, if they change, they will be re-executed.(copy on write)
+        await db_client.flush()
+        # 4. copy references to node results, the data blobs are shared
+        # files are owned by the source project and not copied, nodes outputting them will be re-executed
+        workflow = project.workflow
+        data_ids: list[int] = []
+        for node in workflow.nodes:
+            if any(schema.type == Schema.Type.FILE for schema in node.schema_out.values()):
+                node.data_out = {}
+                node.runningtime = None
+            data_ids.extend(data_ref.data_id for data_ref in node.data_out.values())
+        id_map = await DataManager(async_db_session=db_client).copy_refs_async(data_ids, new_project.id)  # type: ignore
+        for node in workflow.nodes:
+            if all(data_ref.data_id in id_map for data_ref in node.data_out.values()):
+                node.data_out = {port: DataRef(data_id=id_map[data_ref.data_id]) for port, data_ref in node.data_out.items()}
+            else:
+                node.data_out = {}
+                node.runningtime = None
+        new_project.workflow = workflow.model_dump()  # type: ignore
         await db_client.commit()
         await db_client.refresh(new_project)
         return new_project.id  # type: ignore
@@ -372,6 +399,46 @@ async def sync_project_ui(
         logger.exception(f"Error syncing UI state for project {project_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post(
+    "/analyse",
+    status_code=200,
+    responses={
+        200: {"description": "Workflow analysed successfully", "model": ProjAnalysis},
+        400: {"description": "Invalid workflow"},
+        403: {"description": "User has no access to this project"},
+        404: {"description": "Project not found"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def analyse_workflow_sync(
+    project_id: int,
+    workflow: ProjWorkflow,
+    db_client: AsyncSession = Depends(get_async_session),
+    user_record: UserRecord = Depends(get_current_user),
+) -> ProjAnalysis:
+    """
+    Construct nodes, get UI hints and perform static analysis of a workflow in the api process,
+    returning schemas, hints and errors of each node immediately.
+    Nothing is saved or executed, so the project is not locked and no task is enqueued.
+    Nodes may read files and data of the project, so the user must have access to it.
+    """
+    user_id = int(user_record.id)  # type: ignore
+    try:
+        project = await get_project_by_id(db_client, project_id, user_id)
+        if project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        # analysis is cpu bound, keep the event loop responsive
+        return await asyncio.to_thread(analyse_workflow, workflow, project_id, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid workflow: {str(e)}")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="User has no access to this project")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error analysing workflow of project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 class TaskResponse(BaseModel):
     """Response returned when a task is submitted."""
     task_id: str
@@ -392,6 +459,7 @@ class TaskResponse(BaseModel):
 async def sync_project(
     project: Project,
     response: Response,
+    preview: bool = False,
     db_client: AsyncSession = Depends(get_async_session),
     user_record: UserRecord = Depends(get_current_user),
 ) -> TaskResponse | None:
@@ -400,6 +468,7 @@ async def sync_project(
     If decide to execute, enqueues a Celery task. Use
     the returned `task_id` to subscribe to the websocket status endpoint
     `/nodes/status/{task_id}`.
+    With `preview`, results on sampled inputs are streamed first, see `execute_project_task`.
     """
     user_id = int(user_record.id)  # type: ignore
     project_id = project.project_id
@@ -419,10 +488,14 @@ async def sync_project(
                 need_exec = False
 
             # 3. save to db
+            reuse_node_ids: list[str] = []
             if not need_exec:
                 logger.warning(f"Project {project.project_id} topology not changed, no need to execute. Please use /sync_ui to update UI only.")
                 await set_project_record(db_client, new_project, user_id)
             else:
+                # only re-execute changed nodes and their descendants, others reuse the results of the last run
+                dirty_node_ids = new_topo.get_dirty_node_ids(old_topo)
+                reuse_node_ids = new_project.workflow.reuse_results_from(old_project.workflow, exclude=dirty_node_ids)
                 await set_project_record(db_client, new_project, user_id)
 
             if not need_exec:
@@ -434,6 +507,8 @@ async def sync_project(
             task = celery_task.delay(  # the return message will be sent back via streamqueue
                 project_id=project.project_id,
                 user_id=user_id,
+                reuse_node_ids=reuse_node_ids,
+                preview=preview,
             )
             response.status_code = 202  # Accepted
             await lock.appoint_transfer_async(task.id)
@@ -452,6 +527,66 @@ async def sync_project(
         logger.exception(f"Error syncing project {project.project_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+class RunRequest(BaseModel):
+    """Request to execute some target nodes of a project."""
+    project_id: int
+    target_node_ids: list[str]
+    preview: bool = False  # stream results on sampled inputs first
+
+@router.post(
+    "/run",
+    status_code=202,
+    responses={
+        202: {"description": "Task accepted and running", "model": TaskResponse},
+        400: {"description": "Invalid target nodes"},
+        403: {"description": "User has no access to this project"},
+        404: {"description": "Project not found"},
+        423: {"description": "Project is locked, it may be being edited by another process"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def run_project_targets(
+    request: RunRequest,
+    db_client: AsyncSession = Depends(get_async_session),
+    user_record: UserRecord = Depends(get_current_user),
+) -> TaskResponse:
+    """
+    Execute the target nodes and the nodes they depend on in the saved project,
+    unrelated nodes are skipped completely. Use the returned `task_id` like `/sync`.
+    """
+    user_id = int(user_record.id)  # type: ignore
+    project_id = request.project_id
+    try:
+        async with ProjectLock(project_id=project_id, max_block_time=5.0, identity=None, scope="all") as lock:
+            project = await get_project_by_id(db_client, project_id, user_id)
+            if project is None:
+                raise HTTPException(status_code=404, detail="Project not found")
+            if not project.editable:
+                raise HTTPException(status_code=403, detail="User has no access to this project")
+            topo = project.to_topo()
+            missing = [node_id for node_id in request.target_node_ids if topo.get_index_by_node_id(node_id) is None]
+            if not request.target_node_ids or missing:
+                raise HTTPException(status_code=400, detail=f"Target nodes not found: {missing}")
+
+            celery_task = cast(CeleryTask, execute_project_task)  # to suppress type checker error
+            task = celery_task.delay(
+                project_id=project_id,
+                user_id=user_id,
+                target_node_ids=request.target_node_ids,
+                preview=request.preview,
+            )
+            await lock.appoint_transfer_async(task.id)
+            return TaskResponse(task_id=task.id)
+    except ProjectLockError:
+        raise HTTPException(status_code=423, detail="Project is locked, it may be being edited by another process")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="User has no access to this project")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Error running targets of project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 @router.websocket("/status/{task_id}")
 async def project_status(task_id: str, websocket: WebSocket) -> None:
     """
@@ -1,8 +1,10 @@
 
 from celery import Celery
+from celery.signals import worker_init
 
 from server.config import (
     CELERY_REDIS_URL,
+    CLEAN_ORPHAN_BLOB_INTERVAL_SEC,
     CLEAN_ORPHAN_FILE_INTERVAL_SEC,
     FETCH_BACKWARD_INTERVAL_SEC,
     FETCH_FORWARD_INTERVAL_SEC,
@@ -34,6 +36,7 @@ celery_app.conf.update(
     include=[
         "server.interpreter.task",
         "server.lib.FinancialDataManager",
+        "server.lib.DataManager",
     ],  # Explicitly include task modules
 )
 
@@ -43,6 +46,10 @@ celery_app.conf.beat_schedule = {
         "schedule": CLEAN_ORPHAN_FILE_INTERVAL_SEC,
         # "schedule": 60.0,  # Every 60 seconds (for testing purposes)
     },
+    "cleanup-orphan-blobs-every-hour": {
+        "task": "server.lib.DataManager.cleanup_orphan_blobs_task",
+        "schedule": CLEAN_ORPHAN_BLOB_INTERVAL_SEC,
+    },
     "update-forward-every-5-minutes": {
         "task": "server.lib.FinancialDataManager.update_forward_task",
         "schedule": FETCH_FORWARD_INTERVAL_SEC,
@@ -54,3 +61,11 @@ celery_app.conf.beat_schedule = {
         # "schedule": 120.0,  # Every 2 minutes (for testing purposes)
     },
 }
+
+
+@worker_init.connect
+def _init_worker(**kwargs) -> None:
+    """ Set up the worker process before it forks its pool processes, which inherit the setup """
+    from server.models.data import enable_copy_on_write
+
+    enable_copy_on_write()
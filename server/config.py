@@ -30,6 +30,7 @@ AUTH_SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production"
 AUTH_ALGORITHM = "HS256"
 AUTH_ACCESS_TOKEN_EXPIRE_MINUTES = 30
 AUTH_REFRESH_TOKEN_EXPIRE_DAYS = 7
+ADMIN_USERNAMES = set(filter(None, os.getenv("ADMIN_USERNAMES", "").split(",")))  # users allowed to access admin APIs
 
 # Celery configuration
 CELERY_REDIS_URL = REDIS_URL + "/0"
@@ -41,6 +42,21 @@ STREAMQUEUE_TTL_SECONDS = 3600  # 1 hour
 # Cache configuration
 CACHE_REDIS_URL = REDIS_URL + "/2"
 CACHE_TTL_SECONDS = 24 * 60 * 60  # 24 hour
+CACHE_COSTLY_RUNNING_TIME_MS = 10 * 1000  # 10 seconds, results taking longer than this to compute are kept longer
+CACHE_COSTLY_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+CACHE_FETCH_BASE_MS = 1.0  # estimated round trip time of a cache fetch, results computed faster are not cached
+CACHE_FETCH_MB_PER_SEC = 200.0  # estimated throughput of fetching and deserializing cached results
+DATA_SERIALIZATION = "arrow"  # format of tables in cached and persisted node outputs, "arrow" (zstd compressed Arrow IPC) or "pickle"
+CACHE_STATS_FLUSH_INTERVAL_SEC = 10.0  # interval to flush locally accumulated cache statistics to Redis
+CACHE_L1_MAX_BYTES = 512 * 1024 * 1024  # 512 MB, size bound of the in-process cache tier in each worker, 0 to disable
+
+# Node output storage configuration
+DATA_BLOB_INLINE_MAX_BYTES = 1024 * 1024  # 1 MB, larger serialized node outputs are stored in MinIO instead of Postgres
+DATA_BLOB_BUCKET = "nodepy-data"  # MinIO bucket of large node outputs
+DATA_DISK_CACHE_DIR = Path(os.getenv("DATA_DISK_CACHE_DIR", "/tmp/nodepy/data_cache"))  # local read cache of large node outputs
+DATA_DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB, size bound of the local read cache on each host, 0 to disable
+DATA_TABLE_BATCH_ROWS = 64 * 1024  # rows per record batch of persisted tables, the unit of partial reads for table pages
+DATA_PAGE_MAX_ROWS = 10000  # max rows of a table page returned by the API
 
 # Project lock configuration
 PROJ_LOCK_REDIS_URL = REDIS_URL + "/3"
@@ -72,6 +88,10 @@ EXAMPLES_DIR = Path("/nodepy/server/assets/examples")
 # Interpreter configuration
 TASK_MAX_RUNNING_TIME_SEC = 30 * 60  # 30 minutes
 CUSTOM_SCRIPT_MAX_TIME_SEC = 5  # 5 seconds
+EXEC_MAX_WORKERS = 4  # max threads to execute independent nodes concurrently, 1 for sequential execution
+LOOP_MAX_PROCESSES = int(os.getenv("LOOP_MAX_PROCESSES", "1"))  # max processes to execute iterations of a loop in parallel, 1 to iterate in the task process
+LOOP_MIN_ITERATIONS_PER_PROCESS = 50  # loops are only split if each process gets at least this many iterations
+PREVIEW_ROWS = 1000  # max rows emitted by source nodes in a preview run
 
 # Fetch financial data configuration
 FETCH_FORWARD_INTERVAL_SEC = 5 * 60.0  # 5 minutes
@@ -82,6 +102,7 @@ USER_DEFAULT_STORAGE_MB = 5 * 1024  # 5 GB
 
 # Cleanup configuration
 CLEAN_ORPHAN_FILE_INTERVAL_SEC = 60 * 60.0  # 1 hour
+CLEAN_ORPHAN_BLOB_INTERVAL_SEC = 60 * 60.0  # 1 hour, blobs of data no longer referenced, e.g. by deleted projects
 
 # Username and password requirements
 USERNAME_MIN_LENGTH = 1
@@ -104,3 +125,6 @@ USE_CACHE = True
 
 # Whether to enable time tracing for interpreter
 TRACING_ENABLED = True
+
+# Whether to fully verify tables and data built by trusted constructors (Table.trusted, Data.trusted), enabled in tests
+VERIFY_TRUSTED_DATA = os.getenv("VERIFY_TRUSTED_DATA", "false").lower() == "true"
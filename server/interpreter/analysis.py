@@ -0,0 +1,92 @@
+from typing import Any, Literal
+
+from loguru import logger
+
+from server.lib.CacheManager import CacheManager
+from server.models.exception import NodeParameterError, NodeValidationError
+from server.models.project import ProjAnalysis, ProjNodeAnalysis, ProjNodeError, ProjWorkflow
+
+from .interpreter import ProjectInterpreter
+
+"""
+Construction, UI hints and static analysis of a workflow without executing it.
+Shared by the execution task and the synchronous analysis api.
+"""
+
+
+def construction_error(node_id: str, exception: Exception) -> tuple[str, ProjNodeError]:
+    """ Convert an exception in node construction to the node id and the error to report. """
+    if isinstance(exception, NodeParameterError):
+        return exception.node_id, ProjNodeError(
+            type="param", params=exception.err_param_keys, inputs=None, message=exception.err_msgs
+        )
+    logger.opt(exception=exception).error(f"Unexpected error during node construction: {exception}")
+    return node_id, ProjNodeError(
+        type="execution",
+        params=None,
+        inputs=None,
+        message="Construction Error: " + str(exception)
+    )
+
+
+def analysis_error(node_id: str, exception: Exception) -> tuple[str, ProjNodeError]:
+    """ Convert an exception in static analysis to the node id and the error to report. """
+    if isinstance(exception, NodeValidationError):
+        return exception.node_id, ProjNodeError(
+            type="validation", params=None, inputs=exception.err_inputs, message=exception.err_msgs
+        )
+    logger.opt(exception=exception).error(f"Unexpected error during static analysis: {exception}")
+    return node_id, ProjNodeError(
+        type="validation",
+        params=None,
+        inputs=[""],
+        message=["Static Analysis Error: " + str(exception)]
+    )
+
+
+def analyse_workflow(workflow: ProjWorkflow, project_id: int, user_id: int) -> ProjAnalysis:
+    """
+    Construct nodes, get UI hints and perform static analysis of a workflow in this process.
+    Nodes are never executed, so they get a stub context without file and financial data managers.
+    Raise if the workflow itself is invalid, e.g. has cycles.
+    """
+    topology = workflow.to_topo(project_id=project_id)
+    graph = ProjectInterpreter(
+        topology=topology,
+        file_manager=None,
+        cache_manager=CacheManager(),
+        financial_data_manager=None,
+        user_id=user_id,
+    )
+    result = ProjAnalysis(nodes={node.id: ProjNodeAnalysis() for node in topology.nodes if node is not None})
+
+    def hint_reporter(node_id: str, hint: dict[str, Any]) -> bool:
+        result.nodes[node_id].hint = hint
+        return True
+
+    def construct_reporter(node_id: str, status: Literal["success", "error"], exception: Exception | None) -> bool:
+        if status == "error":
+            assert exception is not None
+            error_node_id, error = construction_error(node_id, exception)
+            result.nodes[error_node_id].error = error
+        return True
+
+    def anl_reporter(node_id: str, status: Literal["success", "error"], res: dict[str, Any] | Exception) -> bool:
+        if status == "success":
+            assert isinstance(res, dict)
+            result.nodes[node_id].schema_out = res
+        else:
+            assert isinstance(res, Exception)
+            error_node_id, error = analysis_error(node_id, res)
+            result.nodes[error_node_id].error = error
+        return True
+
+    graph.get_ui_hint(callback=hint_reporter)
+    graph.construct_nodes(callback=construct_reporter)
+    graph.static_analyse(callback=anl_reporter)
+    # schemas of nodes unreached by control structure errors are not valid
+    for node_index in graph.get_unreached_nodes():
+        node = topology.nodes[node_index]
+        assert node is not None
+        result.nodes[node.id].schema_out = {}
+    return result
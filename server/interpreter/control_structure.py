@@ -2,11 +2,10 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Callable, Generator, Literal
 
-import networkx as nx
-
 from server.lib.utils import safe_hash
 from server.models.project_topology import TopoNode
 
+from .execution_plan import ExecutionPlan
 from .nodes.base_node import BaseNode
 
 
@@ -28,53 +27,49 @@ class ControlStructureManager:
 
     control_structures: dict[int, ControlStructure] | None = None  # pair_id -> ControlStructure
 
-    def __init__(self):
-        pass
+    def __init__(self, plan: ExecutionPlan):
+        self._plan = plan
+        # lookups built after analysis
+        self._by_begin: dict[str, ControlStructureManager.ControlStructure] = {}  # begin node id -> struc
+        self._end_node_ids: set[str] = set()
+        self._body_node_ids: set[str] = set()
+        self._body_orders: dict[str, list[str]] = {}  # begin node id -> body node ids in execution order
+        self._hashes: dict[str, str] = {}  # begin node id -> hash of the control structure
 
     def is_body_node(self, node_id: str) -> bool:
         """
         Check if the given node id is a body node of any control structure.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        for struc in self.control_structures.values():
-            if struc.body_node_ids is not None and node_id in struc.body_node_ids:
-                return True
-        return False
+        return node_id in self._body_node_ids
 
     def is_begin_node(self, node_id: str) -> bool:
         """
         Check if the given node id is a begin node of any control structure.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        for struc in self.control_structures.values():
-            if struc.begin_node_id == node_id:
-                return True
-        return False
+        return node_id in self._by_begin
 
     def is_end_node(self, node_id: str) -> bool:
         """
         Check if the given node id is an end node of any control structure.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        for struc in self.control_structures.values():
-            if struc.end_node_id == node_id:
-                return True
-        return False
+        return node_id in self._end_node_ids
 
     def get_end_node_id(self, begin_node_id: str) -> str:
         """
         Get the end node id of the control structure by its begin node id.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        for struc in self.control_structures.values():
-            if struc.begin_node_id == begin_node_id:
-                assert struc.end_node_id is not None
-                return struc.end_node_id
-        raise ValueError(f"Begin node id {begin_node_id} not found in any control structure.")
+        struc = self._by_begin.get(begin_node_id)
+        if struc is None:
+            raise ValueError(f"Begin node id {begin_node_id} not found in any control structure.")
+        assert struc.end_node_id is not None
+        return struc.end_node_id
 
     def analyze(
         self,
-        graph: nx.MultiDiGraph,
         node_objects: dict[str, BaseNode],
         skip: set[str],
         callback: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception], bool],
@@ -126,24 +121,24 @@ class ControlStructureManager:
                     del self.control_structures[pair_id]
                     if struc.begin_node_id is not None:
                         unreached_nodes.add(struc.begin_node_id)
-                        unreached_nodes.update(nx.descendants(graph, struc.begin_node_id))
+                        unreached_nodes.update(self._plan.descendants_of(struc.begin_node_id))
                     if struc.end_node_id is not None:
                         unreached_nodes.add(struc.end_node_id)
-                        unreached_nodes.update(nx.descendants(graph, struc.end_node_id))
+                        unreached_nodes.update(self._plan.descendants_of(struc.end_node_id))
                     changed = True
             copy_control_structures = self.control_structures.copy()
 
         # 3. check if begin node can reach end node
         copy_control_structures = self.control_structures.copy()
         for pair_id, struc in copy_control_structures.items():
-            if not nx.has_path(graph, struc.begin_node_id, struc.end_node_id):
+            if not self._plan.has_path(struc.begin_node_id, struc.end_node_id):
                 error = ValueError(
                     f"Begin node {struc.begin_node_id} cannot reach end node {struc.end_node_id} for pair id {pair_id}."
                 )
                 assert struc.begin_node_id is not None
                 callback(struc.begin_node_id, "error", error)
                 unreached_nodes.add(struc.begin_node_id)
-                unreached_nodes.update(nx.descendants(graph, struc.begin_node_id))
+                unreached_nodes.update(self._plan.descendants_of(struc.begin_node_id))
                 del self.control_structures[pair_id]
 
         # 4. for each pair, find its body nodes
@@ -152,10 +147,10 @@ class ControlStructureManager:
             end_node_id = struc.end_node_id
             # body nodes = (begin.descendants - end.descendants) + (end.predecessors - begin.predecessors)
             body_nodes = set()
-            begin_descendants = nx.descendants(graph, begin_node_id)
-            end_descendants = nx.descendants(graph, end_node_id)
-            begin_predecessors = set(nx.ancestors(graph, begin_node_id))
-            end_predecessors = set(nx.ancestors(graph, end_node_id))
+            begin_descendants = self._plan.descendants_of(begin_node_id)
+            end_descendants = self._plan.descendants_of(end_node_id)
+            begin_predecessors = self._plan.ancestors_of(begin_node_id)
+            end_predecessors = self._plan.ancestors_of(end_node_id)
             body_nodes.update(begin_descendants - end_descendants)
             body_nodes.update(end_predecessors - begin_predecessors)
             # remove begin and end nodes from body nodes if present
@@ -175,7 +170,7 @@ class ControlStructureManager:
                         ValueError(f"Control structure with pair id {pair_id} contains unreached body nodes."),
                     )
                     unreached_nodes.add(struc.begin_node_id)
-                    unreached_nodes.update(nx.descendants(graph, struc.begin_node_id))
+                    unreached_nodes.update(self._plan.descendants_of(struc.begin_node_id))
                     del self.control_structures[pair_id]
 
         # 6. check if all control structures are complete
@@ -186,64 +181,51 @@ class ControlStructureManager:
                 raise ValueError(f"Body nodes not found for pair id {pair_id}.")
             if struc.type is None:
                 raise ValueError(f"Control structure type not found for pair id {pair_id}.")
+
+        # 7. build lookups, body nodes are executed in the topological order of the whole graph
+        for struc in self.control_structures.values():
+            assert struc.begin_node_id is not None and struc.end_node_id is not None and struc.body_node_ids is not None
+            self._by_begin[struc.begin_node_id] = struc
+            self._end_node_ids.add(struc.end_node_id)
+            self._body_node_ids.update(struc.body_node_ids)
+            self._body_orders[struc.begin_node_id] = self._plan.ids_of(self._plan.bits_of(struc.body_node_ids))
         return unreached_nodes
 
-    def iter_control_structure(self, graph: nx.MultiDiGraph, begin_node_id: str) -> Generator[str, Any, None]:
+    def iter_control_structure(self, begin_node_id: str) -> Generator[str, Any, None]:
         """
         Iterate the each node id in control structure by its begin node id.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        # 1. find pair id by begin node id
-        pair_id: int | None = None
-        for id, struc in self.control_structures.items():
-            if struc.begin_node_id == begin_node_id:
-                pair_id = id
-                break
-        if pair_id is None:
+        body_exec_queue = self._body_orders.get(begin_node_id)
+        if body_exec_queue is None:
             raise ValueError(f"Begin node id {begin_node_id} not found in any control structure.")
+        yield from body_exec_queue
 
-        # 2. get topological order of body nodes
-        struc = self.control_structures[pair_id]
-        assert struc.body_node_ids is not None
-        body_subgraph = graph.subgraph(struc.body_node_ids)
-        body_exec_queue = list(nx.topological_sort(body_subgraph))  # type: ignore
-
-        # 3. yield node ids in order
-        for node_id in body_exec_queue:
-            assert isinstance(node_id, str)
-            yield node_id
-
-    def hash_control_structure(self, graph: nx.MultiDiGraph, begin_node_id: str, nodes: dict[str, TopoNode]) -> str:
+    def hash_control_structure(self, begin_node_id: str, nodes: dict[str, TopoNode]) -> str:
         """
         Get the hash of the control structure by its begin node id.
         For check if the control structure has changed.
         This method will hash all body nodes parameters and topology.
         """
         assert self.control_structures is not None, "Control structures have not been analyzed yet."
-        # 1. find pair id by begin node id
-        pair_id: int | None = None
-        for id, struc in self.control_structures.items():
-            if struc.begin_node_id == begin_node_id:
-                pair_id = id
-                break
-        if pair_id is None:
-            raise ValueError(f"Begin node id {begin_node_id} not found in any control structure.")
-
-        # 2. get topological order of body nodes
-        struc = self.control_structures[pair_id]
-        assert struc.body_node_ids is not None
-        body_subgraph = graph.subgraph(struc.body_node_ids)
-        body_exec_queue = list(nx.topological_sort(body_subgraph))  # type: ignore
+        if begin_node_id in self._hashes:
+            return self._hashes[begin_node_id]
 
-        # 3. collect parameters and topology
+        # 1. collect parameters and topology, edges in the same form as networkx edges with data
         control_structure_info: dict[str, Any] = {}
-        for node_id in body_exec_queue:
-            node_id = str(node_id)
-            control_structure_info[str(node_id)] = {
+        for node_id in self.iter_control_structure(begin_node_id):
+            control_structure_info[node_id] = {
                 "params": nodes[node_id],
-                "in_edges": list(graph.in_edges(node_id, data=True)),  # type: ignore
-                "out_edges": list(graph.out_edges(node_id, data=True)),
+                "in_edges": [
+                    (src_id, node_id, {"src_port": src_port, "tar_port": tar_port})
+                    for src_id, src_port, tar_port in self._plan.in_edges_of(node_id)
+                ],
+                "out_edges": [
+                    (node_id, tar_id, {"src_port": src_port, "tar_port": tar_port})
+                    for tar_id, src_port, tar_port in self._plan.out_edges_of(node_id)
+                ],
             }
 
-        # 4. hash the info
-        return safe_hash(control_structure_info)
+        # 2. hash the info
+        self._hashes[begin_node_id] = safe_hash(control_structure_info)
+        return self._hashes[begin_node_id]
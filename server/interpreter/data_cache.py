@@ -0,0 +1,45 @@
+from server.models.data import Data
+
+
+class DataCache:
+    """
+    The cache for node output data during execution: (node_id, port) -> Data.
+    Each entry is reference counted by its consumers, and released once the last consumer has collected it,
+    so intermediate results do not live until the whole execution ends.
+    Outputs without consumers are not kept at all, they are already persisted by the callafter.
+    """
+
+    def __init__(self, consumer_counts: dict[tuple[str, str], int]) -> None:
+        self._data: dict[tuple[str, str], Data] = {}
+        self._consumer_counts = consumer_counts.copy()
+        self._sizes: dict[tuple[str, str], int] = {}
+        self._size: int = 0
+        self.peak_size: int = 0 # peak of estimated size of all entries in bytes
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._data
+
+    def __getitem__(self, key: tuple[str, str]) -> Data:
+        return self._data[key]
+
+    def store(self, node_id: str, output_data: dict[str, Data]) -> None:
+        """ Store outputs of the node, ports without consumers are skipped. """
+        for port, data in output_data.items():
+            key = (node_id, port)
+            if key in self._data:
+                raise RuntimeError(f"Node '{node_id}' output on port '{port}' already exists in cache.")
+            if self._consumer_counts.get(key, 0) <= 0:
+                continue
+            self._data[key] = data
+            self._sizes[key] = data.memory_size()
+            self._size += self._sizes[key]
+            self.peak_size = max(self.peak_size, self._size)
+
+    def consume(self, keys: list[tuple[str, str]]) -> None:
+        """ Decrease consumer counts of the keys, release entries with no consumers left. """
+        for key in keys:
+            self._consumer_counts[key] = self._consumer_counts.get(key, 0) - 1
+            if self._consumer_counts[key] <= 0 and key in self._data:
+                del self._data[key]
+                self._size -= self._sizes.pop(key)
+
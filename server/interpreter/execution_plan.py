@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+
+import networkx as nx
+
+from server.lib.utils import safe_hash
+from server.models.project_topology import TopoEdge, TopoNode
+
+"""
+The compiled graph analysis of a workflow topology.
+A plan only depends on node ids and edges, so it is cached by the topology hash and shared by later runs
+of the same graph, even if node parameters change.
+"""
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    Nodes are indexed by their position in the topological order.
+    In/out edges are kept in the order of the graph, descendants and ancestors are bitsets of node indices.
+    """
+    node_ids: list[str] # in topological order
+    index: dict[str, int] # node id -> index
+    in_edges: list[list[tuple[str, str, str]]] # per node: (src_id, src_port, tar_port)
+    out_edges: list[list[tuple[str, str, str]]] # per node: (tar_id, src_port, tar_port)
+    descendants: list[int] # per node: bitset of descendants
+    ancestors: list[int] # per node: bitset of ancestors
+
+    @staticmethod
+    def topology_hash(nodes: list[TopoNode | None], edges: list[TopoEdge]) -> str:
+        """ Hash of the graph structure, node parameters are not included. """
+        return safe_hash([
+            [node.id for node in nodes if node is not None],
+            [(edge.src, edge.src_port, edge.tar, edge.tar_port) for edge in edges],
+        ])
+
+    @classmethod
+    def compile(cls, nodes: list[TopoNode | None], edges: list[TopoEdge]) -> 'ExecutionPlan':
+        graph = nx.MultiDiGraph()
+        graph.add_nodes_from(node.id for node in nodes if node is not None) # add nodes as indices
+        for edge in edges:
+            graph.add_edge(edge.src, edge.tar, src_port=edge.src_port, tar_port=edge.tar_port)
+        if not nx.is_directed_acyclic_graph(graph):
+            raise ValueError("The graph must be a Directed Acyclic Graph (DAG)")
+        node_ids: list[str] = list(nx.topological_sort(graph))
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        in_edges = [
+            [(src_id, data['src_port'], data['tar_port']) for src_id, _, data in graph.in_edges(node_id, data=True)] # type: ignore
+            for node_id in node_ids
+        ]
+        out_edges = [
+            [(tar_id, data['src_port'], data['tar_port']) for _, tar_id, data in graph.out_edges(node_id, data=True)] # type: ignore
+            for node_id in node_ids
+        ]
+        descendants = [0] * len(node_ids)
+        for i in reversed(range(len(node_ids))):
+            for tar_id, _, _ in out_edges[i]:
+                j = index[tar_id]
+                descendants[i] |= (1 << j) | descendants[j]
+        ancestors = [0] * len(node_ids)
+        for i in range(len(node_ids)):
+            for src_id, _, _ in in_edges[i]:
+                j = index[src_id]
+                ancestors[i] |= (1 << j) | ancestors[j]
+        return cls(
+            node_ids=node_ids,
+            index=index,
+            in_edges=in_edges,
+            out_edges=out_edges,
+            descendants=descendants,
+            ancestors=ancestors,
+        )
+
+    def in_edges_of(self, node_id: str) -> list[tuple[str, str, str]]:
+        return self.in_edges[self.index[node_id]]
+
+    def out_edges_of(self, node_id: str) -> list[tuple[str, str, str]]:
+        return self.out_edges[self.index[node_id]]
+
+    def predecessors_of(self, node_id: str) -> list[str]:
+        """ Distinct source nodes of in edges. """
+        return list(dict.fromkeys(src_id for src_id, _, _ in self.in_edges_of(node_id)))
+
+    def bits_of(self, node_ids: set[str]) -> int:
+        bits = 0
+        for node_id in node_ids:
+            bits |= 1 << self.index[node_id]
+        return bits
+
+    def ids_of(self, bits: int) -> list[str]:
+        """ Node ids in the bitset, in topological order. """
+        node_ids: list[str] = []
+        while bits:
+            low = bits & -bits
+            node_ids.append(self.node_ids[low.bit_length() - 1])
+            bits ^= low
+        return node_ids
+
+    def descendants_of(self, node_id: str) -> set[str]:
+        return set(self.ids_of(self.descendants[self.index[node_id]]))
+
+    def ancestors_of(self, node_id: str) -> set[str]:
+        return set(self.ids_of(self.ancestors[self.index[node_id]]))
+
+    def has_path(self, src_id: str, tar_id: str) -> bool:
+        return src_id == tar_id or bool(self.descendants[self.index[src_id]] >> self.index[tar_id] & 1)
@@ -1,24 +1,40 @@
+import heapq
+import queue
+import resource
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Literal
 
-import networkx as nx
+from pandas import Series
 from pydantic import ValidationError
+from sqlalchemy.orm import Session
 
 from server import DEBUG, logger
-from server.config import TRACING_ENABLED
+from server.config import (
+    EXEC_MAX_WORKERS,
+    LOOP_MAX_PROCESSES,
+    LOOP_MIN_ITERATIONS_PER_PROCESS,
+    TRACING_ENABLED,
+)
 from server.interpreter.nodes.control.for_base_node import (
     ForBaseBeginNode,
     ForBaseEndNode,
 )
+from server.interpreter.nodes.control.for_rolling_window import ForRollingWindowBeginNode
+from server.interpreter.nodes.control.unpack import PackNode
 from server.lib.CacheManager import CacheManager
 from server.lib.FileManager import FileManager
 from server.lib.FinancialDataManager import FinancialDataManager
 from server.lib.utils import safe_hash
-from server.models.data import Data, Schema
-from server.models.exception import NodeParameterError
+from server.models.data import Data, Schema, Table
+from server.models.exception import NodeExecutionError, NodeParameterError
 from server.models.project import TopoEdge, TopoNode, WorkflowTopology
 
 from .control_structure import ControlStructureManager
+from .data_cache import DataCache
+from .execution_plan import ExecutionPlan
+from .loop_pool import LoopBody, execute_shards
 from .nodes.base_node import BaseNode
 from .nodes.context import NodeContext
 
@@ -30,44 +46,102 @@ class ProjectInterpreter:
 
     def __init__(self, 
                  topology: WorkflowTopology, 
-                 file_manager: FileManager, 
+                 file_manager: FileManager | None, 
                  cache_manager: CacheManager,
-                 financial_data_manager: FinancialDataManager,
+                 financial_data_manager: FinancialDataManager | None,
                  user_id: int,
+                 preview_rows: int | None = None,
+                 worker_session_factory: Callable[[], Session] | None = None,
                 ) -> None:
+        """
+        Without the file and financial data managers, the interpreter can only construct nodes,
+        get UI hints and perform static analysis, but not execute.
+        If preview_rows is set, source nodes emit at most this many rows, the cache manager should use
+        a namespace of its own so that the sampled results are never mixed up with full results.
+        If worker_session_factory is set, SESSION_BOUND nodes can run in worker threads, each thread opens
+        a db session of its own by it, and each node commits its own changes on the session.
+        """
         trace_begin: float | None = None
         if TRACING_ENABLED:
             trace_begin = time.perf_counter()
 
         self._nodes: list[TopoNode | None] = topology.nodes
         self._edges: list[TopoEdge] = topology.edges
-        self._graph: nx.MultiDiGraph = nx.MultiDiGraph()
-        self._graph.add_nodes_from(node.id for node in self._nodes if node is not None) # add nodes as indices
-        for edge in self._edges:
-            self._graph.add_edge(edge.src, edge.tar, src_port=edge.src_port, tar_port=edge.tar_port)
-        if not nx.is_directed_acyclic_graph(self._graph):
-            raise ValueError("The graph must be a Directed Acyclic Graph (DAG)")
+        # graph analysis only depends on the structure, reuse the plan compiled by earlier runs of the same graph
+        topology_hash = ExecutionPlan.topology_hash(self._nodes, self._edges)
+        plan = cache_manager.get_plan(topology_hash)
+        if plan is None:
+            plan = ExecutionPlan.compile(self._nodes, self._edges)
+            cache_manager.set_plan(topology_hash, plan)
+        self._plan: ExecutionPlan = plan
         self._node_map: dict[str, TopoNode] = {node.id: node for node in self._nodes if node is not None}
         self._node_objects: dict[str, BaseNode] = {}
         self._exec_queue: list[str] = []
         self._stage: Literal["init", "constructed", "static_analyzed", "running", "finished"] = "init"
         # construct global config
         self._cache_manager = cache_manager # used only by Interpreter itself, no need to pass to nodes
-        self._context = NodeContext(
-            file_manager=file_manager, 
-            financial_data_manager=financial_data_manager, 
-            user_id=user_id, 
-            project_id=topology.project_id
-        )
+        if file_manager is None or financial_data_manager is None:
+            self._context = NodeContext.stub(user_id=user_id, project_id=topology.project_id)
+        else:
+            self._context = NodeContext(
+                file_manager=file_manager, 
+                financial_data_manager=financial_data_manager, 
+                user_id=user_id, 
+                project_id=topology.project_id,
+                preview_rows=preview_rows,
+            )
+        # db sessions opened by worker threads, closed once the execution ends
+        self._worker_session_factory = worker_session_factory
+        self._worker_local = threading.local()
+        self._worker_sessions: list[Session] = []
+        self._worker_sessions_lock = threading.Lock()
+        # called with the node id whenever outputs are stored to data cache during concurrent execution
+        self._stored_listener: Callable[[str], None] | None = None
         # cache unreached node ids, each period will only process nodes not in this list, and may append more unreached nodes 
         self._unreached_node_ids: set[str] = set()
         self._control_structure_manager: ControlStructureManager | None = None
+        # nodes whose results from the last run are reused instead of executed, and the loader for their outputs
+        self._reused_node_ids: set[str] = set()
+        self._reuse_loader: Callable[[str], dict[str, Data]] | None = None
+        # nodes constructed and inferred while getting UI hints, reused by construction and static analysis:
+        # node id -> node object or construction error, node id -> (input schemas, output schemas or inference error)
+        self._hint_nodes: dict[str, BaseNode | Exception] = {}
+        self._hint_schemas: dict[str, tuple[dict[str, Schema], dict[str, Schema] | Exception]] = {}
+        # duplicated nodes, executed once by the first of them: node id -> ids of its duplicates, and the reverse
+        self._duplicates: dict[str, list[str]] = {}
+        self._duplicate_of: dict[str, str] = {}
+        # chains of column expressions, evaluated at once by their last node: last node id -> node ids in the chain,
+        # and other node ids in chains -> the last node id
+        self._fusions: dict[str, list[str]] = {}
+        self._fused_into: dict[str, str] = {}
 
         if TRACING_ENABLED:
             assert trace_begin is not None
             end_time = time.perf_counter()
             logger.debug(f"[Tracing] Initialized ProjectInterpreter in {(end_time - trace_begin) * 1000:.2f} ms.")
 
+    def reuse_results(self, node_ids: set[str], loader: Callable[[str], dict[str, Data]]) -> None:
+        """
+        Reuse results of the last run for given nodes instead of executing them.
+        Must be called before static analysis, the final reused set is settled after it,
+        see get_reused_node_ids.
+
+        The loader function will look like:
+        outputs = loader(node_id: str) -> dict[str, Data]
+        It is called lazily, only for reused nodes consumed by executed nodes.
+        In a preview, reused tables are cut to preview_rows like the outputs of source nodes.
+        """
+        if self._stage not in ("init", "constructed"):
+            raise AssertionError(f"Graph is already in stage '{self._stage}', cannot set reused nodes.")
+        self._reused_node_ids = {node_id for node_id in node_ids if node_id in self._node_map}
+        self._reuse_loader = loader
+
+    def get_reused_node_ids(self) -> set[str]:
+        """
+        Get the ids of nodes whose results are reused in execution.
+        """
+        return self._reused_node_ids.copy()
+
     def construct_nodes(self, callback: Callable[[str, Literal["success", "error"], Exception | None], bool]) -> None:
         """ 
         Construct node instances from node definitions to test if there are parameter errors .
@@ -82,7 +156,7 @@ class ProjectInterpreter:
         
         if self._stage != "init":
             raise AssertionError(f"Graph is already in stage '{self._stage}', cannot construct nodes again.")
-        self._exec_queue = list(nx.topological_sort(self._graph))
+        self._exec_queue = list(self._plan.node_ids)
 
         for node_id in self._exec_queue:
             # during construction, if one nodes fails, it does not affect others
@@ -92,13 +166,19 @@ class ProjectInterpreter:
             params = node.params
 
             try:
-                node_object = BaseNode.create_from_type(type=type, context=self._context, id=id, **params)
+                hint_node = self._hint_nodes.pop(node_id, None)
+                if isinstance(hint_node, Exception):
+                    raise hint_node
+                if hint_node is not None:
+                    node_object = hint_node
+                else:
+                    node_object = BaseNode.create_from_type(type=type, context=self._context, id=id, **params)
                 if self._node_objects is None:
                     raise RuntimeError("Node objects initialized failed.")
                 self._node_objects[id] = node_object
             except ValidationError as e:
                 self._unreached_node_ids.update(
-                    [node_id, *nx.descendants(self._graph, node_id)]
+                    [node_id, *self._plan.descendants_of(node_id)]
                 )
                 # convert pydantic ValidationError to parameter error with more information
                 errors = e.errors()
@@ -116,7 +196,7 @@ class ProjectInterpreter:
                     continue
             except Exception as e:
                 self._unreached_node_ids.update(
-                    [node_id, *nx.descendants(self._graph, node_id)]
+                    [node_id, *self._plan.descendants_of(node_id)]
                 )
                 continue_execution = callback(id, "error", e)
                 if not continue_execution:
@@ -160,34 +240,22 @@ class ProjectInterpreter:
             if node_id in self._unreached_node_ids:
                 continue
             node = self._node_objects[node_id]
-            in_edges = list(self._graph.in_edges(node_id, data=True)) # type: ignore
 
             # get input schema
             input_schemas : dict[str, Schema] = {}
-            for edge in in_edges:
-                src_id, _, edge_data = edge
-                src_port = edge_data['src_port']
-                tar_port = edge_data['tar_port']
+            for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
                 src_schema = schema_cache[(src_id, src_port)]
                 input_schemas[tar_port] = src_schema
 
             # run schema inference
             try:
-                input_schemas_hash: str = ""
-                if DEBUG:
-                    input_schemas_hash = safe_hash(input_schemas) # guard to avoid accidental mutation
-
-                output_schemas = node.infer_schema(input_schemas)
-
-                if DEBUG:
-                    if safe_hash(input_schemas) != input_schemas_hash:
-                        raise AssertionError(f"Node {node_id} in type {node.type} input schemas were modified during inference, which is not allowed.")
+                output_schemas = self._infer_schema(node_id, node, input_schemas)
                 # store output schema
                 for tar_port, schema in output_schemas.items():
                     schema_cache[(node_id, tar_port)] = schema
             except Exception as e:
                 self._unreached_node_ids.update(
-                    [node_id, *nx.descendants(self._graph, node_id)]
+                    [node_id, *self._plan.descendants_of(node_id)]
                 )
                 continue_execution = callback(node_id, "error", e)
                 if not continue_execution:
@@ -202,9 +270,12 @@ class ProjectInterpreter:
                     continue
 
         # analyze control structures
-        self._control_structure_manager = ControlStructureManager()
-        unreached = self._control_structure_manager.analyze(self._graph, self._node_objects, self._unreached_node_ids, callback)
+        self._control_structure_manager = ControlStructureManager(self._plan)
+        unreached = self._control_structure_manager.analyze(self._node_objects, self._unreached_node_ids, callback)
         self._unreached_node_ids.update(unreached)
+        self._settle_reused_nodes()
+        self._find_duplicates()
+        self._find_fusions()
 
         self._stage = "static_analyzed"
         
@@ -215,12 +286,116 @@ class ProjectInterpreter:
 
         return
 
+    def _infer_schema(self, node_id: str, node: BaseNode, input_schemas: dict[str, Schema]) -> dict[str, Schema]:
+        """
+        Infer output schemas of a node, reusing the result of getting UI hints if it was inferred on the same input schemas.
+        """
+        hint_schemas = self._hint_schemas.pop(node_id, None)
+        if hint_schemas is not None and hint_schemas[0] == input_schemas:
+            if isinstance(hint_schemas[1], Exception):
+                raise hint_schemas[1]
+            return hint_schemas[1]
+
+        input_schemas_hash: str = ""
+        if DEBUG:
+            input_schemas_hash = safe_hash(input_schemas) # guard to avoid accidental mutation
+
+        output_schemas = node.infer_schema(input_schemas)
+
+        if DEBUG:
+            if safe_hash(input_schemas) != input_schemas_hash:
+                raise AssertionError(f"Node {node_id} in type {node.type} input schemas were modified during inference, which is not allowed.")
+        return output_schemas
+
+    def _settle_reused_nodes(self) -> None:
+        """
+        Shrink the reused nodes so that they can be skipped safely:
+        every ancestor of a reused node is reused, and a control structure is reused as a whole or not at all.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        if not self._reused_node_ids:
+            return
+        dirty = set(self._node_map.keys()) - self._reused_node_ids
+        dirty.update(self._unreached_node_ids)
+        changed = True
+        while changed:
+            changed = False
+            for node_id in list(dirty):
+                dirty.update(self._plan.descendants_of(node_id))
+            for struc in (self._control_structure_manager.control_structures or {}).values():
+                members = {struc.begin_node_id, struc.end_node_id, *(struc.body_node_ids or set())}
+                if members & dirty and not members <= dirty:
+                    dirty.update(members) # type: ignore
+                    changed = True
+        self._reused_node_ids = set(self._node_map.keys()) - dirty
+        logger.debug(f"Reusing results of {len(self._reused_node_ids)} nodes from the last run.")
+
+    def _find_duplicates(self) -> None:
+        """
+        Find scheduled nodes with the same type, params and input sources, only the first of them is executed
+        and its outputs are reported for the others. Sources are compared after merging their own duplicates,
+        so duplicated chains are merged as a whole. Control structures are never merged.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        first_of: dict[str, str] = {} # signature -> id of the first node
+        for node_id in self._exec_queue:
+            if not self._is_scheduled(node_id) or self._control_structure_manager.is_begin_node(node_id):
+                continue
+            if not self._node_objects[node_id].REPEATABLE:
+                continue
+            topo_node = self._node_map[node_id]
+            signature = safe_hash([
+                topo_node.type,
+                topo_node.params,
+                sorted(
+                    (tar_port, self._duplicate_of.get(src_id, src_id), src_port)
+                    for src_id, src_port, tar_port in self._plan.in_edges_of(node_id)
+                ),
+            ])
+            first_id = first_of.setdefault(signature, node_id)
+            if first_id != node_id:
+                self._duplicates.setdefault(first_id, []).append(node_id)
+                self._duplicate_of[node_id] = first_id
+        if self._duplicate_of:
+            logger.debug(f"Executing {len(self._duplicate_of)} duplicated nodes only once.")
+
+    def _find_fusions(self) -> None:
+        """
+        Find maximal chains of scheduled COLUMN_EXPR nodes, each of them feeding its table only to the next one.
+        A chain is executed by its last node, see _execute_fusion, other nodes in it are not scheduled,
+        and the inputs of the whole chain are collected by its last node.
+        """
+        def fusible(node_id: str) -> bool:
+            return self._is_scheduled(node_id) and self._node_objects[node_id].COLUMN_EXPR
+
+        for node_id in self._exec_queue:
+            # duplicates are reported with the outputs of the node, so it can only be the last one
+            if not fusible(node_id) or node_id in self._duplicates:
+                continue
+            out_edges = self._plan.out_edges_of(node_id)
+            if len(out_edges) != 1:
+                continue
+            tar_id, src_port, tar_port = out_edges[0]
+            if src_port != "table" or tar_port != "table" or not fusible(tar_id):
+                continue
+            # extend the chain ending with node_id
+            chain = self._fusions.pop(node_id, [node_id])
+            chain.append(tar_id)
+            self._fusions[tar_id] = chain
+            for member_id in chain[:-1]:
+                self._fused_into[member_id] = tar_id
+        if self._fusions:
+            logger.debug(f"Fused {len(self._fused_into) + len(self._fusions)} column expression nodes into {len(self._fusions)} chains.")
+
     def execute(self, 
                 callbefore: Callable[[str], None], 
                 callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+                max_workers: int = EXEC_MAX_WORKERS,
     ) -> None:
         """ 
         Execute the graph in topological order.
+        If max_workers > 1, independent nodes are dispatched to a thread pool once all their inputs are ready,
+        the callbacks are still called in the main thread.
         
         The callbefore function will look like:
         callbefore(node_id: str) -> None
@@ -233,103 +408,479 @@ class ProjectInterpreter:
 
         if self._stage != "static_analyzed":
             raise AssertionError(f"Graph is in stage '{self._stage}', cannot run.")
+        if self._context.is_stub():
+            raise AssertionError("Graph is interpreted without file and financial data managers, cannot run.")
         assert self._control_structure_manager is not None, "Control structure manager is not initialized."
 
-        data_cache : dict[tuple[str, str], Data] = {} # cache for node output data: (node_id, port) -> Data
+        data_cache = DataCache(self._count_consumers()) # cache for node output data: (node_id, port) -> Data
+        self._prefetch_cache()
+        try:
+            if max_workers > 1:
+                finished = self._execute_concurrently(data_cache, callbefore, callafter, max_workers)
+            else:
+                finished = self._execute_sequentially(data_cache, callbefore, callafter)
+        finally:
+            # prefetched results never looked up, e.g. of nodes after a failed one, are not kept for the rest of the task
+            self._cache_manager.discard_prefetched()
+        if not finished:
+            return
+
+        self._stage = "finished"
+
+        if TRACING_ENABLED:
+            assert trace_begin is not None
+            end_time = time.perf_counter()
+            logger.debug(f"[Tracing] Executed nodes in {(end_time - trace_begin) * 1000:.2f} ms.")
+            logger.debug(
+                f"[Tracing] Peak data cache size {data_cache.peak_size / 1024 / 1024:.2f} MB, "
+                f"peak process memory {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.2f} MB."
+            )
+
+        return
+
+    def _is_scheduled(self, node_id: str) -> bool:
+        """ Check if the node is executed in the main flow and collects its inputs from data cache. """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        return (
+            node_id not in self._unreached_node_ids
+            and node_id not in self._reused_node_ids
+            and node_id not in self._duplicate_of
+            and node_id not in self._fused_into
+            and not self._control_structure_manager.is_body_node(node_id)
+            and not self._control_structure_manager.is_end_node(node_id)
+        )
+
+    def _count_consumers(self) -> dict[tuple[str, str], int]:
+        """ Count how many scheduled nodes consume each output: (node_id, port) -> count. """
+        consumer_counts: dict[tuple[str, str], int] = {}
         for node_id in self._exec_queue:
-            if node_id in self._unreached_node_ids:
+            if not self._is_scheduled(node_id):
                 continue
-            if self._control_structure_manager.is_body_node(node_id):
-                # body nodes are executed in control structure execution
+            for src_id, src_port, _ in self._collected_edges_of(node_id):
+                key = (src_id, src_port)
+                consumer_counts[key] = consumer_counts.get(key, 0) + 1
+        return consumer_counts
+
+    def _prefetch_cache(self) -> None:
+        """
+        Compute cache keys of all nodes whose input lineages are known before execution,
+        i.e. source nodes and their descendants through deterministic nodes, and prefetch them in one batch.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        lineages: dict[tuple[str, str], str] = {} # (node_id, port) -> lineage hash
+        cache_keys: list[str] = []
+        for node_id in self._exec_queue:
+            if not self._is_scheduled(node_id):
                 continue
-            if self._control_structure_manager.is_end_node(node_id):
-                # end nodes' outputs are set in control structure execution
+            if node_id in self._fusions:
+                # fused chains are not cached, but the lineages of their outputs are known
+                self._trace_fusion_lineages(node_id, lineages)
                 continue
-            in_edges = list(self._graph.in_edges(node_id, data=True)) # type: ignore
-
-            # 1. get input data
-            input_data : dict[str, Data] = {}
-            for edge in in_edges:
-                src_id, _, edge_data = edge
-                src_port = edge_data['src_port']
-                tar_port = edge_data['tar_port']
-                src_data = data_cache[(src_id, src_port)]
-                input_data[tar_port] = src_data
-
-            output_data: dict[str, Data]
-            running_time: float
-
-            is_control_structure = self._control_structure_manager.is_begin_node(node_id)
-
-            # 2. execute normal node
-            if is_control_structure:
-                res = self._execute_control_structure(
-                    begin_node_id=node_id,
-                    inputs=input_data,
-                    callbefore=callbefore,
-                    callafter=callafter,
-                )
-                if res is None:
-                    # execution was stopped in control structure
-                    return
+            input_lineages: dict[str, str] = {}
+            for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
+                lineage = lineages.get((src_id, src_port))
+                if lineage is None:
+                    break
+                input_lineages[tar_port] = lineage
+            else:
+                if self._control_structure_manager.is_begin_node(node_id):
+                    # control structures are cached under the end node
+                    output_node_id = self._control_structure_manager.get_end_node_id(node_id)
+                    params: dict[str, Any] = {
+                        "control_structure_hash": self._control_structure_manager.hash_control_structure(node_id, self._node_map)
+                    }
+                    member_ids = [node_id, output_node_id, *self._control_structure_manager.iter_control_structure(node_id)]
+                    deterministic = all(self._node_objects[member_id].DETERMINISTIC for member_id in member_ids)
                 else:
-                    output_data, running_time = res
-                # 3. call callafter for the begin node
-                # call callafter for end node
-                end_node_id = self._control_structure_manager.get_end_node_id(node_id)
-                continue_execution = callafter(end_node_id, "success", output_data, running_time)
-                if not continue_execution:
+                    output_node_id = node_id
+                    params = self._node_map[node_id].params
+                    deterministic = self._node_objects[node_id].DETERMINISTIC
+                cache_key = self._cache_manager.get_cache_key(self._node_map[output_node_id].type, params, input_lineages)
+                cache_keys.append(cache_key)
+                if deterministic:
+                    for _, src_port, _ in self._plan.out_edges_of(output_node_id):
+                        lineages[(output_node_id, src_port)] = self._cache_manager.lineage_of(cache_key, src_port)
+                        # duplicates report the same outputs
+                        for duplicate_id in self._duplicates.get(output_node_id, []):
+                            lineages[(duplicate_id, src_port)] = lineages[(output_node_id, src_port)]
+        self._cache_manager.prefetch(cache_keys)
+
+    def _trace_fusion_lineages(self, node_id: str, lineages: dict[tuple[str, str], str]) -> None:
+        """ Add the lineages of outputs of a fused chain to lineages, if the lineages of all its inputs are known. """
+        for member_id in self._fusions[node_id]:
+            input_lineages: dict[str, str] = {}
+            for src_id, src_port, tar_port in self._plan.in_edges_of(member_id):
+                lineage = lineages.get((src_id, src_port))
+                if lineage is None or not self._node_objects[member_id].DETERMINISTIC:
                     return
+                input_lineages[tar_port] = lineage
+            cache_key = self._cache_manager.get_cache_key(self._node_map[member_id].type, self._node_map[member_id].params, input_lineages)
+            for _, src_port, _ in self._plan.out_edges_of(member_id):
+                lineages[(member_id, src_port)] = self._cache_manager.lineage_of(cache_key, src_port)
+        for duplicate_id in self._duplicates.get(node_id, []):
+            for _, src_port, _ in self._plan.out_edges_of(node_id):
+                lineages[(duplicate_id, src_port)] = lineages[(node_id, src_port)]
+
+    def _execute_sequentially(
+        self,
+        data_cache: DataCache,
+        callbefore: Callable[[str], None],
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+    ) -> bool:
+        """
+        Execute nodes one by one in topological order.
+        Return False if the execution was stopped.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        for node_id in self._exec_queue:
+            # skip unreached and reused nodes, body nodes are executed in control structure execution,
+            # and end nodes' outputs are set in control structure execution
+            if not self._is_scheduled(node_id):
+                continue
+            input_data = self._collect_inputs(node_id, data_cache)
+            if not self._execute_in_main_thread(node_id, input_data, data_cache, callbefore, callafter):
+                return False
+        return True
+
+    def _execute_concurrently(
+        self,
+        data_cache: DataCache,
+        callbefore: Callable[[str], None],
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+        max_workers: int,
+    ) -> bool:
+        """
+        Execute nodes whose inputs are all ready in a thread pool.
+        Workers only run nodes, all callbacks and bookkeeping happen in the main thread by consuming worker events.
+        Control structures, fused chains and nodes which are not thread safe are executed in the main thread,
+        so are SESSION_BOUND nodes if workers can not open db sessions of their own.
+        Once the execution ends or is stopped, nodes not started yet are cancelled and running ones are waited for,
+        so that no worker is still computing after returning.
+        Return False if the execution was stopped.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        # a node is ready once all nodes it collects inputs from have stored their outputs
+        order: dict[str, int] = {} # node id -> position in topological order
+        waiting: dict[str, int] = {} # node id -> number of producers not stored yet
+        consumers_of: dict[str, list[str]] = {} # producer id -> ids of nodes waiting for it
+        ready: list[tuple[int, str]] = [] # heap by topological order, so that nodes are dispatched in a stable order
+        for node_id in self._exec_queue:
+            if not self._is_scheduled(node_id):
+                continue
+            order[node_id] = len(order)
+            producer_ids = {
+                src_id for src_id, _, _ in self._collected_edges_of(node_id) if src_id not in self._reused_node_ids
+            }
+            waiting[node_id] = len(producer_ids)
+            for producer_id in producer_ids:
+                consumers_of.setdefault(producer_id, []).append(node_id)
+            if not producer_ids:
+                heapq.heappush(ready, (order[node_id], node_id))
+
+        def _on_stored(node_id: str) -> None:
+            for consumer_id in consumers_of.pop(node_id, []):
+                waiting[consumer_id] -= 1
+                if waiting[consumer_id] == 0:
+                    heapq.heappush(ready, (order[consumer_id], consumer_id))
+
+        running: set[str] = set()
+        events: queue.Queue[tuple[Literal["before", "success", "error"], str, Any]] = queue.Queue()
+        stopped = threading.Event()
+
+        def _worker(node_id: str, input_data: dict[str, Data], session_bound: bool) -> None:
+            if stopped.is_set():
+                return
+            session: Session | None = None
+            try:
+                context: NodeContext | None = None
+                if session_bound:
+                    session, context = self._worker_context()
+                result = self._execute_single_node(
+                    node_id,
+                    input_data,
+                    lambda nid: events.put(("before", nid, None)),
+                    use_cache=True,
+                    context=context,
+                )
+                if session is not None:
+                    session.commit()
+            except Exception as e:
+                if session is not None:
+                    session.rollback()
+                events.put(("error", node_id, e))
             else:
-                try:
-                    output_data, running_time = self._execute_single_node(
-                        node_id, 
-                        input_data, 
-                        callbefore,
-                        use_cache=True
-                    )
-                # 3. call callafter
-                except Exception as e:
-                    self._unreached_node_ids.update(
-                        [node_id, *nx.descendants(self._graph, node_id)]
-                    )
-                    continue_execution = callafter(node_id, "error", e, None)
-                    if not continue_execution:
-                        self._unreached_node_ids.update(
-                            [node_id, *nx.descendants(self._graph, node_id)]
-                        )
-                        return
-                    else:
+                events.put(("success", node_id, result))
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nodepy-exec")
+        self._stored_listener = _on_stored
+        try:
+            while True:
+                # 1. dispatch all ready nodes, executing in main thread may make more nodes ready
+                while ready:
+                    _, node_id = heapq.heappop(ready)
+                    if node_id in self._unreached_node_ids:
                         continue
-                else:
-                    callafter_node_id = node_id if not is_control_structure else self._control_structure_manager.get_end_node_id(node_id)
-                    continue_execution = callafter(callafter_node_id, "success", output_data, running_time)
-                    if not continue_execution:
-                        return
-
-            # 4. store output data to self cache
-            if is_control_structure:
-                # for control structures, save outputs to the end node only
-                end_node_id = self._control_structure_manager.get_end_node_id(node_id)
-                for tar_port, data in output_data.items():
-                    logger.debug(f"Storing output data for control structure end node {end_node_id} port {tar_port}")
-                    if data_cache.get((end_node_id, tar_port)) is not None:
-                        raise RuntimeError(f"Node '{end_node_id}' output on port '{tar_port}' already exists in cache.")
-                    data_cache[(end_node_id, tar_port)] = data
-            else:
-                for tar_port, data in output_data.items():
-                    if data_cache.get((node_id, tar_port)) is not None:
-                        raise RuntimeError(f"Node '{node_id}' output on port '{tar_port}' already exists in cache.")
-                    data_cache[(node_id, tar_port)] = data
+                    input_data = self._collect_inputs(node_id, data_cache)
+                    node = self._node_objects[node_id]
+                    if (
+                        self._control_structure_manager.is_begin_node(node_id)
+                        or node_id in self._fusions
+                        or not node.THREAD_SAFE
+                        or (node.SESSION_BOUND and self._worker_session_factory is None)
+                    ):
+                        if not self._execute_in_main_thread(node_id, input_data, data_cache, callbefore, callafter):
+                            return False
+                    else:
+                        running.add(node_id)
+                        executor.submit(_worker, node_id, input_data, node.SESSION_BOUND)
+                if not running:
+                    break
+                # 2. consume one event from workers, with timeout to keep responsive to signals
+                try:
+                    kind, node_id, result = events.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if kind == "before":
+                    callbefore(node_id)
+                    continue
+                running.discard(node_id)
+                if kind == "error":
+                    if not self._report_error(node_id, result, data_cache, callafter):
+                        return False
+                    continue
+                output_data, running_time = result
+                if not callafter(node_id, "success", output_data, running_time):
+                    return False
+                self._store_outputs(node_id, output_data, data_cache)
+                if not self._report_duplicates(node_id, output_data, running_time, data_cache, callbefore, callafter):
+                    return False
+        finally:
+            self._stored_listener = None
+            # running nodes can not be interrupted, skip queued ones and wait for running ones to finish
+            stopped.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._close_worker_sessions()
+        return True
 
-        self._stage = "finished"
+    def _worker_context(self) -> tuple[Session, NodeContext]:
+        """ Get the db session of the current worker thread and the context with managers on it, opened on first use. """
+        assert self._worker_session_factory is not None, "Worker session factory is not set."
+        if getattr(self._worker_local, "session", None) is None:
+            session = self._worker_session_factory()
+            with self._worker_sessions_lock:
+                self._worker_sessions.append(session)
+            self._worker_local.session = session
+            self._worker_local.context = NodeContext(
+                file_manager=FileManager(sync_db_session=session),
+                financial_data_manager=FinancialDataManager(db_client=session),
+                user_id=self._context.user_id,
+                project_id=self._context.project_id,
+                preview_rows=self._context.preview_rows,
+            )
+        return self._worker_local.session, self._worker_local.context
 
-        if TRACING_ENABLED:
-            assert trace_begin is not None
-            end_time = time.perf_counter()
-            logger.debug(f"[Tracing] Executed nodes in {(end_time - trace_begin) * 1000:.2f} ms.")
+    def _close_worker_sessions(self) -> None:
+        """ Close the db sessions opened by worker threads, after all workers have finished. """
+        with self._worker_sessions_lock:
+            sessions, self._worker_sessions = self._worker_sessions, []
+        for session in sessions:
+            session.close()
+        self._worker_local = threading.local()
 
-        return
+    def _execute_in_main_thread(
+        self,
+        node_id: str,
+        input_data: dict[str, Data],
+        data_cache: DataCache,
+        callbefore: Callable[[str], None],
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+    ) -> bool:
+        """
+        Execute a normal node or a whole control structure, report it and store its outputs.
+        Return False if the execution was stopped.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        if node_id in self._fusions:
+            return self._execute_fusion(node_id, input_data, data_cache, callbefore, callafter)
+        if self._control_structure_manager.is_begin_node(node_id):
+            res = self._execute_control_structure(
+                begin_node_id=node_id,
+                inputs=input_data,
+                callbefore=callbefore,
+                callafter=callafter,
+            )
+            if res is None:
+                # execution was stopped in control structure
+                return False
+            output_data, running_time = res
+            # call callafter for end node, and save outputs to the end node only
+            end_node_id = self._control_structure_manager.get_end_node_id(node_id)
+            if not callafter(end_node_id, "success", output_data, running_time):
+                return False
+            logger.debug(f"Storing output data for control structure end node {end_node_id}")
+            self._store_outputs(end_node_id, output_data, data_cache)
+            return True
+
+        try:
+            output_data, running_time = self._execute_single_node(
+                node_id, 
+                input_data, 
+                callbefore,
+                use_cache=True
+            )
+        except Exception as e:
+            return self._report_error(node_id, e, data_cache, callafter)
+        if not callafter(node_id, "success", output_data, running_time):
+            return False
+        self._store_outputs(node_id, output_data, data_cache)
+        return self._report_duplicates(node_id, output_data, running_time, data_cache, callbefore, callafter)
+
+    def _collected_edges_of(self, node_id: str) -> list[tuple[str, str, str]]:
+        """ In edges whose data are collected from data cache by the node, for a fused chain, of all nodes in it. """
+        return [
+            edge
+            for member_id in self._fusions.get(node_id, [node_id])
+            for edge in self._plan.in_edges_of(member_id)
+            if edge[0] not in self._fused_into # tables passed inside the chain
+        ]
+
+    def _collect_inputs(self, node_id: str, data_cache: DataCache) -> dict[str, Data]:
+        """
+        Collect input data of the node from data cache by its in edges, loading reused results lazily.
+        The collected entries are released from data cache once their last consumer has collected them.
+        Tables passed inside a fused chain are not collected.
+        """
+        input_data : dict[str, Data] = {}
+        keys: list[tuple[str, str]] = []
+        for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
+            if src_id in self._fused_into:
+                continue
+            key = (src_id, src_port)
+            if src_id in self._reused_node_ids and key not in data_cache:
+                self._store_outputs(src_id, self._load_reused_outputs(src_id), data_cache)
+            input_data[tar_port] = data_cache[key]
+            keys.append(key)
+        data_cache.consume(keys)
+        return input_data
+
+    def _load_reused_outputs(self, node_id: str) -> dict[str, Data]:
+        """
+        Load the reused results of the node. In a preview, they are inputs like the outputs of source nodes,
+        so their tables are cut to the preview rows too.
+        """
+        assert self._reuse_loader is not None, "Reuse loader is not set."
+        outputs = self._reuse_loader(node_id)
+        preview_rows = self._context.preview_rows
+        if preview_rows is None:
+            return outputs
+        return {
+            port: Data(payload=Table(df=data.payload.df.head(preview_rows), col_types=data.payload.col_types))
+            if isinstance(data.payload, Table) and len(data.payload.df) > preview_rows else data
+            for port, data in outputs.items()
+        }
+
+    def _store_outputs(self, node_id: str, output_data: dict[str, Data], data_cache: DataCache) -> None:
+        """ Store output data of the node to data cache, and notify the scheduler of concurrent execution if any. """
+        data_cache.store(node_id, output_data)
+        if self._stored_listener is not None:
+            self._stored_listener(node_id)
+
+    def _execute_fusion(
+        self,
+        node_id: str,
+        input_data: dict[str, Data],
+        data_cache: DataCache,
+        callbefore: Callable[[str], None],
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+    ) -> bool:
+        """
+        Execute a fused chain of column expressions by its last node, in the main thread to collect the inputs of the chain.
+        Each result column is computed once from the columns of the first table and the columns computed before,
+        and the output tables of all nodes share these columns instead of copying the table at each node.
+        The chain bypasses the result cache, it is cheaper to compute than to fetch.
+        Return False if the execution was stopped.
+        """
+        chain = self._fusions[node_id]
+        chain_inputs = {member_id: self._collect_inputs(member_id, data_cache) for member_id in chain[:-1]}
+        chain_inputs[node_id] = input_data
+        table_data = chain_inputs[chain[0]]["table"]
+        assert isinstance(table_data.payload, Table)
+        cols: dict[str, Series] = dict(table_data.payload.df.items())
+        for i, member_id in enumerate(chain):
+            node = self._node_objects[member_id]
+            member_inputs = {**chain_inputs[member_id], "table": table_data}
+            callbefore(member_id)
+            start_time = time.perf_counter()
+            try:
+                output_data = node.execute_col(cols, member_inputs)
+            except Exception as e:
+                # the rest of the chain has collected its inputs already
+                self._unreached_node_ids.update(chain[i + 1:])
+                return self._report_error(member_id, e, data_cache, callafter)
+            running_time = (time.perf_counter() - start_time) * 1000  # in ms
+            output_data = self._cache_manager.attach_lineage(
+                node_type=self._node_map[member_id].type,
+                params=self._node_map[member_id].params,
+                inputs=member_inputs,
+                outputs=output_data,
+                deterministic=node.DETERMINISTIC,
+            )
+            if not callafter(member_id, "success", output_data, running_time):
+                return False
+            table_data = output_data["table"]
+        self._store_outputs(node_id, output_data, data_cache)
+        return self._report_duplicates(node_id, output_data, running_time, data_cache, callbefore, callafter)
+
+    def _report_duplicates(
+        self,
+        node_id: str,
+        output_data: dict[str, Data],
+        running_time: float,
+        data_cache: DataCache,
+        callbefore: Callable[[str], None],
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+    ) -> bool:
+        """
+        Report and store the outputs of an executed node for its duplicates, which are not executed.
+        Return False if the execution was stopped.
+        """
+        for duplicate_id in self._duplicates.get(node_id, []):
+            callbefore(duplicate_id)
+            if not callafter(duplicate_id, "success", output_data, running_time):
+                return False
+            self._store_outputs(duplicate_id, output_data, data_cache)
+        return True
+
+    def _report_error(
+        self,
+        node_id: str,
+        exception: Exception,
+        data_cache: DataCache,
+        callafter: Callable[[str, Literal["success", "error"], dict[str, Any] | Exception, float | None], bool],
+    ) -> bool:
+        """
+        Mark the node, its duplicates and their descendants as unreached and report the error.
+        The descendants will never collect their inputs, so release them from data cache.
+        Return False if the execution should stop.
+        """
+        for failed_id in [node_id, *self._duplicates.get(node_id, [])]:
+            descendant_ids = self._plan.descendants_of(failed_id)
+            for descendant_id in descendant_ids:
+                if not self._is_scheduled(descendant_id):
+                    continue
+                data_cache.consume([
+                    (src_id, src_port) for src_id, src_port, _ in self._collected_edges_of(descendant_id)
+                ])
+                self._unreached_node_ids.add(descendant_id)
+            self._unreached_node_ids.update(
+                [failed_id, *descendant_ids]
+            )
+            failed_exception = exception
+            if isinstance(exception, NodeExecutionError) and exception.node_id == node_id and failed_id != node_id:
+                failed_exception = NodeExecutionError(node_id=failed_id, err_msg=exception.err_msg)
+            if not callafter(failed_id, "error", failed_exception, None):
+                return False
+        return True
 
     def get_unreached_nodes(self) -> list[int]:
         """ 
@@ -346,13 +897,17 @@ class ProjectInterpreter:
         """
         Get UI hints from all nodes.
         For this method, there is no need to clean up unreached nodes, because it traverses all nodes anyway.
+        If called before construction, the constructed nodes and their inferred schemas are reused by
+        construct_nodes and static_analyse.
+        Hints are memoized by node type, parameters and input schemas, and fetched in one batch.
         param: 
         The callback function will look like:
         continue_execution = callback(node_id: str, hint: dict[str, Schema]) -> bool
         """
         # Because the hint method may be called before all parameters are set,
         # so it should process all node errors transparently.
-        exec_queue = list(nx.topological_sort(self._graph))
+        exec_queue = self._plan.node_ids
+        share = self._stage == "init"
         node_objects: dict[str, BaseNode] = {}
         # 1. try to construct nodes
         for node_id in exec_queue:
@@ -365,24 +920,26 @@ class ProjectInterpreter:
                     **topo_node.params
                 )
                 node_objects[node_id] = node_object
-            except Exception:
+                if share:
+                    self._hint_nodes[node_id] = node_object
+            except Exception as e:
+                if share:
+                    self._hint_nodes[node_id] = e
                 continue
 
         schema_cache : dict[tuple[str, str], Schema] = {} # cache for node output schema: (node_id, port) -> Schema
+        all_input_schemas: list[dict[str, Schema]] = []
         for node_id in exec_queue:
             # 2. get as much as schemas as possible
             node = node_objects.get(node_id, None)
-            in_edges = list(self._graph.in_edges(node_id, data=True)) # type: ignore
 
             # get input schema
             input_schemas : dict[str, Schema] = {}
-            for edge in in_edges:
-                src_id, _, edge_data = edge
-                src_port = edge_data['src_port']
-                tar_port = edge_data['tar_port']
+            for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
                 if (src_id, src_port) in schema_cache:
                     src_schema = schema_cache[(src_id, src_port)]
                     input_schemas[tar_port] = src_schema
+            all_input_schemas.append(input_schemas)
             if node is not None:
                 # run schema inference
                 try:
@@ -390,12 +947,27 @@ class ProjectInterpreter:
                     # store output schema
                     for tar_port, schema in output_schemas.items():
                         schema_cache[(node_id, tar_port)] = schema
-                except Exception:
-                    pass
+                    if share:
+                        self._hint_schemas[node_id] = (input_schemas, output_schemas)
+                except Exception as e:
+                    if share:
+                        self._hint_schemas[node_id] = (input_schemas, e)
 
-            # 3. get UI hint for constructed nodes
-            topo_node = self._node_map[node_id]
-            hint = BaseNode.get_hint(topo_node.type, input_schemas, topo_node.params)
+        # 3. get UI hints, computing only the ones not memoized
+        hint_keys = [
+            self._cache_manager.get_hint_key(self._node_map[node_id].type, self._node_map[node_id].params, input_schemas)
+            for node_id, input_schemas in zip(exec_queue, all_input_schemas)
+        ]
+        hints = self._cache_manager.get_hints(hint_keys)
+        new_hints: dict[str, dict[str, Any]] = {}
+        for i, (node_id, input_schemas) in enumerate(zip(exec_queue, all_input_schemas)):
+            if hints[i] is None:
+                topo_node = self._node_map[node_id]
+                hints[i] = BaseNode.get_hint(topo_node.type, input_schemas, topo_node.params)
+                new_hints[hint_keys[i]] = hints[i] # type: ignore
+        self._cache_manager.set_hints(new_hints)
+        for node_id, hint in zip(exec_queue, hints):
+            assert hint is not None
             continue_execution = callback(node_id, hint)
             if not continue_execution:
                 break  
@@ -405,14 +977,18 @@ class ProjectInterpreter:
         node_id: str, 
         input_data: dict[str, Data],
         callbefore: Callable[[str], None], 
-        use_cache: bool
+        use_cache: bool,
+        context: NodeContext | None = None,
     ) -> tuple[dict[str, Data], float]:
         """
         Execute a single node by its id with given inputs.
+        If context is set, a copy of the node bound to it is executed instead, e.g. in a worker thread with its own db session.
         """
         node = self._node_objects.get(node_id, None)
         if node is None:
             raise ValueError(f"Node {node_id} is not constructed.")
+        if context is not None:
+            node = node.model_copy(update={"context": context})
 
         output_data: dict[str, Data]
         running_time: float
@@ -447,15 +1023,23 @@ class ProjectInterpreter:
         else:
             assert isinstance(cache_data[1], float), "Cached running time should be a float for single nodes."
             output_data, running_time, _ = cache_data # type: ignore
-        # 3. store to CacheManager
+        # 3. attach lineage to outputs and store to CacheManager on cache miss
         if output_data is not None and use_cache:
-            self._cache_manager.set(
+            output_data = self._cache_manager.attach_lineage(
                 node_type=self._node_map[node_id].type,
                 params=self._node_map[node_id].params,
                 inputs=input_data,
                 outputs=output_data,
-                running_time=running_time,
+                deterministic=node.DETERMINISTIC,
             )
+            if cache_data is None:
+                self._cache_manager.set(
+                    node_type=self._node_map[node_id].type,
+                    params=self._node_map[node_id].params,
+                    inputs=input_data,
+                    outputs=output_data,
+                    running_time=running_time,
+                )
         return output_data, running_time
 
     def _execute_control_structure(
@@ -483,7 +1067,11 @@ class ProjectInterpreter:
             # send strat message (by callbefore) for begin node and all body nodes
             callbefore(begin_node_id)
             # hash control structure
-            control_structure_hash = self._control_structure_manager.hash_control_structure(self._graph, begin_node_id, self._node_map)
+            control_structure_hash = self._control_structure_manager.hash_control_structure(begin_node_id, self._node_map)
+            deterministic = begin_node.DETERMINISTIC and end_node.DETERMINISTIC and all(
+                self._node_objects[node_id].DETERMINISTIC
+                for node_id in self._control_structure_manager.iter_control_structure(begin_node_id)
+            )
             # check cache
             cache_data = self._cache_manager.get(
                 node_type=self._node_map[end_node_id].type,
@@ -493,83 +1081,108 @@ class ProjectInterpreter:
             if cache_data is not None:
                 # cache hit
                 outputs, total_running_time, extra = cache_data
+                outputs = self._cache_manager.attach_lineage(
+                    node_type=self._node_map[end_node_id].type,
+                    params={"control_structure_hash": control_structure_hash},
+                    inputs=inputs,
+                    outputs=outputs,
+                    deterministic=deterministic,
+                )
                 # call callafter for begin node and body nodes
                 callafter(begin_node_id, "success", outputs, total_running_time)
                 assert extra is not None, "Cache extra data should not be None for control structure nodes."
                 running_times = extra.get("running_times")
                 last_iter_result = extra.get("last_iter_result") # type: ignore
                 assert running_times is not None and isinstance(running_times, dict), "Cached running time should be a dict for control structure nodes."
-                for node_id in self._control_structure_manager.iter_control_structure(self._graph, begin_node_id):
+                for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
                     callafter(node_id, "success", last_iter_result.get(node_id, {}), running_times[node_id])
                 return outputs, total_running_time
             # cache miss, execute loop
             running_times = {}
-            for node_id in self._control_structure_manager.iter_control_structure(self._graph, begin_node_id):
+            for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
                 callbefore(node_id)
                 running_times[node_id] = 0.0
             last_iter_result: dict[str, dict[str, Data]] = {} # to store last iteration's output data for each node
-            for input_datas in begin_node.iter_loop(inputs):
-                res_cache: dict[tuple[str, str], Data] = {} # local cache for exec result in this iteration: (node_id, port) -> Data
-                last_iter_result[begin_node_id] = input_datas
+            outputs: dict[str, Data] | None = None
+            # execute all iterations at once if possible
+            if self._can_batch_loop(begin_node_id):
+                batch_inputs = begin_node.batch_loop(inputs)
+                if batch_inputs is not None:
+                    outputs = self._execute_loop_in_batch(begin_node_id, batch_inputs, running_times, last_iter_result)
+            elif isinstance(begin_node, ForRollingWindowBeginNode) and self._can_aggregate_windows(begin_node_id):
+                outputs = self._execute_windows_in_aggregate(begin_node_id, inputs, running_times, last_iter_result)
+            if outputs is None and self._can_parallel_loop(begin_node_id):
+                outputs = self._execute_loop_in_processes(begin_node_id, inputs, running_times, last_iter_result)
+            if outputs is None:
+                # in edges of body nodes and the end node are looked up once, not in every iteration
+                body = [
+                    (node_id, self._plan.in_edges_of(node_id))
+                    for node_id in self._control_structure_manager.iter_control_structure(begin_node_id)
+                ]
+                end_in_edges = self._plan.in_edges_of(end_node_id)
+                for input_datas in begin_node.iter_loop(inputs):
+                    res_cache: dict[tuple[str, str], Data] = {} # local cache for exec result in this iteration: (node_id, port) -> Data
+                    last_iter_result[begin_node_id] = input_datas
 
-                # collect inputs for begin node
-                for input_port, data in input_datas.items():
-                    res_cache[(begin_node_id, input_port)] = data
+                    # collect inputs for begin node
+                    for input_port, data in input_datas.items():
+                        res_cache[(begin_node_id, input_port)] = data
 
-                # execute body nodes
-                for node_id in self._control_structure_manager.iter_control_structure(self._graph, begin_node_id):
-                    if node_id in self._unreached_node_ids:
-                        return None
-                    in_edges = list(self._graph.in_edges(node_id, data=True)) # type: ignore
-
-                    # 1. get input data
-                    input_data : dict[str, Data] = {}
-                    for src_id, _, edge_data in in_edges:
-                        src_port = edge_data['src_port']
-                        tar_port = edge_data['tar_port']
-                        input_data[tar_port] = res_cache[(src_id, src_port)]
-
-                    # 2. execute node
-                    try:
-                        output_data, running_time = self._execute_single_node(
-                            node_id, 
-                            input_data, 
-                            lambda nid: None,
-                            use_cache=False,
-                        ) # callbefore is a no-op for body nodes
-                    # 3. call callafter
-                    except Exception as e:
-                        self._unreached_node_ids.update(
-                            [node_id, *nx.descendants(self._graph, node_id)]
-                        )
-                        continue_execution = callafter(node_id, "error", e, None)
-                        if not continue_execution:
+                    # execute body nodes
+                    for node_id, in_edges in body:
+                        if node_id in self._unreached_node_ids:
+                            return None
+
+                        # 1. get input data
+                        input_data : dict[str, Data] = {}
+                        for src_id, src_port, tar_port in in_edges:
+                            input_data[tar_port] = res_cache[(src_id, src_port)]
+
+                        # 2. execute node
+                        try:
+                            output_data, running_time = self._execute_single_node(
+                                node_id, 
+                                input_data, 
+                                lambda nid: None,
+                                use_cache=False,
+                            ) # callbefore is a no-op for body nodes
+                        # 3. call callafter
+                        except Exception as e:
                             self._unreached_node_ids.update(
-                                [node_id, *nx.descendants(self._graph, node_id)]
+                                [node_id, *self._plan.descendants_of(node_id)]
                             )
-                            return None
+                            continue_execution = callafter(node_id, "error", e, None)
+                            if not continue_execution:
+                                self._unreached_node_ids.update(
+                                    [node_id, *self._plan.descendants_of(node_id)]
+                                )
+                                return None
+                            else:
+                                continue
                         else:
-                            continue
-                    else:
-                        # for body nodes, do not call callafter
-                        running_times[node_id] += running_time
-                    # 4. store output data to local cache
-                    for tar_port, data in output_data.items():
-                        res_cache[(node_id, tar_port)] = data
-                    last_iter_result[node_id] = output_data
-
-                # collect output in this iteration for end node
-                if end_node_id in self._unreached_node_ids:
-                    return None
-                end_in_edges = list(self._graph.in_edges(end_node_id, data=True)) # type: ignore
-                end_node_inputs: dict[str, Data] = {}
-                for src_id, _, edge_data in end_in_edges:
-                    src_port = edge_data['src_port']
-                    tar_port = edge_data['tar_port']
-                    end_node_inputs[tar_port] = res_cache[(src_id, src_port)]
-                end_node.end_iter_loop(end_node_inputs)
-            # combine outputs
-            outputs = end_node.finalize_loop()
+                            # for body nodes, do not call callafter
+                            running_times[node_id] += running_time
+                        # 4. store output data to local cache
+                        for tar_port, data in output_data.items():
+                            res_cache[(node_id, tar_port)] = data
+                        last_iter_result[node_id] = output_data
+
+                    # collect output in this iteration for end node
+                    if end_node_id in self._unreached_node_ids:
+                        return None
+                    end_node_inputs: dict[str, Data] = {}
+                    for src_id, src_port, tar_port in end_in_edges:
+                        end_node_inputs[tar_port] = res_cache[(src_id, src_port)]
+                    end_node.end_iter_loop(end_node_inputs)
+                # combine outputs
+                outputs = end_node.finalize_loop()
+            outputs = self._cache_manager.attach_lineage(
+                node_type=self._node_map[end_node_id].type,
+                params={"control_structure_hash": control_structure_hash},
+                inputs=inputs,
+                outputs=outputs,
+                deterministic=deterministic,
+            )
             total_running_time = (time.perf_counter() - begin_time) * 1000  # in ms
             # cache outputs for end node
             self._cache_manager.set(
@@ -585,8 +1198,233 @@ class ProjectInterpreter:
             )
             # call callback for begin node and body nodes
             callafter(begin_node_id, "success", last_iter_result.get(begin_node_id, {}), total_running_time)
-            for node_id in self._control_structure_manager.iter_control_structure(self._graph, begin_node_id):
+            for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
                 callafter(node_id, "success", last_iter_result.get(node_id, {}), running_times[node_id])
             return outputs, total_running_time # execute method will call callafter for end node
         else:
             assert False, f"Unknown control structure begin node type {begin_node.type}."
+
+    def _can_batch_loop(self, begin_node_id: str) -> bool:
+        """
+        Check if a loop can be executed in batch: all body nodes are deterministic,
+        and those depending on the loop variables are row-wise.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        varying_node_ids = self._plan.descendants_of(begin_node_id)
+        for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
+            node = self._node_objects[node_id]
+            if not node.DETERMINISTIC:
+                return False
+            if node_id in varying_node_ids and not node.ROW_WISE:
+                return False
+        return True
+
+    def _execute_loop_in_batch(
+        self,
+        begin_node_id: str,
+        batch_inputs: dict[str, Data],
+        running_times: dict[str, float],
+        last_iter_result: dict[str, dict[str, Data]],
+    ) -> dict[str, Data] | None:
+        """
+        Execute all iterations of a loop at once, the last iteration's results are sliced from the batch results.
+        Return None if any node fails, then the caller falls back to iterating, to report errors in the same way.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        end_node_id = self._control_structure_manager.get_end_node_id(begin_node_id)
+        end_node = self._node_objects[end_node_id]
+        assert isinstance(end_node, ForBaseEndNode), "Begin node and end node types do not match."
+        res_cache: dict[tuple[str, str], Data] = {
+            (begin_node_id, port): data for port, data in batch_inputs.items()
+        } # local cache for exec result in the batch: (node_id, port) -> Data
+        batch_result: dict[str, dict[str, Data]] = {begin_node_id: batch_inputs}
+        try:
+            for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
+                input_data: dict[str, Data] = {}
+                for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
+                    input_data[tar_port] = res_cache[(src_id, src_port)]
+                output_data, running_time = self._execute_single_node(
+                    node_id,
+                    input_data,
+                    lambda nid: None,
+                    use_cache=False,
+                )
+                running_times[node_id] += running_time
+                for tar_port, data in output_data.items():
+                    res_cache[(node_id, tar_port)] = data
+                batch_result[node_id] = output_data
+            end_node_inputs: dict[str, Data] = {}
+            for src_id, src_port, tar_port in self._plan.in_edges_of(end_node_id):
+                end_node_inputs[tar_port] = res_cache[(src_id, src_port)]
+            outputs = end_node.finalize_batch(end_node_inputs)
+        except Exception as e:
+            logger.debug(f"Batch execution of loop {begin_node_id} failed, fall back to iterating: {e}")
+            for node_id in running_times:
+                running_times[node_id] = 0.0
+            return None
+        # outputs of nodes depending on the loop variables are row-aligned tables, take the last row
+        varying_node_ids = self._plan.descendants_of(begin_node_id) | {begin_node_id}
+        for node_id, output_data in batch_result.items():
+            if node_id not in varying_node_ids:
+                last_iter_result[node_id] = output_data
+                continue
+            last_iter_result[node_id] = {}
+            for port, data in output_data.items():
+                assert isinstance(data.payload, Table), "Row-wise nodes should output tables only."
+                last_iter_result[node_id][port] = Data.trusted(
+                    payload=Table.trusted(df=data.payload.df.iloc[-1:], col_types=data.payload.col_types.copy())
+                )
+        return outputs
+
+    def _can_aggregate_windows(self, begin_node_id: str) -> bool:
+        """
+        Check if a rolling window loop reduces each window to a row: body nodes taking the window are window aggregates,
+        and their outputs are packed into the row passed to the end node by a PackNode.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        end_node_id = self._control_structure_manager.get_end_node_id(begin_node_id)
+        end_preds = self._plan.predecessors_of(end_node_id)
+        if len(end_preds) != 1 or not isinstance(self._node_objects[end_preds[0]], PackNode):
+            return False
+        for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
+            node = self._node_objects[node_id]
+            preds = self._plan.predecessors_of(node_id)
+            if node.WINDOW_AGGREGATE:
+                if any(pred_id != begin_node_id for pred_id in preds):
+                    return False
+            elif isinstance(node, PackNode):
+                if node_id != end_preds[0]:
+                    return False
+                if any(not self._node_objects[pred_id].WINDOW_AGGREGATE for pred_id in preds):
+                    return False # including packing into a base row
+            else:
+                return False
+        return True
+
+    def _execute_windows_in_aggregate(
+        self,
+        begin_node_id: str,
+        inputs: dict[str, Data],
+        running_times: dict[str, float],
+        last_iter_result: dict[str, dict[str, Data]],
+    ) -> dict[str, Data] | None:
+        """
+        Execute a rolling window loop by aggregating all windows at once with rolling aggregations,
+        the last iteration's results are taken from the aggregated results.
+        Return None if any node fails, then the caller falls back to iterating, to report errors in the same way.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        begin_node = self._node_objects[begin_node_id]
+        assert isinstance(begin_node, ForRollingWindowBeginNode)
+        end_node_id = self._control_structure_manager.get_end_node_id(begin_node_id)
+        end_node = self._node_objects[end_node_id]
+        assert isinstance(end_node, ForBaseEndNode), "Begin node and end node types do not match."
+        table_data = inputs["table"]
+        assert isinstance(table_data.payload, Table)
+        if begin_node.window_size > len(table_data.payload.df):
+            return None # iterating raises the error
+        window_results: dict[tuple[str, str], Series] = {} # (node_id, port) -> values of all windows
+        packed: dict[str, Data] = {}
+        pack_node_id = ""
+        try:
+            for node_id in self._control_structure_manager.iter_control_structure(begin_node_id):
+                node = self._node_objects[node_id]
+                start_time = time.perf_counter()
+                if isinstance(node, PackNode):
+                    columns: dict[str, Series] = {}
+                    for src_id, src_port, tar_port in self._plan.in_edges_of(node_id):
+                        columns[tar_port] = window_results[(src_id, src_port)]
+                    packed = {"packed_row": node.pack_windows(columns)}
+                    pack_node_id = node_id
+                else:
+                    input_data = {
+                        tar_port: table_data
+                        for _, _, tar_port in self._plan.in_edges_of(node_id)
+                    }
+                    for port, values in node.process_windows(input_data, begin_node.window_size).items():
+                        window_results[(node_id, port)] = values
+                running_times[node_id] += (time.perf_counter() - start_time) * 1000  # in ms
+            outputs = end_node.finalize_batch({"window": packed["packed_row"]})
+        except Exception as e:
+            logger.debug(f"Rolling aggregation of loop {begin_node_id} failed, fall back to iterating: {e}")
+            for node_id in running_times:
+                running_times[node_id] = 0.0
+            return None
+        # take the results of the last window
+        df = table_data.payload.df
+        last_iter_result[begin_node_id] = {
+            "window": Data.trusted(
+                payload=Table.trusted(df=df.iloc[-begin_node.window_size:], col_types=table_data.payload.col_types.copy())
+            )
+        }
+        for (node_id, port), values in window_results.items():
+            last_iter_result.setdefault(node_id, {})[port] = Data(payload=values.iloc[-1])
+        packed_table = packed["packed_row"].payload
+        assert isinstance(packed_table, Table)
+        last_iter_result[pack_node_id] = {
+            "packed_row": Data.trusted(
+                payload=Table.trusted(
+                    df=packed_table.df.iloc[-1:].reset_index(drop=True), col_types=packed_table.col_types.copy()
+                )
+            )
+        }
+        return outputs
+
+    def _can_parallel_loop(self, begin_node_id: str) -> bool:
+        """
+        Check if iterations of a loop can be executed in parallel processes: all body nodes are process safe.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        if LOOP_MAX_PROCESSES <= 1:
+            return False
+        return all(
+            self._node_objects[node_id].PROCESS_SAFE
+            for node_id in self._control_structure_manager.iter_control_structure(begin_node_id)
+        )
+
+    def _execute_loop_in_processes(
+        self,
+        begin_node_id: str,
+        inputs: dict[str, Data],
+        running_times: dict[str, float],
+        last_iter_result: dict[str, dict[str, Data]],
+    ) -> dict[str, Data] | None:
+        """
+        Split the iterations of a loop into shards and iterate them in the process pool,
+        the end node collects the results of all shards in iteration order.
+        Return None if the loop is not split or any shard fails, then the caller falls back to iterating,
+        to report errors in the same way.
+        """
+        assert self._control_structure_manager is not None, "Control structure manager is not initialized."
+        begin_node = self._node_objects[begin_node_id]
+        assert isinstance(begin_node, ForBaseBeginNode)
+        end_node_id = self._control_structure_manager.get_end_node_id(begin_node_id)
+        end_node = self._node_objects[end_node_id]
+        assert isinstance(end_node, ForBaseEndNode), "Begin node and end node types do not match."
+        shards = begin_node.split_loop(inputs, LOOP_MAX_PROCESSES, LOOP_MIN_ITERATIONS_PER_PROCESS)
+        if shards is None:
+            return None
+
+        # nodes are sent without context, which is bound to this process
+        body = LoopBody(
+            begin_node_id=begin_node_id,
+            begin_node=begin_node.model_copy(update={"context": None}),
+            nodes=[
+                (node_id, self._node_objects[node_id].model_copy(update={"context": None}), self._plan.in_edges_of(node_id))
+                for node_id in self._control_structure_manager.iter_control_structure(begin_node_id)
+            ],
+            end_edges=self._plan.in_edges_of(end_node_id),
+        )
+        try:
+            shard_results = execute_shards(body, shards, LOOP_MAX_PROCESSES)
+        except Exception as e:
+            logger.debug(f"Parallel execution of loop {begin_node_id} failed, fall back to iterating: {e}")
+            return None
+        for shard_result in shard_results:
+            for end_node_inputs in shard_result.end_inputs:
+                end_node.end_iter_loop(end_node_inputs)
+            for node_id, running_time in shard_result.running_times.items():
+                running_times[node_id] += running_time
+        last_iter_result.update(shard_results[-1].last_iter_result)
+        return end_node.finalize_loop()
+
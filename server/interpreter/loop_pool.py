@@ -0,0 +1,102 @@
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from threading import Lock
+
+from server.models.data import Data, enable_copy_on_write
+
+from .nodes.base_node import BaseNode
+from .nodes.control.for_base_node import ForBaseBeginNode
+
+"""
+Process pool to execute iterations of loops in parallel.
+The iterations of a loop are split into shards by the begin node, each shard is iterated in a worker process,
+and the results are merged in iteration order by the interpreter.
+Nodes are sent to the workers without their context, so only loops of PROCESS_SAFE nodes can be sharded.
+"""
+
+
+@dataclass
+class LoopBody:
+    """
+    The picklable body of a loop.
+    Body nodes are in execution order, with their in edges as (src_id, src_port, tar_port).
+    """
+    begin_node_id: str
+    begin_node: ForBaseBeginNode
+    nodes: list[tuple[str, BaseNode, list[tuple[str, str, str]]]]
+    end_edges: list[tuple[str, str, str]]
+
+
+@dataclass
+class ShardResult:
+    end_inputs: list[dict[str, Data]]  # inputs of the end node for each iteration in the shard
+    running_times: dict[str, float]  # node id -> total running time in the shard, in ms
+    last_iter_result: dict[str, dict[str, Data]]  # node id -> outputs in the last iteration of the shard
+
+
+def execute_shard(body: LoopBody, shard_inputs: dict[str, Data]) -> ShardResult:
+    """ Iterate a shard of a loop, running in a worker process. """
+    running_times = {node_id: 0.0 for node_id, _, _ in body.nodes}
+    end_inputs: list[dict[str, Data]] = []
+    last_iter_result: dict[str, dict[str, Data]] = {}
+    for input_datas in body.begin_node.iter_loop(shard_inputs):
+        res_cache: dict[tuple[str, str], Data] = {
+            (body.begin_node_id, port): data for port, data in input_datas.items()
+        } # local cache for exec result in this iteration: (node_id, port) -> Data
+        last_iter_result[body.begin_node_id] = input_datas
+        for node_id, node, in_edges in body.nodes:
+            input_data = {tar_port: res_cache[(src_id, src_port)] for src_id, src_port, tar_port in in_edges}
+            start_time = time.perf_counter()
+            output_data = node.execute(input_data)
+            running_times[node_id] += (time.perf_counter() - start_time) * 1000  # in ms
+            for port, data in output_data.items():
+                res_cache[(node_id, port)] = data
+            last_iter_result[node_id] = output_data
+        end_inputs.append({tar_port: res_cache[(src_id, src_port)] for src_id, src_port, tar_port in body.end_edges})
+    return ShardResult(end_inputs=end_inputs, running_times=running_times, last_iter_result=last_iter_result)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+
+
+def _get_pool(max_processes: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # workers are forked from a clean server process with nodes imported, not from the interpreter process
+            # which may have other threads running
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(["server.interpreter.nodes"])
+            _pool = ProcessPoolExecutor(max_workers=max_processes, mp_context=ctx, initializer=enable_copy_on_write)
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def execute_shards(body: LoopBody, shards: list[dict[str, Data]], max_processes: int) -> list[ShardResult]:
+    """
+    Execute shards of a loop in the process pool, which is kept for later loops in this process.
+    Return the results in the order of shards, raise the first exception of any shard.
+    """
+    pool = _get_pool(max_processes)
+    futures: list[Future[ShardResult]] = []
+    try:
+        for shard_inputs in shards:
+            futures.append(pool.submit(execute_shard, body, shard_inputs))
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
@@ -82,7 +82,7 @@ class CumulativeNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         table = input["table"].payload
         assert isinstance(table, Table)
-        df = table.df.copy()
+        df = table.copy_df()
         
         if self.method == "cumsum":
             df[self.result_col] = df[self.col].cumsum()
@@ -76,7 +76,7 @@ class DiffNode(BaseNode):
         input_table = input["table"]
         assert isinstance(input_table.payload, Table)
         assert self._new_col_name is not None
-        df = input_table.payload.df.copy()
+        df = input_table.payload.copy_df()
         df[self._new_col_name] = df[self.col].diff()
         df = df.iloc[1:].reset_index(drop=True)  # remove the first row with NaN diff
         new_col_types = input_table.payload.col_types.copy()
@@ -101,7 +101,7 @@ class PctChangeNode(BaseNode):
         assert self._result_col_type is not None
         assert self.result_col is not None
 
-        df = input_table_data.payload.df.copy()
+        df = input_table_data.payload.copy_df()
 
         df[self.result_col] = df[self.col].pct_change()
 
@@ -97,7 +97,7 @@ class RollingNode(BaseNode):
         input_table_data = input["table"]
         assert isinstance(input_table_data.payload, Table)
 
-        df = input_table_data.payload.df.copy()
+        df = input_table_data.payload.copy_df()
 
         assert self.result_col is not None
 
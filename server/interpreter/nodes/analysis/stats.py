@@ -1,4 +1,8 @@
-from typing import Any, Dict, override
+from typing import Any, ClassVar, Dict, override
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import Series
 
 from server.models.data import Data, Table
 from server.models.exception import (
@@ -18,6 +22,7 @@ class StatsNode(BaseNode):
     """
     A node to calculate basic statistics (mean, count, sum, std, min, max, 25%-quantile, 50%-quantile, 75%-quantile) for specified columns in a table.
     """
+    WINDOW_AGGREGATE: ClassVar[bool] = True
     col: str
 
     @override
@@ -160,6 +165,40 @@ class StatsNode(BaseNode):
             "quantile_75": Data(payload=quantile_75),
         }
 
+    @override
+    def process_windows(self, input: Dict[str, Data], window_size: int) -> Dict[str, Series]:
+        table_data = input["table"]
+        assert isinstance(table_data.payload, Table)
+        col_type = table_data.payload.col_types[self.col]
+        col = table_data.payload.df[self.col]
+
+        # min_periods=0 to skip nulls in a window like Series methods, e.g. sum of a window of nulls is 0
+        rolling = col.rolling(window=window_size, min_periods=0)
+        results = {
+            "mean": rolling.mean(),
+            "count": rolling.count().astype("int64"),
+            "std": rolling.std(),
+            "quantile_25": rolling.quantile(0.25),
+            "quantile_50": rolling.quantile(0.50),
+            "quantile_75": rolling.quantile(0.75),
+        }
+        if col_type == ColType.FLOAT:
+            results.update({"sum": rolling.sum(), "min": rolling.min(), "max": rolling.max()})
+        # the first full window ends at row window_size - 1
+        results = {port: result.iloc[window_size - 1:].reset_index(drop=True) for port, result in results.items()}
+
+        if col_type == ColType.INT:
+            # rolling computes in float64, which is not exact above 2**53, so integers are aggregated in int64
+            if col.hasnans:
+                raise ValueError(f"Column '{self.col}' has nulls, its windows can not be aggregated in int64.")
+            values = col.to_numpy(dtype="int64")
+            cumsum = np.concatenate([[0], np.cumsum(values)])
+            windows = sliding_window_view(values, window_size)
+            results["sum"] = Series(cumsum[window_size:] - cumsum[:-window_size])
+            results["min"] = Series(windows.min(axis=1))
+            results["max"] = Series(windows.max(axis=1))
+        return results
+
     @override
     @classmethod
     def hint(cls, input_schemas: Dict[str, Schema], current_params: Dict) -> Dict[str, Any]:
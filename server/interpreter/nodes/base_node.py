@@ -1,17 +1,20 @@
 from abc import abstractmethod
-from typing import Any, Literal
+from collections.abc import Mapping
+from typing import Any, ClassVar, Literal, override
 
+from pandas import DataFrame, Series
 from pydantic import BaseModel, PrivateAttr, model_validator
 from typing_extensions import Self
 
 from server import logger
-from server.models.data import Data
+from server.models.data import Data, Table
 from server.models.exception import (
     NodeExecutionError,
     NodeParameterError,
     NodeValidationError,
 )
 from server.models.schema import Pattern, Schema
+from server.models.types import ColType
 
 from .context import NodeContext
 
@@ -41,6 +44,39 @@ class BaseNode(BaseModel):
     _schemas_in: dict[str, Schema] | None = PrivateAttr(None) # cache for input schema
     _schemas_out: dict[str, Schema] | None = PrivateAttr(None) # cache for output schema
 
+    # whether process() can run outside the main thread,
+    # set to False for nodes using signals or global states like pyplot
+    THREAD_SAFE: ClassVar[bool] = True
+
+    # whether process() uses the db session of the managers in context, so that it only runs in a worker thread
+    # with managers on a session of the thread's own, set to True for nodes reading or writing files and data through context
+    SESSION_BOUND: ClassVar[bool] = False
+
+    # whether outputs are fully determined by type, params and inputs,
+    # set to False for nodes reading external states or generating random values, their outputs are identified by content
+    DETERMINISTIC: ClassVar[bool] = True
+
+    # whether executing the node again with the same type, params and inputs in the same run gives equal outputs
+    # and no other effects, so that duplicated nodes can be executed once,
+    # set to False for nodes generating random values or writing files
+    REPEATABLE: ClassVar[bool] = True
+
+    # whether process() can run in another process without the managers in context, so that it can be in loops executed in parallel,
+    # set to False for nodes reading or writing files and data through context
+    PROCESS_SAFE: ClassVar[bool] = True
+
+    # whether process() maps each row of its input tables to the same row of its output tables independently,
+    # and outputs tables only, so that a ForEachRow loop of such nodes can be executed once on the whole table
+    ROW_WISE: ClassVar[bool] = False
+
+    # whether process() reduces its input table to primitives and process_windows() is implemented,
+    # so that a ForRollingWindow loop packing such reductions into a row can be executed with rolling aggregations
+    WINDOW_AGGREGATE: ClassVar[bool] = False
+
+    # whether process() only appends the column computed by compute_col() to its input table, both on port "table",
+    # so that a chain of such nodes can be fused and evaluated once on the columns of the first table, see ColumnExprNode
+    COLUMN_EXPR: ClassVar[bool] = False
+
     """
     methods to be implemented by subclasses
     """
@@ -89,6 +125,25 @@ class BaseNode(BaseModel):
         Running as stage3 validation while process.
         """
         pass
+
+    def process_windows(self, input: dict[str, Data], window_size: int) -> dict[str, Series]:
+        """
+        Process every rolling window of the input table at once, only for nodes with WINDOW_AGGREGATE.
+
+        input: { port_name: data of the whole table, ... }
+        output: { port_name: series of the output primitive for each window, in window order, ... }
+        """
+        raise NotImplementedError(f"{self.type} does not support processing rolling windows.")
+
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
+        """
+        Compute the result column appended by process(), only for nodes with COLUMN_EXPR.
+
+        cols: { column name: series, ... } of the input table, never modified
+        input: { port_name: data, ... } the inputs of process(), the table may be missing when fused
+        output: (result column name, series with the index of cols)
+        """
+        raise NotImplementedError(f"{self.type} does not support computing columns.")
     
     """
     Private methods
@@ -208,6 +263,40 @@ class BaseNode(BaseModel):
             )
         return output
 
+    def execute_col(self, cols: dict[str, Series], input: dict[str, Data]) -> dict[str, Data]:
+        """
+        run time execution of a node fused in a chain of COLUMN_EXPR nodes,
+        the result column is appended to cols, and the output table is built from cols without copying them
+        """
+        if self._schemas_in is None or self._schemas_out is None:
+            raise NodeExecutionError(
+                node_id=self.id,
+                err_msg="Node schema not inferred before execution."
+            )
+        # the table is built from the inferred schemas along the chain, check the other inputs only
+        input_schemas = {k : v.extract_schema() for k, v in input.items() if k != "table"}
+        if input_schemas != {k : v for k, v in self._schemas_in.items() if k != "table"}:
+            raise NodeExecutionError(
+                node_id=self.id,
+                err_msg=f"Input data schema {input_schemas} does not match inferred schema {self._schemas_in}."
+            )
+        result_col, series = self.compute_col(cols, input)
+        out_tab = self._schemas_out["table"].tab
+        assert out_tab is not None
+        # the output table is trusted, so the result column is checked here as Table() would do
+        expected = out_tab.col_types[result_col]
+        try:
+            actual = ColType.from_ptype(series.dtype)
+        except ValueError:
+            actual = None
+        if len(series) != 0 and actual != expected:
+            raise NodeExecutionError(
+                node_id=self.id,
+                err_msg=f"Column '{result_col}' expected type {expected}, got {series.dtype}."
+            )
+        cols[result_col] = series
+        return {"table": Data.trusted(Table.trusted(DataFrame(cols, copy=False), out_tab.col_types.copy()))}
+
     @classmethod
     def get_hint(cls, type_name: str, input_schemas: dict[str, Schema], current_params: dict) -> dict[str, Any]:
         """ get parameter hints """
@@ -221,6 +310,34 @@ class BaseNode(BaseModel):
             logger.warning(f"Failed to get hint for node type '{type_name}': {e}")
             return {}
 
+class ColumnExprNode(BaseNode):
+    """
+    Base class for nodes appending a column computed by compute_col() to their input table.
+    Subclasses implement compute_col() and set _col_types to the output column types in infer_output_schemas().
+    """
+
+    COLUMN_EXPR: ClassVar[bool] = True
+
+    _col_types: dict[str, ColType] | None = PrivateAttr(None)
+
+    @abstractmethod
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
+        """ see BaseNode.compute_col """
+
+    @override
+    def process(self, input: dict[str, Data]) -> dict[str, Data]:
+        table = input['table'].payload
+        assert isinstance(table, Table)
+
+        df = table.copy_df()
+        result_col, series = self.compute_col(table.df, input)
+        df[result_col] = series
+
+        # convert back to Table
+        assert self._col_types is not None
+        out_table = Data(payload=Table(df=df, col_types=self._col_types))
+        return {'table': out_table}
+
 _NODE_REGISTRY: dict[str, type[BaseNode]] = {}
 
 def register_node():
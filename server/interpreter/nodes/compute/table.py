@@ -1,9 +1,10 @@
-from typing import Any, Literal, override
+from collections.abc import Mapping
+from typing import Any, ClassVar, Literal, override
 
 import numpy as np
-from pydantic import PrivateAttr
+from pandas import Series
 
-from server.models.data import Data, Table
+from server.models.data import Data
 from server.models.exception import (
     NodeExecutionError,
     NodeParameterError,
@@ -17,7 +18,7 @@ from server.models.schema import (
     generate_default_col_name,
 )
 
-from ..base_node import BaseNode, InPort, OutPort, register_node
+from ..base_node import ColumnExprNode, InPort, OutPort, register_node
 
 """
 A series of nodes to compute columns of tables vectorizedly.
@@ -29,17 +30,16 @@ Calculate between primitive and table column.
 """
 
 @register_node()
-class ColWithNumberBinOpNode(BaseNode):
+class ColWithNumberBinOpNode(ColumnExprNode):
     """
     Compute binary numeric operation on a table column a primitive number.
     Supported ops: ADD, SUB, MUL, DIV, POW
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["ADD", "COL_SUB_NUM", "NUM_SUB_COL", "MUL", "COL_DIV_NUM", "NUM_DIV_COL", "COL_POW_NUM", "NUM_POW_COL"]
     col: str # the column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "ColWithNumberBinOpNode":
@@ -123,31 +123,28 @@ class ColWithNumberBinOpNode(BaseNode):
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
+        assert self.result_col is not None
         num = input['num'].payload
-        assert isinstance(table, Table)
         assert isinstance(num, (int, float))
-        assert self.result_col is not None
 
-        df = table.df.copy()
-        series = df[self.col]
+        series = cols[self.col]
         
         if self.op == "ADD":
-            df[self.result_col] = series + num
+            return self.result_col, series + num
         elif self.op == "COL_SUB_NUM":
-            df[self.result_col] = series - num
+            return self.result_col, series - num
         elif self.op == "NUM_SUB_COL":
-            df[self.result_col] = num - series
+            return self.result_col, num - series
         elif self.op == "MUL":
-            df[self.result_col] = series * num
+            return self.result_col, series * num
         elif self.op == "COL_DIV_NUM":
             if num == 0:
                 raise NodeExecutionError(
                     node_id=self.id,
                     err_msg="Division by zero error."
                 )
-            df[self.result_col] = series / num
+            return self.result_col, series / num
         elif self.op == "NUM_DIV_COL":
             # Check for division by zero, but NaN values should be preserved
             if (series == 0).any():
@@ -155,21 +152,16 @@ class ColWithNumberBinOpNode(BaseNode):
                     node_id=self.id,
                     err_msg="Division by zero error."
                 )
-            df[self.result_col] = num / series
+            return self.result_col, num / series
         elif self.op == "COL_POW_NUM":
-            df[self.result_col] = series.astype("Float64") ** num
+            return self.result_col, series.astype("Float64") ** num
         elif self.op == "NUM_POW_COL":
-            df[self.result_col] = num ** series.astype("Float64")
+            return self.result_col, num ** series.astype("Float64")
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -181,17 +173,16 @@ class ColWithNumberBinOpNode(BaseNode):
         return hint
 
 @register_node()
-class ColWithBoolBinOpNode(BaseNode):
+class ColWithBoolBinOpNode(ColumnExprNode):
     """
     Compute binary boolean operation on a table column a primitive number.
     Supported ops: AND, OR, XOR, SUB
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["AND", "OR", "XOR", "NUM_SUB_COL", "COL_SUB_NUM"]
     col: str # the column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "ColWithBoolBinOpNode":
@@ -268,36 +259,28 @@ class ColWithBoolBinOpNode(BaseNode):
         return {"table": output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
+        assert self.result_col is not None
         boolean = input['bool'].payload
-        assert isinstance(table, Table)
         assert isinstance(boolean, bool)
-        assert self.result_col is not None
 
-        df = table.df.copy()
-        series = df[self.col]
+        series = cols[self.col]
         
         if self.op == "AND":
-            df[self.result_col] = series & boolean
+            return self.result_col, series & boolean
         elif self.op == "OR":
-            df[self.result_col] = series | boolean
+            return self.result_col, series | boolean
         elif self.op == "XOR":
-            df[self.result_col] = series ^ boolean
+            return self.result_col, series ^ boolean
         elif self.op == "COL_SUB_NUM":
-            df[self.result_col] = series & (not boolean)
+            return self.result_col, series & (not boolean)
         elif self.op == "NUM_SUB_COL":
-            df[self.result_col] = boolean & ~series
+            return self.result_col, boolean & ~series
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -315,17 +298,16 @@ Calculate in one column.
 """
 
 @register_node()
-class NumberColUnaryOpNode(BaseNode):
+class NumberColUnaryOpNode(ColumnExprNode):
     """
     Compute unary numeric operation on a table column.
     Supported ops: ABS, NEG, EXP, LOG, SQRT
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["ABS", "NEG", "EXP", "LOG", "SQRT"]
     col: str # the column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "NumberColUnaryOpNode":
@@ -384,50 +366,41 @@ class NumberColUnaryOpNode(BaseNode):
                 err_msg=f"Result column name '{self.result_col}' already exists in input table."
             )
         # 2. build output schema
-        output_schema = input_schemas['table'].append_col(self.result_col, ColType.FLOAT if self.op in {"LOG", "SQRT"} else in_tab.col_types[self.col])
+        output_schema = input_schemas['table'].append_col(self.result_col, ColType.FLOAT if self.op in {"EXP", "LOG", "SQRT"} else in_tab.col_types[self.col])
         assert output_schema.tab is not None
         self._col_types = output_schema.tab.col_types
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
-        assert isinstance(table, Table)
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
         assert self.result_col is not None
-        
-        df = table.df.copy()
-        series = df[self.col]
+        series = cols[self.col]
         
         if self.op == "ABS":
-            df[self.result_col] = series.abs()
+            return self.result_col, series.abs()
         elif self.op == "NEG":
-            df[self.result_col] = -series
+            return self.result_col, -series
         elif self.op == "EXP":
-            df[self.result_col] = np.exp(series)
+            return self.result_col, np.exp(series)
         elif self.op == "LOG":
             if (series <= 0).fillna(False).any():
                 raise NodeExecutionError(
                     node_id=self.id,
                     err_msg="Logarithm of non-positive number error."
                 )
-            df[self.result_col] = np.log(series)
+            return self.result_col, np.log(series)
         elif self.op == "SQRT":
             if (series < 0).fillna(False).any():
                 raise NodeExecutionError(
                     node_id=self.id,
                     err_msg="Square root of negative number error."
                 )
-            df[self.result_col] = np.sqrt(series)
+            return self.result_col, np.sqrt(series)
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -439,17 +412,16 @@ class NumberColUnaryOpNode(BaseNode):
         return hint
 
 @register_node()
-class BoolColUnaryOpNode(BaseNode):
+class BoolColUnaryOpNode(ColumnExprNode):
     """
     Compute unary boolean operation on a table column.
     Supported ops: NOT
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["NOT"]
     col: str # the column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "BoolColUnaryOpNode":
@@ -516,26 +488,17 @@ class BoolColUnaryOpNode(BaseNode):
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
-        assert isinstance(table, Table)
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
         assert self.result_col is not None
-        
-        df = table.df.copy()
-        series = df[self.col]
+        series = cols[self.col]
         
         if self.op == "NOT":
-            df[self.result_col] = ~series
+            return self.result_col, ~series
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -552,18 +515,17 @@ Calculate between two table columns.
 """
 
 @register_node()
-class NumberColWithColBinOpNode(BaseNode):
+class NumberColWithColBinOpNode(ColumnExprNode):
     """
     Compute binary numeric operation on two table columns.
     Supported ops: ADD, SUB, MUL, DIV, POW
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["ADD", "SUB", "MUL", "DIV", "POW"]
     col1: str # the first column to operate on
     col2: str # the second column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "NumberColWithColBinOpNode":
@@ -664,21 +626,17 @@ class NumberColWithColBinOpNode(BaseNode):
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
-        assert isinstance(table, Table)
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
         assert self.result_col is not None
-
-        df = table.df.copy()
-        series1 = df[self.col1]
-        series2 = df[self.col2]
+        series1 = cols[self.col1]
+        series2 = cols[self.col2]
         
         if self.op == "ADD":
-            df[self.result_col] = series1 + series2
+            return self.result_col, series1 + series2
         elif self.op == "SUB":
-            df[self.result_col] = series1 - series2
+            return self.result_col, series1 - series2
         elif self.op == "MUL":
-            df[self.result_col] = series1 * series2
+            return self.result_col, series1 * series2
         elif self.op == "DIV":
             # Check for division by zero, but NaN values should be preserved
             if (series2 == 0).any():
@@ -686,21 +644,16 @@ class NumberColWithColBinOpNode(BaseNode):
                     node_id=self.id,
                     err_msg="Division by zero error."
                 )
-            df[self.result_col] = (
+            return self.result_col, (
                 series1.astype("float64") / series2.astype("float64")
             ).astype("float64")
         elif self.op == "POW":
-            df[self.result_col] = series1 ** series2
+            return self.result_col, series1.astype("float64") ** series2.astype("float64")
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -721,18 +674,17 @@ class NumberColWithColBinOpNode(BaseNode):
         return hint
 
 @register_node()
-class BoolColWithColBinOpNode(BaseNode):
+class BoolColWithColBinOpNode(ColumnExprNode):
     """
     Compute binary boolean operation on two table columns.
     Supported ops: AND, OR, XOR, SUB
     """
+    ROW_WISE: ClassVar[bool] = True
     op: Literal["AND", "OR", "XOR", "SUB"]
     col1: str # the first column to operate on
     col2: str # the second column to operate on
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "BoolColWithColBinOpNode":
@@ -817,33 +769,24 @@ class BoolColWithColBinOpNode(BaseNode):
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
-        assert isinstance(table, Table)
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
         assert self.result_col is not None
-
-        df = table.df.copy()
-        series1 = df[self.col1]
-        series2 = df[self.col2]
+        series1 = cols[self.col1]
+        series2 = cols[self.col2]
         
         if self.op == "AND":
-            df[self.result_col] = series1 & series2
+            return self.result_col, series1 & series2
         elif self.op == "OR":
-            df[self.result_col] = series1 | series2
+            return self.result_col, series1 | series2
         elif self.op == "XOR":
-            df[self.result_col] = series1 ^ series2
+            return self.result_col, series1 ^ series2
         elif self.op == "SUB":
-            df[self.result_col] = series1 & ~series2
+            return self.result_col, series1 & ~series2
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
-        
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
 
     @override
     @classmethod
@@ -864,18 +807,17 @@ class BoolColWithColBinOpNode(BaseNode):
         return hint
 
 @register_node()
-class ColCompareNode(BaseNode):
+class ColCompareNode(ColumnExprNode):
     """
     A node to compare two columns in a table and output a boolean column.
     """
+    ROW_WISE: ClassVar[bool] = True
 
     op: Literal["EQ", "NEQ", "GT", "LT", "GTE", "LTE"]
     col1: str  # the first column to compare
     col2: str  # the second column to compare
     result_col: str | None = None  # if None, use default result col name
 
-    _col_types: dict[str, ColType] | None = PrivateAttr(None)
-
     @override
     def validate_parameters(self) -> None:
         if not self.type == "ColCompareNode":
@@ -972,38 +914,29 @@ class ColCompareNode(BaseNode):
         return {'table': output_schema}
 
     @override
-    def process(self, input: dict[str, Data]) -> dict[str, Data]:
-        table = input['table'].payload
-        assert isinstance(table, Table)
+    def compute_col(self, cols: Mapping[str, Series], input: dict[str, Data]) -> tuple[str, Series]:
         assert self.result_col is not None
-
-        df = table.df.copy()
-        series1 = df[self.col1]
-        series2 = df[self.col2]
+        series1 = cols[self.col1]
+        series2 = cols[self.col2]
 
         if self.op == "EQ":
-            df[self.result_col] = series1 == series2
+            return self.result_col, series1 == series2
         elif self.op == "NEQ":
-            df[self.result_col] = series1 != series2
+            return self.result_col, series1 != series2
         elif self.op == "GT":
-            df[self.result_col] = series1 > series2
+            return self.result_col, series1 > series2
         elif self.op == "LT":
-            df[self.result_col] = series1 < series2
+            return self.result_col, series1 < series2
         elif self.op == "GTE":
-            df[self.result_col] = series1 >= series2
+            return self.result_col, series1 >= series2
         elif self.op == "LTE":
-            df[self.result_col] = series1 <= series2
+            return self.result_col, series1 <= series2
         else:
             raise NodeExecutionError(
                 node_id=self.id,
                 err_msg=f"Unsupported operation '{self.op}'."
             )
 
-        # convert back to Table
-        assert self._col_types is not None
-        out_table = Data(payload=Table(df=df, col_types=self._col_types))
-        return {'table': out_table}
-
     @override
     @classmethod
     def hint(cls, input_schemas: dict[str, Schema], current_params: dict) -> dict[str, Any]:
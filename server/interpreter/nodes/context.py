@@ -15,6 +15,7 @@ class NodeContext(BaseModel):
     financial_data_manager: FinancialDataManager  # manager for financial data operations
     user_id: int                   # current user id
     project_id: int                # current project id
+    preview_rows: int | None = None  # if set, source nodes emit at most this many rows for a quick preview
 
     model_config = {
         "arbitrary_types_allowed": True
@@ -24,3 +25,14 @@ class NodeContext(BaseModel):
     def verify(self) -> Self:
         return self
 
+    @classmethod
+    def stub(cls, user_id: int, project_id: int) -> "NodeContext":
+        """
+        A context without managers, for construction and static analysis only,
+        where nodes never use the context.
+        """
+        return cls.model_construct(file_manager=None, financial_data_manager=None, user_id=user_id, project_id=project_id)
+
+    def is_stub(self) -> bool:
+        return self.file_manager is None or self.financial_data_manager is None
+
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from server.models.data import Table
+from server.models.schema import ColType
+
+"""
+Columnar accumulators for loop end nodes.
+Each iteration's table is appended into growable typed column buffers,
+so the final table is materialized from the buffers directly, without keeping every iteration's table and concatenating.
+"""
+
+_MIN_CAPACITY = 16
+
+
+class ColumnBuffer:
+    """
+    A growable buffer of a column with a fixed dtype.
+    Numpy dtypes are stored as is, datetimes with timezone as UTC numpy datetimes,
+    other extension dtypes as objects converted back when materializing.
+    If a later chunk has a different dtype, the column spills to a list of chunks concatenated like pd.concat.
+    """
+
+    def __init__(self, dtype) -> None:
+        self._dtype = dtype
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            self._data = np.empty(_MIN_CAPACITY, dtype=f"datetime64[{dtype.unit}]")
+        elif isinstance(dtype, np.dtype):
+            self._data = np.empty(_MIN_CAPACITY, dtype=dtype)
+        else:
+            self._data = np.empty(_MIN_CAPACITY, dtype=object)
+        self._size = 0
+        self._spilled: list[pd.Series] | None = None
+
+    def append(self, values: pd.Series) -> None:
+        if self._spilled is not None:
+            self._spilled.append(values)
+            return
+        if values.dtype != self._dtype:
+            self._spilled = [self.materialize(), values]
+            return
+        if isinstance(self._dtype, pd.DatetimeTZDtype):
+            arr = values.array.to_numpy(dtype=self._data.dtype)
+        elif isinstance(self._dtype, np.dtype):
+            arr = values.to_numpy()
+        else:
+            arr = values.to_numpy(dtype=object)
+        end = self._size + len(arr)
+        if end > len(self._data):
+            # grow in place, no views of the buffer are handed out before materializing
+            self._data.resize(max(end, 2 * len(self._data)), refcheck=False)
+        self._data[self._size:end] = arr
+        self._size = end
+
+    @property
+    def spilled(self) -> bool:
+        return self._spilled is not None
+
+    def materialize(self) -> pd.Series:
+        if self._spilled is not None:
+            # concatenate as frames, where chunks of all nulls do not take part in the result dtype
+            return pd.concat([chunk.to_frame(name="values") for chunk in self._spilled], ignore_index=True)["values"]
+        # release the spare capacity, then the buffer is owned by the result
+        self._data.resize(self._size, refcheck=False)
+        data, self._data = self._data, np.empty(0, dtype=self._data.dtype)
+        self._size = 0
+        if isinstance(self._dtype, pd.DatetimeTZDtype):
+            return pd.Series(data, copy=False).dt.tz_localize("UTC").dt.tz_convert(self._dtype.tz)
+        elif isinstance(self._dtype, np.dtype):
+            return pd.Series(data, copy=False)
+        else:
+            return pd.Series(pd.array(data, dtype=self._dtype, copy=False))
+
+
+class TableAccumulator:
+    """
+    Accumulates the tables of all iterations into a single table, same as concatenating them with ignore_index.
+    Columns and their dtypes are taken from the first table, following tables must have the same columns.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: dict[str, ColumnBuffer] = {}
+        self._col_types: dict[str, ColType] | None = None
+
+    @property
+    def empty(self) -> bool:
+        return self._col_types is None
+
+    def append(self, table: Table) -> None:
+        df = table.df
+        if self._col_types is None:
+            self._col_types = table.col_types.copy()
+            for col, dtype in df.dtypes.items():
+                self._buffers[str(col)] = ColumnBuffer(dtype)
+        if len(df.columns) != len(self._buffers):
+            raise ValueError(f"Cannot accumulate columns {list(df.columns)}, expected {list(self._buffers)}.")
+        for col, values in df.items():
+            buffer = self._buffers.get(str(col))
+            if buffer is None:
+                raise ValueError(f"Cannot accumulate columns {list(df.columns)}, expected {list(self._buffers)}.")
+            buffer.append(values)
+
+    def finalize(self) -> Table:
+        assert self._col_types is not None, "No table is accumulated."
+        spilled = any(buffer.spilled for buffer in self._buffers.values())
+        df = pd.DataFrame(
+            {col: buffer.materialize() for col, buffer in self._buffers.items()},
+            copy=False,
+        )
+        if spilled:
+            # a spilled column takes the dtype pd.concat gives to its chunks, which may not match its column type
+            table = Table(df=df, col_types=self._col_types)
+        else:
+            # buffers kept the dtypes of the first table, so the result matches its column types
+            table = Table.trusted(df=df, col_types=self._col_types)
+        self._buffers = {}
+        self._col_types = None
+        return table
@@ -233,7 +233,7 @@ class SetCellNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         input_table = input["table"]
         assert isinstance(input_table.payload, Table)
-        df = input_table.payload.df.copy()
+        df = input_table.payload.copy_df()
         # determine the row index
         row_index: int
         if "row" in input:
@@ -6,7 +6,7 @@ import math
 import os
 import re
 import typing
-from typing import Any, Literal, override
+from typing import Any, ClassVar, Literal, override
 
 from server.config import CUSTOM_SCRIPT_MAX_TIME_SEC
 from server.lib.utils import timeout
@@ -29,6 +29,9 @@ class CustomScriptNode(BaseNode):
     This node allows users to define custom Script using Python code.
     The function should take inputs as defined in the input ports and return outputs as defined in the output ports.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # the script timeout relies on SIGALRM
+    DETERMINISTIC: ClassVar[bool] = False  # user scripts may use randomness or external states
+    REPEATABLE: ClassVar[bool] = False  # user scripts may use randomness or have side effects
 
     input_ports: dict[str, AllowedTypes]  # port_name -> type
     output_ports: dict[str, AllowedTypes]  # port_name -> type
@@ -21,6 +21,21 @@ class ForBaseBeginNode(ControlStrucBaseNode):
         """
         pass
 
+    def split_loop(self, inputs: Dict[str, Data], max_shards: int, min_shard_size: int) -> list[Dict[str, Data]] | None:
+        """
+        Split the loop inputs into shards of consecutive iterations, to iterate the shards in parallel.
+        Iterating the shards in order must yield the same loop variables as iterating the inputs.
+        Return None if the loop can not be split, or there are not enough iterations for two shards.
+        """
+        return None
+
+    def batch_loop(self, inputs: Dict[str, Data]) -> Dict[str, Data] | None:
+        """
+        The loop variables to execute all iterations at once, if the body nodes are all row-wise.
+        Return None if the loop can not be executed in batch.
+        """
+        return None
+
 class ForBaseEndNode(ControlStrucBaseNode):
     """
     Marks the end of a for loop.
@@ -41,3 +56,10 @@ class ForBaseEndNode(ControlStrucBaseNode):
         This method will be called once after the loop ends.
         """
         pass
+
+    def finalize_batch(self, batch_outputs: Dict[str, Data]) -> Dict[str, Data]:
+        """
+        Finalizes the loop executed in batch, with the same result as iterating and calling finalize_loop.
+        Only called if the loop is executed in batch, by batch_loop or rolling window aggregation.
+        """
+        raise NotImplementedError(f"{self.type} does not support batch execution.")
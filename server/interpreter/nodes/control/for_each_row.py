@@ -13,6 +13,7 @@ from server.models.schema import (
 )
 
 from ..base_node import InPort, OutPort, register_node
+from .accumulator import TableAccumulator
 from .for_base_node import ForBaseBeginNode, ForBaseEndNode
 
 """
@@ -77,22 +78,57 @@ class ForEachRowBeginNode(ForBaseBeginNode):
         assert input_table_data is not None
         assert isinstance(input_table_data.payload, Table)
         input_table_df = input_table_data.payload.df
+        # rows are slices of the verified input table, so skip verifying each row
+        col_types = input_table_data.payload.col_types
         for index in range(0, len(input_table_df)):
-            row_data = Data(
-                payload=Table(
+            row_data = Data.trusted(
+                payload=Table.trusted(
                     df=input_table_df.iloc[index : index + 1],
-                    col_types=input_table_data.payload.col_types,
+                    col_types=col_types.copy(),
                 )
             )
             yield {"row": row_data}
 
+    @override
+    def split_loop(self, inputs: Dict[str, Data], max_shards: int, min_shard_size: int) -> list[Dict[str, Data]] | None:
+        """shards of consecutive rows"""
+        input_table_data = inputs.get("table")
+        assert input_table_data is not None
+        assert isinstance(input_table_data.payload, Table)
+        input_table_df = input_table_data.payload.df
+        num_shards = min(max_shards, len(input_table_df) // min_shard_size)
+        if num_shards < 2:
+            return None
+        bounds = [len(input_table_df) * i // num_shards for i in range(num_shards + 1)]
+        return [
+            {
+                "table": Data.trusted(
+                    payload=Table.trusted(
+                        df=input_table_df.iloc[start:end],
+                        col_types=input_table_data.payload.col_types.copy(),
+                    )
+                )
+            }
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    @override
+    def batch_loop(self, inputs: Dict[str, Data]) -> Dict[str, Data] | None:
+        """the whole table is a batch of all rows"""
+        input_table_data = inputs.get("table")
+        assert input_table_data is not None
+        assert isinstance(input_table_data.payload, Table)
+        if len(input_table_data.payload.df) == 0:
+            return None
+        return {"row": input_table_data}
+
 @register_node()
 class ForEachRowEndNode(ForBaseEndNode):
     """
     Marks the end of a loop, collecting results.
     """
 
-    _output_rows: list[Data] = PrivateAttr(default=[])
+    _output_rows: TableAccumulator = PrivateAttr(default_factory=TableAccumulator)
 
     @property
     @override
@@ -140,15 +176,16 @@ class ForEachRowEndNode(ForBaseEndNode):
 
     @override
     def end_iter_loop(self, loop_outputs: Dict[str, Data]) -> None:
-        """save outputs for each iteration"""
+        """append outputs of each iteration to the column buffers"""
         row_data = loop_outputs.get("row")
         assert row_data is not None
-        self._output_rows.append(row_data)
+        assert isinstance(row_data.payload, Table)
+        self._output_rows.append(row_data.payload)
 
     @override
     def finalize_loop(self) -> Dict[str, Data]:
         """combine all output rows into a single table"""
-        if len(self._output_rows) == 0:
+        if self._output_rows.empty:
             return {
                 "table": Data(
                     payload=Table(
@@ -158,20 +195,21 @@ class ForEachRowEndNode(ForBaseEndNode):
                 )
             }
 
-        df_rows = []
-        for row in self._output_rows:
-            assert isinstance(row.payload, Table)
-            df_rows.append(row.payload.df)
-        combined_df = pd.concat(
-            df_rows, ignore_index=True
-        )  # type: ignore
-        assert isinstance(self._output_rows[0].payload, Table)
-        combined_col_types = self._output_rows[0].payload.col_types
         return {
-            "table": Data(
-                    payload=Table(
-                        df=combined_df,
-                        col_types=combined_col_types
-                    )
+            "table": Data.trusted(payload=self._output_rows.finalize())
+        }
+
+    @override
+    def finalize_batch(self, batch_outputs: Dict[str, Data]) -> Dict[str, Data]:
+        """the batch of all processed rows is the output table, reindexed like concatenating rows"""
+        rows_data = batch_outputs.get("row")
+        assert rows_data is not None
+        assert isinstance(rows_data.payload, Table)
+        return {
+            "table": Data.trusted(
+                payload=Table.trusted(
+                    df=rows_data.payload.df.reset_index(drop=True),
+                    col_types=rows_data.payload.col_types.copy()
                 )
+            )
         }
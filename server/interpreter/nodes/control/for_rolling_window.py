@@ -3,6 +3,7 @@ from typing import Any, Dict, Generator, Literal, override
 import pandas as pd
 from pydantic import PrivateAttr
 
+from server.interpreter.nodes.control.accumulator import TableAccumulator
 from server.interpreter.nodes.control.for_base_node import (
     ForBaseBeginNode,
     ForBaseEndNode,
@@ -94,16 +95,43 @@ class ForRollingWindowBeginNode(ForBaseBeginNode):
                 err_msg=f"Window size {self.window_size} is larger than the number of rows {len(df)} in the input table.",
             )
 
+        # the input table is verified, its windows are views sharing its columns and column types,
+        # so skip verifying each window
+        col_types = input_table_data.payload.col_types
         for index in range(0, len(df) - self.window_size + 1):
             # set the current window data to the output port of the begin node
-            window_data = Data(
-                payload=Table(
+            window_data = Data.trusted(
+                payload=Table.trusted(
                     df=df.iloc[index: index + self.window_size],
-                    col_types=input_table_data.payload.col_types
+                    col_types=col_types.copy()
                 )
             )
             yield {"window": window_data}
 
+    @override
+    def split_loop(self, inputs: Dict[str, Data], max_shards: int, min_shard_size: int) -> list[Dict[str, Data]] | None:
+        """shards of consecutive windows, overlapping rows are included in both shards"""
+        input_table_data = inputs.get("table")
+        assert input_table_data is not None
+        assert isinstance(input_table_data.payload, Table)
+        df = input_table_data.payload.df
+        num_windows = len(df) - self.window_size + 1
+        num_shards = min(max_shards, num_windows // min_shard_size)
+        if num_shards < 2:
+            return None # including too large windows, iterating raises the error
+        bounds = [num_windows * i // num_shards for i in range(num_shards + 1)]
+        return [
+            {
+                "table": Data.trusted(
+                    payload=Table.trusted(
+                        df=df.iloc[start: end + self.window_size - 1],
+                        col_types=input_table_data.payload.col_types.copy(),
+                    )
+                )
+            }
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
 
 @register_node()
 class ForRollingWindowEndNode(ForBaseEndNode):
@@ -111,7 +139,7 @@ class ForRollingWindowEndNode(ForBaseEndNode):
     Marks the end of a rolling window loop.
     """
 
-    _outputs_tables: list[Data] = PrivateAttr(default=[])
+    _outputs_tables: TableAccumulator = PrivateAttr(default_factory=TableAccumulator)
 
     @property
     @override
@@ -158,15 +186,16 @@ class ForRollingWindowEndNode(ForBaseEndNode):
 
     @override
     def end_iter_loop(self, loop_outputs: Dict[str, Data]) -> None:
-        """save outputs for each iteration"""
+        """append outputs of each iteration to the column buffers"""
         window_data = loop_outputs.get("window")
         assert window_data is not None
-        self._outputs_tables.append(window_data)
+        assert isinstance(window_data.payload, Table)
+        self._outputs_tables.append(window_data.payload)
 
     @override
     def finalize_loop(self) -> Dict[str, Data]:
         """combine all output rows into a single table"""
-        if len(self._outputs_tables) == 0:
+        if self._outputs_tables.empty:
             return {
                 "table": Data(
                     payload=Table(
@@ -176,18 +205,21 @@ class ForRollingWindowEndNode(ForBaseEndNode):
                 )
             }
 
-        dfs = []
-        for row in self._outputs_tables:
-            assert isinstance(row.payload, Table)
-            dfs.append(row.payload.df)
-        combined_df = pd.concat(dfs, ignore_index=True)
-        combined_col_types = self._outputs_tables[0].payload.col_types
-        assert combined_col_types is not None
         return {
-            "table": Data(
-                payload=Table(
-                    df=combined_df,
-                    col_types=combined_col_types
+            "table": Data.trusted(payload=self._outputs_tables.finalize())
+        }
+
+    @override
+    def finalize_batch(self, batch_outputs: Dict[str, Data]) -> Dict[str, Data]:
+        """the batch of rows reduced from all windows is the output table, reindexed like concatenating windows"""
+        windows_data = batch_outputs.get("window")
+        assert windows_data is not None
+        assert isinstance(windows_data.payload, Table)
+        return {
+            "table": Data.trusted(
+                payload=Table.trusted(
+                    df=windows_data.payload.df.reset_index(drop=True),
+                    col_types=windows_data.payload.col_types.copy()
                 )
             )
         }
@@ -1,7 +1,7 @@
 from copy import deepcopy
 from typing import Any, Dict, override
 
-from pandas import DataFrame
+from pandas import DataFrame, Series
 from pydantic import PrivateAttr
 
 from server.models.data import Data, Table, TableSchema
@@ -263,6 +263,22 @@ class PackNode(BaseNode):
             "packed_row": output_data
         }
 
+    def pack_windows(self, columns: Dict[str, Series]) -> Data:
+        """
+        Pack the primitives of all rolling windows at once, each column holds the values of all windows.
+        The result is the same as concatenating the rows packed for each window, only without base_row.
+        """
+        assert self._col_types is not None
+        output_df = DataFrame({col: columns[col].to_numpy() for col in self.cols if col is not None})
+        # each packed row is a table on its own, with index 0
+        output_df[Table.INDEX_COL] = 0
+        return Data(
+            payload=Table(
+                df=output_df,
+                col_types={**self._col_types, Table.INDEX_COL: ColType.INT},
+            )
+        )
+
     @override
     @classmethod
     def hint(cls, input_schemas: Dict[str, Schema], current_params: Dict) -> Dict[str, Any]:
@@ -1,5 +1,5 @@
 import io
-from typing import Dict, Literal, override
+from typing import ClassVar, Dict, Literal, override
 
 import pandas
 from pydantic import PrivateAttr
@@ -30,6 +30,9 @@ class TableFromFileNode(BaseNode):
     """
     A node to generate a table from a file.
     """
+    SESSION_BOUND: ClassVar[bool] = True  # reads files through the db session in context
+    DETERMINISTIC: ClassVar[bool] = False  # output depends on the file content
+    PROCESS_SAFE: ClassVar[bool] = False  # reads files through the file manager in context
 
     @override
     def validate_parameters(self) -> None:
@@ -80,13 +83,16 @@ class TableFromFileNode(BaseNode):
         user_id = self.context.user_id
         file_content = file_manager.read_sync(file_data.payload, user_id=user_id)
         file_format = file_data.payload.format
+        preview_rows = self.context.preview_rows
         df: pandas.DataFrame
         if file_format == "csv":
-            df = pandas.read_csv(io.StringIO(file_content.decode("utf-8")))
+            df = pandas.read_csv(io.StringIO(file_content.decode("utf-8")), nrows=preview_rows)
         elif file_format == "xlsx":
-            df = pandas.read_excel(io.BytesIO(file_content))
+            df = pandas.read_excel(io.BytesIO(file_content), nrows=preview_rows)
         elif file_format == "json":
             df = pandas.read_json(io.StringIO(file_content.decode("utf-8")))
+            if preview_rows is not None:
+                df = df.head(preview_rows)
         else:
             raise ValueError(f"Unsupported file format: {file_format}")
         # try to convert columns to specified types
@@ -130,6 +136,9 @@ class TableToFileNode(BaseNode):
     """
     A node to generate a file from a table.
     """
+    SESSION_BOUND: ClassVar[bool] = True  # writes files through the db session in context
+    PROCESS_SAFE: ClassVar[bool] = False  # writes files through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # writes a new file each time
     filename: str | None = None  # Optional filename for the output file.
     format: Literal["csv", "xlsx", "json"]
 
@@ -194,7 +203,7 @@ class TableToFileNode(BaseNode):
         
         table_data = input["table"]
         assert isinstance(table_data.payload, Table)
-        df = table_data.payload.df.copy()
+        df = table_data.payload.copy_df()
         buffer = file_manager.get_buffer()
         if self.format == "csv":
             df.to_csv(buffer, index=False)
@@ -226,6 +235,9 @@ class TextFromFileNode(BaseNode):
     A node to extract text content from a file.
     Currently supports extracting text from txt, pdf and word files.
     """
+    SESSION_BOUND: ClassVar[bool] = True  # reads files through the db session in context
+    DETERMINISTIC: ClassVar[bool] = False  # output depends on the file content
+    PROCESS_SAFE: ClassVar[bool] = False  # reads files through the file manager in context
 
     @override
     def validate_parameters(self) -> None:
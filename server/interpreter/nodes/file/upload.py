@@ -1,4 +1,4 @@
-from typing import Dict, List, override
+from typing import ClassVar, Dict, List, override
 
 from server.models.data import Data, File
 from server.models.exception import NodeParameterError
@@ -12,6 +12,9 @@ class UploadNode(BaseNode):
     """
     Node which allows users to upload files.
     """
+    SESSION_BOUND: ClassVar[bool] = True  # reads files through the db session in context
+    DETERMINISTIC: ClassVar[bool] = False  # output depends on the uploaded file
+    PROCESS_SAFE: ClassVar[bool] = False  # reads files through the file manager in context
     file: File | None # allow None to pass pydantic validation before validate_parameters is called
     
     @override
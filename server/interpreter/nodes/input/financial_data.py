@@ -1,12 +1,12 @@
-from datetime import datetime
-from typing import Dict, override
+from datetime import datetime, timedelta
+from typing import ClassVar, Dict, override
 
 import pandas as pd
 from pydantic import PrivateAttr
 
 from server.config import DEFAULT_TIMEZONE
 from server.lib.FinancialDataManager import DataType, Interval
-from server.models.data import Data
+from server.models.data import Data, Table
 from server.models.exception import (
     NodeExecutionError,
     NodeParameterError,
@@ -21,6 +21,12 @@ from server.models.schema import (
 
 from ..base_node import BaseNode, InPort, OutPort, register_node
 
+_INTERVAL_DELTAS: dict[Interval, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
 
 @register_node()
 class KlineNode(BaseNode):
@@ -28,6 +34,9 @@ class KlineNode(BaseNode):
     Node to generate real time financial Kline data in 1-minute intervals.
     User can specify the start time and end time with parameters or the input ports.
     """
+    SESSION_BOUND: ClassVar[bool] = True  # queries financial data through the db session in context
+    DETERMINISTIC: ClassVar[bool] = False  # financial data changes over time
+    PROCESS_SAFE: ClassVar[bool] = False  # queries financial data through the manager in context
     data_type: DataType
     symbol: str
     start_time: str | None = None # ISO format string
@@ -155,6 +164,9 @@ class KlineNode(BaseNode):
                 node_id=self.id,
                 err_msg="start_time must be earlier than end_time during execution.",
             )
+        if self.context.preview_rows is not None:
+            # only fetch the first intervals for a preview
+            end_time = min(end_time, start_time + self.context.preview_rows * _INTERVAL_DELTAS[self.interval])
         # Fetch Kline data from FinancialDataManager API
         financial_data_manager = self.context.financial_data_manager
         try:
@@ -170,6 +182,8 @@ class KlineNode(BaseNode):
                 node_id=self.id,
                 err_msg=f"Failed to fetch Kline data: {str(e)}",
             )
+        if self.context.preview_rows is not None:
+            table = Table(df=table.df.head(self.context.preview_rows), col_types=table.col_types)
         output = Data(payload=table)
         output = output.append_col("Symbol", pd.Series([self.symbol for _ in range(len(table.df))]), pos=0)
         return {
@@ -1,6 +1,6 @@
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Literal, override
+from typing import ClassVar, Dict, List, Literal, override
 
 import pandas
 from pandas import DataFrame
@@ -174,6 +174,8 @@ class RandomNode(BaseNode):
     The row_count and min_value and max_value can be got from inputs.
     If col_type is "str" or "bool", min_value and max_value must be None
     """
+    DETERMINISTIC: ClassVar[bool] = False  # generates random values
+    REPEATABLE: ClassVar[bool] = False  # generates random values
     col_name: str | None
     col_type: Literal["float", "int", "str", "bool"]
 
@@ -309,8 +311,11 @@ class RandomNode(BaseNode):
                         err_msg="min_value must be less than max_value."
                     )
 
+        row_count = row_count_data.payload
+        if self.context.preview_rows is not None:
+            row_count = min(row_count, self.context.preview_rows)
         data_rows = []
-        for _ in range(row_count_data.payload):
+        for _ in range(row_count):
             if self.col_type == "float":
                 assert min_value_data is not None and max_value_data is not None
                 min_value = min_value_data.payload
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Literal, override
+from typing import Any, ClassVar, Dict, Literal, override
 
 from pydantic import PrivateAttr
 
@@ -23,6 +23,7 @@ class LogisticRegressionNode(BaseNode):
     A node to perform logistic regression using specified feature columns and target column.
     Support binary classification tasks and multiclass classification.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # forks a subprocess in process()
     feature_cols: list[str]
     target_col: str
 
@@ -151,6 +152,7 @@ class SVCNode(BaseNode):
     A node to perform Support Vector Classification using specified feature columns and target column.
     Support binary classification tasks and multiclass classification.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # forks a subprocess in process()
     feature_cols: list[str]
     target_col: str
     kernel: Literal["linear", "poly", "rbf", "sigmoid"]
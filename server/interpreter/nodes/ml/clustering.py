@@ -119,7 +119,7 @@ class KMeansClusteringNode(BaseNode):
         
         input_data = input["table"]
         assert isinstance(input_data.payload, Table)
-        df = input_data.payload.df.copy()
+        df = input_data.payload.copy_df()
 
         feature_data = df[self.feature_cols]
         kmeans = KMeans(n_clusters=self.n_clusters)
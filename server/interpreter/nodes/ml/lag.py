@@ -123,7 +123,7 @@ class LagFeatureNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         input_table = input["table"]
         assert isinstance(input_table.payload, Table)
-        df = input_table.payload.df.copy()
+        df = input_table.payload.copy_df()
         
         # 1. Generate Lag Features (Shift Positive)
         # t-1, t-2 ...
@@ -123,7 +123,7 @@ class PredictNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         input_table_data = input["table"]
         assert isinstance(input_table_data.payload, Table)
-        df = input_table_data.payload.df.copy()
+        df = input_table_data.payload.copy_df()
         assert self._col_types is not None
         assert self._output_col_mapping is not None
 
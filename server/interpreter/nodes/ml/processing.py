@@ -92,7 +92,7 @@ class StandardScalerNode(BaseNode):
 
         input_table_data = input["table"]
         assert isinstance(input_table_data.payload, Table)
-        df = input_table_data.payload.df.copy()
+        df = input_table_data.payload.copy_df()
 
         scaler = StandardScaler()
         df[self.feature_cols] = scaler.fit_transform(df[self.feature_cols])
@@ -127,7 +127,7 @@ class RegressionScoreNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         input_data = input["table"]
         assert isinstance(input_data.payload, Table)
-        df = input_data.payload.df.copy()
+        df = input_data.payload.copy_df()
         
         input_model_data = input["model"]
         assert isinstance(input_model_data.payload, Model)
@@ -274,7 +274,7 @@ class ClassificationScoreNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         input_data = input["table"]
         assert isinstance(input_data.payload, Table)
-        df = input_data.payload.df.copy()
+        df = input_data.payload.copy_df()
         
         input_model_data = input["model"]
         assert isinstance(input_model_data.payload, Model)
@@ -1,4 +1,4 @@
-from typing import Any, override
+from typing import Any, ClassVar, override
 
 from pydantic import PrivateAttr
 
@@ -23,6 +23,7 @@ class BatchStripNode(BaseNode):
     """
     Node to strip leading and trailing whitespace or specified characters from string columns in a table.
     """
+    ROW_WISE: ClassVar[bool] = True
     strip_chars: str | None = None
     col: str
     result_col: str | None = None
@@ -111,7 +112,7 @@ class BatchStripNode(BaseNode):
             strip_chars = self.strip_chars
         else:
             strip_chars = None
-        df = input_table.df.copy()
+        df = input_table.copy_df()
         df[self.result_col] = df[self.col].astype(str).str.strip(strip_chars)
         assert self._col_types is not None
         output_data = Data(
@@ -141,6 +142,7 @@ class BatchConcatNode(BaseNode):
     """
     Node to Concat two string columns in input table.
     """
+    ROW_WISE: ClassVar[bool] = True
     col1: str
     col2: str
     result_col: str | None = None
@@ -213,7 +215,7 @@ class BatchConcatNode(BaseNode):
     def process(self, input: dict[str, Data]) -> dict[str, Data]:
         input_table = input["input"].payload
         assert isinstance(input_table, Table)
-        df = input_table.df.copy()
+        df = input_table.copy_df()
         df[self.result_col] = df[self.col1].astype(str) + df[self.col2].astype(str)
         assert self._col_types is not None
         output_data = Data(
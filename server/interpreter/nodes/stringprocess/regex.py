@@ -1,4 +1,4 @@
-from typing import Any, override
+from typing import Any, ClassVar, override
 
 from pydantic import PrivateAttr
 
@@ -77,6 +77,7 @@ class BatchRegexMatchNode(BaseNode):
     """
     Node to match regex pattern in string columns of a table.
     """
+    ROW_WISE: ClassVar[bool] = True
     pattern: str
     col: str
     result_col: str | None = None
@@ -152,7 +153,7 @@ class BatchRegexMatchNode(BaseNode):
     def process(self, input: dict[str, Data]) -> dict[str, Data]:
         assert isinstance(input["input"].payload, Table)
         assert input["input"].payload.df is not None
-        df = input["input"].payload.df.copy()
+        df = input["input"].payload.copy_df()
         assert self.result_col is not None
         df[self.result_col] = df[self.col].str.fullmatch(self.pattern, na=False).astype(bool)
         assert self._col_types is not None
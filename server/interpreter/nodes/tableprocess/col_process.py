@@ -1,4 +1,4 @@
-from typing import Any, Dict, Literal, override
+from typing import Any, ClassVar, Dict, Literal, override
 
 from loguru import logger
 from pydantic import PrivateAttr
@@ -19,6 +19,7 @@ class SelectColNode(BaseNode):
     """
     The node to select specified columns from the input table.
     """
+    ROW_WISE: ClassVar[bool] = True
     
     selected_cols: list[str]
 
@@ -236,8 +237,8 @@ class JoinNode(BaseNode):
         right_table_data = input["right_table"]
         assert isinstance(left_table_data.payload, Table)
         assert isinstance(right_table_data.payload, Table)
-        left_df = left_table_data.payload.df.copy()
-        right_df = right_table_data.payload.df.copy()
+        left_df = left_table_data.payload.copy_df()
+        right_df = right_table_data.payload.copy_df()
         
         # remove _index column to avoid pandas producing suffixed index columns
         if '_index' in left_df.columns:
@@ -292,6 +293,7 @@ class RenameColNode(BaseNode):
     """
     The node to rename columns in the input table.
     """
+    ROW_WISE: ClassVar[bool] = True
 
     rename_map: dict[str, str]
 
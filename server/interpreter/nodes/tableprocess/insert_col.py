@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Dict, Literal, override
+from typing import ClassVar, Dict, Literal, override
 
 from server.models.data import Data, Table
 from server.models.exception import (
@@ -25,6 +25,7 @@ class InsertConstColNode(BaseNode):
     """
     Insert a constant value column into the input table.
     """
+    ROW_WISE: ClassVar[bool] = True
     
     col_name: str | None
     col_type: ColType
@@ -278,6 +279,8 @@ class InsertRandomColNode(BaseNode):
     Insert a column with random values into the input table.
     The random values are generated uniformly between min_value and max_value.
     """
+    DETERMINISTIC: ClassVar[bool] = False  # generates random values
+    REPEATABLE: ClassVar[bool] = False  # generates random values
     
     col_name: str | None
     col_type: Literal["int", "float"]
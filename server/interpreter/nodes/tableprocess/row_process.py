@@ -414,7 +414,7 @@ class FillNaNValueNode(BaseNode):
     def process(self, input: Dict[str, Data]) -> Dict[str, Data]:
         table_data = input["table"]
         assert isinstance(table_data.payload, Table)
-        df = table_data.payload.df.copy()
+        df = table_data.payload.copy_df()
 
         if self.method == "const":
             # fill with constant value
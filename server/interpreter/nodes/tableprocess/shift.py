@@ -93,7 +93,7 @@ class ShiftNode(BaseNode):
         assert self._result_col_type is not None
         assert self.result_col is not None
 
-        df = input_table_data.payload.df.copy()
+        df = input_table_data.payload.copy_df()
         df[self.result_col] = df[self.col].shift(self.periods)
 
         new_col_types = input_table_data.payload.col_types.copy()
@@ -1,4 +1,4 @@
-from typing import Any, Literal, override
+from typing import Any, ClassVar, Literal, override
 
 from server.config import FIGURE_DPI
 from server.models.data import Data, Table
@@ -13,6 +13,9 @@ class KlinePlotNode(BaseNode):
     """
     A node to create K-Line (Candlestick) plots from financial data.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # pyplot keeps global state
+    PROCESS_SAFE: ClassVar[bool] = False  # saves figures through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # saves a new figure each time
     title: str | None = None
     x_col: str
     open_col: str
@@ -110,7 +113,7 @@ class KlinePlotNode(BaseNode):
         table_data = input["input"].payload
         assert isinstance(table_data, Table)
 
-        df = table_data.df.copy()
+        df = table_data.copy_df()
         if len(df) == 0:
             raise NodeExecutionError(
                 node_id=self.id,
@@ -1,4 +1,4 @@
-from typing import Any, Literal, override
+from typing import Any, ClassVar, Literal, override
 
 from server.config import FIGURE_DPI
 from server.models.data import Data, Table
@@ -13,6 +13,9 @@ class QuickPlotNode(BaseNode):
     """
     Node to visualize data from input table using matplotlib.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # pyplot keeps global state
+    PROCESS_SAFE: ClassVar[bool] = False  # saves figures through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # saves a new figure each time
     x_col: str
     y_col: list[str]
     plot_type: list[Literal["scatter", "line", "bar", "area"]]
@@ -194,6 +197,9 @@ class DualAxisPlotNode(BaseNode):
     """
     A dual-axis plotting node.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # pyplot keeps global state
+    PROCESS_SAFE: ClassVar[bool] = False  # saves figures through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # saves a new figure each time
     x_col: str
     left_y_col: str
     left_plot_type: Literal["line", "bar"]
@@ -336,6 +342,9 @@ class StatisticalPlotNode(BaseNode):
     """
     A advanced plotting node with more graph types.
     """
+    THREAD_SAFE: ClassVar[bool] = False  # pyplot keeps global state
+    PROCESS_SAFE: ClassVar[bool] = False  # saves figures through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # saves a new figure each time
     x_col: str
     y_col: str | None = None
     hue_col: str | None = None
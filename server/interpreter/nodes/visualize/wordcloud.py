@@ -1,4 +1,4 @@
-from typing import Any, override
+from typing import Any, ClassVar, override
 
 from server.config import FIGURE_DPI
 from server.models.data import Data, Table
@@ -14,6 +14,9 @@ class WordcloudNode(BaseNode):
     Node to generate a word cloud from table.
     Requires two user-specified columns as "word" and "frequency".
     """
+    THREAD_SAFE: ClassVar[bool] = False  # pyplot keeps global state
+    PROCESS_SAFE: ClassVar[bool] = False  # saves figures through the file manager in context
+    REPEATABLE: ClassVar[bool] = False  # saves a new figure each time
 
     word_col: str
     frequency_col: str
@@ -7,6 +7,7 @@ from celery.result import AsyncResult
 from loguru import logger
 
 from server.celery import celery_app
+from server.config import PREVIEW_ROWS
 from server.lib.CacheManager import CacheManager
 from server.lib.DataManager import DataManager
 from server.lib.FileManager import FileManager
@@ -19,12 +20,8 @@ from server.lib.utils import (
     set_project_record_sync,
 )
 from server.models.data import Data
-from server.models.database import DatabaseTransaction
-from server.models.exception import (
-    NodeExecutionError,
-    NodeParameterError,
-    NodeValidationError,
-)
+from server.models.database import DatabaseTransaction, SessionLocal
+from server.models.exception import NodeExecutionError
 from server.models.project import (
     ProjNodeError,
     ProjWorkflow,
@@ -32,6 +29,7 @@ from server.models.project import (
 )
 from server.models.project_topology import WorkflowTopology
 
+from .analysis import analysis_error, construction_error
 from .interpreter import ProjectInterpreter
 
 
@@ -43,10 +41,23 @@ class RevokeException(Exception):
     time_limit=10*60,  # 10 minutes
     soft_time_limit=9*60,  # 9 minutes
 )
-def execute_project_task(self, project_id: int, user_id: int):
+def execute_project_task(
+    self,
+    project_id: int,
+    user_id: int,
+    reuse_node_ids: list[str] | None = None,
+    target_node_ids: list[str] | None = None,
+    preview: bool = False,
+):
     """
     Celery task to execute a node graph with real-time updates via Redis Streams.
     Uses StreamQueue (sync version) to handle state reporting.
+    Nodes in reuse_node_ids keep their results from the last run and are not executed again,
+    if it is None, all nodes are executed.
+    If target_node_ids is provided, only the targets and their ancestors are processed,
+    other nodes are left untouched.
+    If preview is True, the graph is executed on sampled inputs first and the results are streamed at once,
+    flagged by is_preview, then replaced by the results of the full run.
     """
     logger.debug(f"Task start: {self.request.id}")
     task_id = self.request.id
@@ -71,10 +82,21 @@ def execute_project_task(self, project_id: int, user_id: int):
             raise ValueError("Project not found.")
         workflow: ProjWorkflow = project.workflow
         topo_graph: WorkflowTopology = project.to_topo()
+        out_of_scope_indices: list[int] = []
+        if target_node_ids is not None:
+            scope = topo_graph.get_ancestor_closure(set(target_node_ids))
+            out_of_scope_indices = [
+                index for index, node in enumerate(topo_graph.nodes) if node is not None and node.id not in scope
+            ]
+            topo_graph = topo_graph.restrict_to(scope)
+        reused_node_ids: set[str] = set(reuse_node_ids or [])
+        reused_node_indices: list[int] = [
+            index for index, node in enumerate(topo_graph.nodes) if node is not None and node.id in reused_node_ids
+        ]
         
         # 1. cleanup 
         # remove all error messages from previous runs
-        patches = workflow.generate_del_error_patches()
+        patches = workflow.generate_del_error_patches(exclude=out_of_scope_indices)
         for patch in patches:
             workflow.apply_patch(patch)
             queue.push_message_sync(
@@ -95,8 +117,8 @@ def execute_project_task(self, project_id: int, user_id: int):
                     "patch": [patch.model_dump()]
                 }
             )
-        # remove all running times from previous runs
-        patches = workflow.generate_del_runningtime_patches()
+        # remove all running times from previous runs, except for reused nodes
+        patches = workflow.generate_del_runningtime_patches(exclude=reused_node_indices + out_of_scope_indices)
         for patch in patches:
             workflow.apply_patch(patch)
             queue.push_message_sync(
@@ -118,8 +140,16 @@ def execute_project_task(self, project_id: int, user_id: int):
                     cache_manager=cache_manager, 
                     financial_data_manager=financial_data_manager, 
                     topology=topo_graph, 
-                    user_id=user_id
+                    user_id=user_id,
+                    worker_session_factory=SessionLocal,
                 )
+                if reused_node_ids:
+                    def load_reused_outputs(node_id: str) -> dict[str, Data]:
+                        node_index = topo_graph.get_index_by_node_id(node_id)
+                        assert node_index is not None
+                        data_out = workflow.nodes[node_index].data_out
+                        return {port: data_manager.read_sync(data_ref) for port, data_ref in data_out.items()}
+                    graph.reuse_results(reused_node_ids, load_reused_outputs)
                 queue.push_message_sync(
                     Status.IN_PROGRESS, 
                     {"stage": "VALIDATION", "status": "SUCCESS"}
@@ -145,8 +175,9 @@ def execute_project_task(self, project_id: int, user_id: int):
                 workflow.apply_patch(patch)
                 return  # stop execution if validation failed
 
-            # 3. get UI hints from nodes
+            # 3. get UI hints from nodes, pushed in one message
             assert graph is not None
+            hint_patches: list[ProjWorkflowPatch] = []
             def hint_reporter(node_id: str, hint: dict[str, Any]) -> bool:
                 # logger.debug(f"Hint reported for node {node_id}: {hint}")
                 node_index = topo_graph.get_index_by_node_id(node_id)
@@ -155,17 +186,19 @@ def execute_project_task(self, project_id: int, user_id: int):
                     key=["nodes", node_index, "hint"],
                     value=hint
                 )
+                hint_patches.append(patch)
+                workflow.apply_patch(patch)
+                return True
+            graph.get_ui_hint(callback=hint_reporter)
+            if hint_patches:
                 queue.push_message_sync(
                     Status.IN_PROGRESS,
                     {
                         "stage": "UI_HINTS", 
                         "status": "IN_PROGRESS", 
-                        "patch": [patch.model_dump()]
+                        "patch": [patch.model_dump() for patch in hint_patches]
                     }
                 )
-                workflow.apply_patch(patch)
-                return True
-            graph.get_ui_hint(callback=hint_reporter)
             queue.push_message_sync(
                 Status.IN_PROGRESS, 
                 {"stage": "UI_HINTS", "status": "SUCCESS"}
@@ -185,50 +218,20 @@ def execute_project_task(self, project_id: int, user_id: int):
                     return True
                 # error case
                 assert exception is not None
-                try:
-                    raise exception
-                except NodeParameterError as e:
-                    has_exception = True
-                    node_index = topo_graph.get_index_by_node_id(e.node_id)
-                    assert node_index is not None
-                    patch = ProjWorkflowPatch(
-                        key=["nodes", node_index, "error"],
-                        value=ProjNodeError(
-                            type="param", params=e.err_param_keys, inputs=None, message=e.err_msgs
-                        ),
-                    )
-                    queue.push_message_sync(
-                        Status.IN_PROGRESS,
-                        {
-                            "stage": "CONSTRUCTION",
-                            "status": "IN_PROGRESS",
-                            "patch": [patch.model_dump()],
-                        },
-                    )
-                    workflow.apply_patch(patch)
-                except Exception as e:
-                    logger.exception(f"Unexpected error during node construction: {e}")
-                    has_exception = True
-                    node_index = topo_graph.get_index_by_node_id(node_id)
-                    assert node_index is not None
-                    patch = ProjWorkflowPatch(
-                        key=["nodes", node_index, "error"],
-                        value=ProjNodeError(
-                            type="execution",
-                            params=None,
-                            inputs=None,
-                            message="Construction Error: " + str(e)
-                        )
-                    )
-                    queue.push_message_sync(
-                        Status.IN_PROGRESS,
-                        {
-                            "stage": "CONSTRUCTION",
-                            "status": "IN_PROGRESS",
-                            "patch": [patch.model_dump()]
-                        }
-                    )
-                    workflow.apply_patch(patch)
+                has_exception = True
+                error_node_id, error = construction_error(node_id, exception)
+                node_index = topo_graph.get_index_by_node_id(error_node_id)
+                assert node_index is not None
+                patch = ProjWorkflowPatch(key=["nodes", node_index, "error"], value=error)
+                queue.push_message_sync(
+                    Status.IN_PROGRESS,
+                    {
+                        "stage": "CONSTRUCTION",
+                        "status": "IN_PROGRESS",
+                        "patch": [patch.model_dump()],
+                    },
+                )
+                workflow.apply_patch(patch)
                 return True # continue execution for other nodes
             graph.construct_nodes(callback=construct_reporter)
             
@@ -263,55 +266,31 @@ def execute_project_task(self, project_id: int, user_id: int):
                     return True
                 # error case
                 assert isinstance(result, Exception)
-                try:
-                    raise result
-                except NodeValidationError as e:
-                    has_exception = True
-                    node_index = topo_graph.get_index_by_node_id(e.node_id)
-                    assert node_index is not None
-                    patch = ProjWorkflowPatch(
-                                key=["nodes", node_index, "error"],
-                                value=ProjNodeError(
-                                    type="validation", params=None, inputs=e.err_inputs, message=e.err_msgs
-                                ),
-                            )
-                    queue.push_message_sync(
-                        Status.IN_PROGRESS, 
-                        {
-                            "stage": "STATIC_ANALYSIS", 
-                            "status": "IN_PROGRESS", 
-                            "patch": [patch.model_dump()]
-                        }
-                    )
-                    workflow.apply_patch(patch)
-                except Exception as e:
-                    logger.exception(f"Unexpected error during static analysis: {e}")
-                    has_exception = True
-                    node_index = topo_graph.get_index_by_node_id(node_id)
-                    assert node_index is not None
-                    patch = ProjWorkflowPatch(
-                        key=["nodes", node_index, "error"],
-                        value=ProjNodeError(
-                            type="validation",
-                            params=None,
-                            inputs=[""],
-                            message=["Static Analysis Error: " + str(e)]
-                        )
-                    )
-                    queue.push_message_sync(
-                        Status.IN_PROGRESS, 
-                        {
-                            "stage": "STATIC_ANALYSIS", 
-                            "status": "IN_PROGRESS", 
-                            "patch": [patch.model_dump()]
-                        }
-                    )
-                    workflow.apply_patch(patch)
+                has_exception = True
+                error_node_id, error = analysis_error(node_id, result)
+                node_index = topo_graph.get_index_by_node_id(error_node_id)
+                assert node_index is not None
+                patch = ProjWorkflowPatch(key=["nodes", node_index, "error"], value=error)
+                queue.push_message_sync(
+                    Status.IN_PROGRESS, 
+                    {
+                        "stage": "STATIC_ANALYSIS", 
+                        "status": "IN_PROGRESS", 
+                        "patch": [patch.model_dump()]
+                    }
+                )
+                workflow.apply_patch(patch)
                 return True # continue execution for other nodes
             graph.static_analyse(callback=anl_reporter)
             
             unreached_node_indices = graph.get_unreached_nodes()
             patches = workflow.generate_del_schema_data_patches(include=unreached_node_indices)
+            # nodes can not be reused if their upstream or control structure is re-executed
+            settled_reused_node_ids = graph.get_reused_node_ids()
+            patches += workflow.generate_del_runningtime_patches(exclude=[
+                index for index, node in enumerate(topo_graph.nodes)
+                if node is None or node.id not in reused_node_ids or node.id in settled_reused_node_ids
+            ])
             for patch in patches:
                 workflow.apply_patch(patch)
                 queue.push_message_sync(
@@ -324,7 +303,54 @@ def execute_project_task(self, project_id: int, user_id: int):
             queue.push_message_sync(Status.IN_PROGRESS, {"stage": "STATIC_ANALYSIS", "status": "SUCCESS"})
             db_client.commit()  # commit after static analysis to save schemas
 
-            # 6. Execute graph
+            # 6. Preview on sampled inputs, node errors are left to the full run
+            if preview:
+                preview_graph = ProjectInterpreter(
+                    file_manager=file_manager, 
+                    cache_manager=CacheManager(namespace=f"preview_{PREVIEW_ROWS}"), 
+                    financial_data_manager=financial_data_manager, 
+                    topology=topo_graph, 
+                    user_id=user_id,
+                    preview_rows=PREVIEW_ROWS,
+                    worker_session_factory=SessionLocal,
+                )
+                if reused_node_ids:
+                    preview_graph.reuse_results(reused_node_ids, load_reused_outputs)
+                preview_graph.construct_nodes(callback=lambda node_id, status, exception: True)
+                preview_graph.static_analyse(callback=lambda node_id, status, result: True)
+
+                def preview_reporter(node_id: str, status: Literal["success", "error"], result: dict[str, Data] | Exception, running_time: float | None) -> bool:
+                    if isinstance(result, (RevokeException, InterruptedError)):
+                        raise result
+                    if status == "error":
+                        return True
+                    assert isinstance(result, dict)
+                    data_zips = {}
+                    for port, data in result.items():
+                        data_zips[port] = data_manager.write_sync(data=data, node_id=node_id, project_id=project_id, port=port)
+                    db_client.commit()
+                    node_index = topo_graph.get_index_by_node_id(node_id)
+                    assert node_index is not None
+                    patches = [
+                        ProjWorkflowPatch(key=["nodes", node_index, "data_out"], value=data_zips),
+                        ProjWorkflowPatch(key=["nodes", node_index, "is_preview"], value=True),
+                    ]
+                    queue.push_message_sync(
+                        Status.IN_PROGRESS,
+                        {
+                            "stage": "PREVIEW",
+                            "status": "IN_PROGRESS",
+                            "node_id": node_id,
+                            "patch": [patch.model_dump() for patch in patches],
+                        }
+                    )
+                    for patch in patches:
+                        workflow.apply_patch(patch)
+                    return True
+                preview_graph.execute(callbefore=lambda node_id: None, callafter=preview_reporter)
+                queue.push_message_sync(Status.IN_PROGRESS, {"stage": "PREVIEW", "status": "SUCCESS"})
+
+            # 7. Execute graph
             assert graph is not None
 
             def exec_before_reporter(node_id: str) -> None: # for timer in frontend
@@ -358,16 +384,20 @@ def execute_project_task(self, project_id: int, user_id: int):
                         key = ["nodes", node_index, "runningtime"],
                         value = running_time
                     )
+                    patches = [data_patch, time_patch]
+                    if workflow.nodes[node_index].is_preview:
+                        # the full result replaces the preview
+                        patches.append(ProjWorkflowPatch(key=["nodes", node_index, "is_preview"], value=False))
                     meta = {
                         "stage": "EXECUTION",
                         "status": "IN_PROGRESS",
                         "node_id": node_id,
                         "timer": "stop",
-                        "patch": [data_patch.model_dump(), time_patch.model_dump()], 
+                        "patch": [patch.model_dump() for patch in patches], 
                     }
                     queue.push_message_sync(Status.IN_PROGRESS, meta)
-                    workflow.apply_patch(data_patch)
-                    workflow.apply_patch(time_patch)
+                    for patch in patches:
+                        workflow.apply_patch(patch)
                     return True
                 # error case
                 assert isinstance(result, Exception)
@@ -448,6 +478,17 @@ def execute_project_task(self, project_id: int, user_id: int):
 
             unreached_node_indices = graph.get_unreached_nodes()
             patches = workflow.generate_del_data_patches(include=unreached_node_indices)
+            # previews of failed or unreached nodes are never replaced, drop them
+            preview_patches = workflow.generate_del_preview_patches()
+            for patch in preview_patches:
+                workflow.apply_patch(patch)
+                queue.push_message_sync(
+                    Status.IN_PROGRESS,
+                    {"stage": "EXECUTION",
+                        "status": "IN_PROGRESS",
+                        "patch": [patch.model_dump()]
+                    }
+                )
             if patches:
                 for patch in patches:
                     workflow.apply_patch(patch)
@@ -462,7 +503,7 @@ def execute_project_task(self, project_id: int, user_id: int):
             else:
                 queue.push_message_sync(Status.SUCCESS, {"stage": "EXECUTION", "status": "SUCCESS"})
 
-            # 7. Finalize and save workflow
+            # 8. Finalize and save workflow
             set_project_record_sync(db_client, project, user_id)
             db_client.commit()
             logger.debug(f"Task {task_id} completed successfully")
@@ -519,6 +560,7 @@ def execute_project_task(self, project_id: int, user_id: int):
             logger.debug(f"Task {task_id} finalized")
             set_project_record_sync(db_client, project, user_id)
             try: # cleanup procedure may be called when the execution is failed halfway
+                CacheManager().flush_stats()
                 file_manager.clean_orphan_file_sync(project_id=project_id)
                 data_manager.clean_orphan_data_sync(project_id=project_id)
                 if db_client.is_active:
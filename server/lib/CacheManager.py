@@ -1,15 +1,137 @@
-import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
 import redis
 from loguru import logger
 
-from server.config import CACHE_REDIS_URL, CACHE_TTL_SECONDS, USE_CACHE
+from server.config import (
+    CACHE_COSTLY_RUNNING_TIME_MS,
+    CACHE_COSTLY_TTL_SECONDS,
+    CACHE_FETCH_BASE_MS,
+    CACHE_FETCH_MB_PER_SEC,
+    CACHE_L1_MAX_BYTES,
+    CACHE_REDIS_URL,
+    CACHE_STATS_FLUSH_INTERVAL_SEC,
+    CACHE_TTL_SECONDS,
+    USE_CACHE,
+)
+from server.lib import serialization
 from server.lib.utils import safe_hash
+from server.models.cache_stats import CacheStatsView, NodeTypeCacheStats
 from server.models.data import Data
 from server.models.file import File
 
 
+class LocalCache:
+    """
+    A size-bounded, LRU-evicting in-process cache tier in front of Redis, keyed by the same cache key.
+    It stores live objects, so a hit needs no deserialization. Entries expire with the same TTL as Redis ones.
+    Thread safe, because nodes may be executed concurrently.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict() # key -> (expire_at, size, value)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expire_at, size, value = entry
+            if expire_at < time.monotonic():
+                del self._entries[key]
+                self._size -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, size: int, ttl: int) -> None:
+        with self._lock:
+            # an oversize value is not stored, but it still replaces the old one
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def _estimate_size(value: Any) -> int:
+    """ Estimate the memory held by a cache value, walking into containers to find Data objects. """
+    if isinstance(value, Data):
+        return value.memory_size()
+    if isinstance(value, dict):
+        return sum(_estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(v) for v in value)
+    return 64 # small scalars like running times
+
+
+class CacheStats:
+    """
+    Cache statistics accumulated locally per node type, and flushed to Redis hashes in one pipeline periodically,
+    so that lookups do not pay extra round trips for bookkeeping.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self._counts: dict[str, dict[str, float]] = {} # node_type -> field -> count
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, node_type: str, **counts: float) -> bool:
+        """ Add counts for the node type, return True if it is time to flush. """
+        with self._lock:
+            fields = self._counts.setdefault(node_type, {})
+            for field, count in counts.items():
+                fields[field] = fields.get(field, 0) + count
+            return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self, redis_client: redis.Redis) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._last_flush = time.monotonic()
+        if not counts:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for node_type, fields in counts.items():
+            for field, count in fields.items():
+                if isinstance(count, int):
+                    pipe.hincrby(f"{_STATS_KEY_PREFIX}{node_type}", field, count)
+                else:
+                    pipe.hincrbyfloat(f"{_STATS_KEY_PREFIX}{node_type}", field, count)
+        pipe.execute()
+        hits = sum(fields.get("hits", 0) for fields in counts.values())
+        total = hits + sum(fields.get("misses", 0) for fields in counts.values())
+        if total > 0:
+            logger.info(f"[cache] hit_rate: {hits / total:.2%} in {total} lookups since last flush")
+
+
+_STATS_KEY_PREFIX = "cache_stat:"
+_PLAN_KEY_PREFIX = "plan:"
+_HINT_KEY_PREFIX = "hint:"
+
+# shared by all CacheManager instances in the worker process
+_local_cache = LocalCache(CACHE_L1_MAX_BYTES)
+_stats = CacheStats(CACHE_STATS_FLUSH_INTERVAL_SEC)
+_decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nodepy-cache-decode") # decodes prefetched results
+
+
 class CacheManager:
     """
     The unified library for managing caches for intermediate results of nodes.
@@ -17,51 +139,132 @@ class CacheManager:
     If you want to get a full view of the cache of a project, please use the SnapshotManager.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, namespace: str = "cache") -> None:
+        """
+        Results are cached under the namespace, runs whose results must never be mixed up use different namespaces,
+        e.g. preview runs on sampled inputs.
+        """
+        self._namespace = namespace
         self.redis_client = redis.Redis.from_url(
             CACHE_REDIS_URL, decode_responses=False
         )
+        # results of the last prefetch: cache key -> future of (value, serialized size) being decoded in background,
+        # and keys known to be missing
+        self._prefetched: dict[str, Future[tuple[Any, int] | None]] = {}
+        self._prefetched_misses: set[str] = set()
 
-    @staticmethod
-    def _get_cache_key(node_type: str, params: dict[str, Any], inputs: dict[str, Data]) -> str:
-        """Generate a unique cache key based on node ID, parameters, and inputs."""
+    def get_cache_key(self, node_type: str, params: dict[str, Any], input_lineages: dict[str, str]) -> str:
+        """
+        Generate a unique cache key based on node type, parameters, and the lineage hashes of inputs.
+        It can be computed before execution if all the input lineages are known, see lineage_of.
+        """
         # 1. hash params
         param_hash = safe_hash(params)
         # 2. hash inputs
-        input_hash = safe_hash(inputs)
+        input_hash = safe_hash(input_lineages)
         # 3. combine all
         signature = safe_hash(param_hash + input_hash)
-        return f"cache:{node_type}:{signature}"
-
-    def _add_cache_hit_num(self) -> None:
-        """Increment the cache hit counter for the project."""
-        hit_key = "cache_stat:hit"
-        self.redis_client.incr(hit_key)
-        total_key = "cache_stat:total"
-        self.redis_client.incr(total_key)
-        # print to log every 10 requests
-        total = self.redis_client.get(total_key)
-        hit = self.redis_client.get(hit_key)
-        if total is not None and hit is not None:
-            assert isinstance(total, bytes) and isinstance(hit, bytes)
-            if int(total) % 10 == 0:
-                hit_rate = int(hit) / int(total)
-                logger.info(f"cache_stat:hit_rate: {hit_rate:.2%}")
-
-    def _add_cache_miss_num(self) -> None:
-        """Increment the cache miss counter for the project."""
-        total_key = "cache_stat:total"
-        self.redis_client.incr(total_key)
-        # print to log every 10 requests
-        hit_key = "cache_stat:hit"
-        total = self.redis_client.get(total_key)
-        hit = self.redis_client.get(hit_key)
-        if total is not None and hit is not None:
-            assert isinstance(total, bytes) and isinstance(hit, bytes)
-            if int(total) % 10 == 0:
-                hit_rate = int(hit) / int(total)
-                logger.info(f"[cache] hit_rate: {hit_rate:.2%}")
-        
+        return f"{self._namespace}:{node_type}:{signature}"
+
+    @staticmethod
+    def lineage_of(cache_key: str, port: str) -> str:
+        """ The lineage hash of a deterministic node's output on the port. """
+        return safe_hash(f"{cache_key}:{port}")
+
+    def _get_cache_key(self, node_type: str, params: dict[str, Any], inputs: dict[str, Data]) -> str:
+        """
+        Generate the cache key for actual inputs.
+        Inputs are hashed by their lineage, which is derived from the upstream cache keys,
+        so the content is only hashed for data without lineage.
+        """
+        return self.get_cache_key(node_type, params, {port: data.lineage_hash() for port, data in inputs.items()})
+
+    def attach_lineage(self, node_type: str, params: dict[str, Any], inputs: dict[str, Data], outputs: dict[str, Data], deterministic: bool) -> dict[str, Data]:
+        """
+        Attach lineage hashes to the outputs of a node, so that downstream cache keys never hash their content.
+        Outputs of deterministic nodes are identified by the cache key and the port,
+        others are identified by their content, which is hashed only once here.
+        """
+        if not USE_CACHE:
+            return outputs
+        if deterministic:
+            cache_key = self._get_cache_key(node_type, params, inputs)
+            return {port: data.with_lineage_hash(CacheManager.lineage_of(cache_key, port)) for port, data in outputs.items()}
+        return {port: data.with_lineage_hash(data.lineage_hash()) for port, data in outputs.items()}
+
+    @staticmethod
+    def _get_ttl(running_time: float, size: int) -> int | None:
+        """
+        The admission and TTL policy for Redis entries, driven by the running time and the serialized size.
+        Return None if recomputing is estimated to be cheaper than fetching, so the result is not worth caching.
+        Costly results get a longer TTL.
+        """
+        fetch_time = CACHE_FETCH_BASE_MS + size / (CACHE_FETCH_MB_PER_SEC * 1024 * 1024) * 1000 # in ms
+        if running_time < fetch_time:
+            return None
+        if running_time >= CACHE_COSTLY_RUNNING_TIME_MS:
+            return CACHE_COSTLY_TTL_SECONDS
+        return CACHE_TTL_SECONDS
+
+    def _record_stats(self, node_type: str, **counts: float) -> None:
+        """ Accumulate cache statistics locally, and flush them when the flush interval has passed. """
+        if _stats.add(node_type, **counts):
+            self.flush_stats()
+
+    def flush_stats(self) -> None:
+        """ Flush locally accumulated cache statistics to Redis in one pipeline. """
+        try:
+            _stats.flush(self.redis_client)
+        except Exception as e:
+            logger.warning(f"Failed to flush cache stats: {e}")
+
+    def get_stats(self) -> CacheStatsView:
+        """ Get the cache statistics of all node types flushed to Redis, sorted by time saved. """
+        items: list[NodeTypeCacheStats] = []
+        for key in self.redis_client.scan_iter(match=f"{_STATS_KEY_PREFIX}*"):
+            assert isinstance(key, bytes)
+            node_type = key.decode("utf-8")[len(_STATS_KEY_PREFIX):]
+            fields = {k.decode("utf-8"): float(v) for k, v in self.redis_client.hgetall(key).items()} # type: ignore
+            items.append(NodeTypeCacheStats.from_counts(node_type, fields))
+        items.sort(key=lambda item: item.time_saved_ms, reverse=True)
+        return CacheStatsView(node_types=items)
+
+    def prefetch(self, cache_keys: list[str]) -> None:
+        """
+        Fetch the given keys from Redis in one round trip, and decode hits in background in the given order.
+        Later get() calls on these keys wait for the decoding instead of fetching again.
+        """
+        if not USE_CACHE:
+            return
+        cache_keys = [key for key in dict.fromkeys(cache_keys) if _local_cache.get(key) is None]
+        if not cache_keys:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.mget(cache_keys)
+        for key in cache_keys:
+            pipe.ttl(key)
+        values, *ttls = pipe.execute()
+
+        def _decode(key: str, value: bytes, ttl: Any) -> tuple[Any, int] | None:
+            try:
+                cache_data = serialization.loads(value)
+            except Exception as e:
+                logger.warning(f"Failed to load prefetched cache for {key}: {e}")
+                return None
+            if isinstance(ttl, int) and ttl > 0:
+                _local_cache.put(key, cache_data, _estimate_size(cache_data), ttl)
+            return cache_data, len(value)
+
+        for key, value, ttl in zip(cache_keys, values, ttls):
+            if value is None:
+                self._prefetched_misses.add(key)
+            else:
+                self._prefetched[key] = _decoder.submit(_decode, key, value, ttl)
+
+    def discard_prefetched(self) -> None:
+        """ Drop the prefetched results not looked up, e.g. when the execution ends, their decoded tables are released. """
+        self._prefetched.clear()
+        self._prefetched_misses.clear()
 
     def get(self, node_type: str, params: dict[str, Any], inputs: dict[str, Data]) -> tuple[dict[str, Data], float, dict[str, Any] | None] | None:
         """
@@ -71,21 +274,48 @@ class CacheManager:
         """
         if not USE_CACHE:
             return None
-        cache_key = CacheManager._get_cache_key(node_type, params, inputs)
-        cached_value = self.redis_client.get(cache_key)
+        cache_key = self._get_cache_key(node_type, params, inputs)
+        # 1. try the in-process tier first, no deserialization needed
+        local_value = _local_cache.get(cache_key)
+        if local_value is not None:
+            self._prefetched.pop(cache_key, None) # decoded and put in the in-process tier already
+            outputs, running_time, extra = local_value
+            self._record_stats(node_type, hits=1, l1_hits=1, time_saved_ms=running_time)
+            return outputs, running_time, extra
+        # 2. use the prefetched result if any
+        future = self._prefetched.pop(cache_key, None)
+        if future is not None:
+            prefetched = future.result()
+            if prefetched is None:
+                self._record_stats(node_type, misses=1)
+                return None
+            (outputs, running_time, extra), size = prefetched
+            self._record_stats(node_type, hits=1, bytes_served=size, time_saved_ms=running_time)
+            return outputs, running_time, extra
+        if cache_key in self._prefetched_misses:
+            self._prefetched_misses.discard(cache_key)
+            self._record_stats(node_type, misses=1)
+            return None
+        # 3. fall back to Redis, fetch the remaining TTL in the same round trip for the in-process tier
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.get(cache_key)
+        pipe.ttl(cache_key)
+        cached_value, ttl = pipe.execute()
         if cached_value is not None:
-            self._add_cache_hit_num()
             try:
-                # Use pickle to deserialize efficiently
                 assert isinstance(cached_value, bytes)
-                cache_data = pickle.loads(cached_value)
+                cache_data = serialization.loads(cached_value)
                 outputs, running_time, extra = cache_data
+                if isinstance(ttl, int) and ttl > 0:
+                    _local_cache.put(cache_key, cache_data, _estimate_size(cache_data), ttl)
+                self._record_stats(node_type, hits=1, bytes_served=len(cached_value), time_saved_ms=running_time)
                 return outputs, running_time, extra
             except Exception as e:
                 logger.warning(f"Failed to load cache for {cache_key}: {e}")
+                self._record_stats(node_type, misses=1)
                 return None
 
-        self._add_cache_miss_num()
+        self._record_stats(node_type, misses=1)
         return None
 
     def set(self, node_type: str, params: dict[str, Any], inputs: dict[str, Data], outputs: dict[str, Data], running_time: float, extra: dict[str, Any] | None = None) -> None:
@@ -102,13 +332,87 @@ class CacheManager:
                 # do not cache the file content in memory
                 return
 
-        cache_key = CacheManager._get_cache_key(node_type, params, inputs)
+        cache_key = self._get_cache_key(node_type, params, inputs)
 
-        # Directly pickle the outputs (dict[str, Data])
-        # Data objects and Pandas DataFrames are picklable and much faster than JSON conversion
+        # Serialize the outputs (dict[str, Data]), tables are stored as compressed Arrow streams
         cache_value = (outputs, running_time, extra)
         try:
-            self.redis_client.set(cache_key, pickle.dumps(cache_value))
-            self.redis_client.expire(cache_key, CACHE_TTL_SECONDS)
+            cache_bytes = serialization.dumps(cache_value)
+            ttl = CacheManager._get_ttl(running_time, len(cache_bytes))
+            if ttl is None:
+                # cheaper to recompute than to fetch, still keep it in the in-process tier where a hit is free
+                _local_cache.put(cache_key, cache_value, _estimate_size(cache_value), CACHE_TTL_SECONDS)
+                self._record_stats(node_type, rejected=1)
+            else:
+                _local_cache.put(cache_key, cache_value, _estimate_size(cache_value), ttl)
+                self.redis_client.set(cache_key, cache_bytes, ex=ttl)
+                self._record_stats(node_type, admitted=1, costly=int(ttl == CACHE_COSTLY_TTL_SECONDS))
         except Exception as e:
             logger.warning(f"Failed to set cache for {cache_key}: {e}")
+
+    def get_plan(self, topology_hash: str) -> Any | None:
+        """
+        Get the compiled execution plan of a topology by its hash, from the in-process tier or Redis.
+        Return None if not found.
+        """
+        if not USE_CACHE:
+            return None
+        key = f"{_PLAN_KEY_PREFIX}{topology_hash}"
+        plan = _local_cache.get(key)
+        if plan is not None:
+            return plan
+        try:
+            cached_value = self.redis_client.get(key)
+            if cached_value is None:
+                return None
+            assert isinstance(cached_value, bytes)
+            plan = serialization.loads(cached_value)
+        except Exception as e:
+            logger.warning(f"Failed to load execution plan for {key}: {e}")
+            return None
+        _local_cache.put(key, plan, len(cached_value), CACHE_TTL_SECONDS)
+        return plan
+
+    def set_plan(self, topology_hash: str, plan: Any) -> None:
+        """ Cache the compiled execution plan of a topology by its hash. """
+        if not USE_CACHE:
+            return
+        key = f"{_PLAN_KEY_PREFIX}{topology_hash}"
+        try:
+            plan_bytes = serialization.dumps(plan)
+            _local_cache.put(key, plan, len(plan_bytes), CACHE_TTL_SECONDS)
+            self.redis_client.set(key, plan_bytes, ex=CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to set execution plan for {key}: {e}")
+
+    @staticmethod
+    def get_hint_key(node_type: str, params: dict[str, Any], input_schemas: dict[str, Any]) -> str:
+        """
+        The key of a node's UI hint, which is a pure function of its type, parameters and input schemas.
+        Schemas are hashed by their JSON dump, which is stable across processes.
+        """
+        schemas = {port: schema.model_dump(mode="json") for port, schema in input_schemas.items()}
+        return f"{_HINT_KEY_PREFIX}{node_type}:{safe_hash(safe_hash(params) + safe_hash(schemas))}"
+
+    def get_hints(self, hint_keys: list[str]) -> list[dict[str, Any] | None]:
+        """ Get memoized UI hints by their keys in one round trip, None for missing ones. """
+        if not USE_CACHE or not hint_keys:
+            return [None] * len(hint_keys)
+        try:
+            values = self.redis_client.mget(hint_keys)
+            return [None if value is None else serialization.loads(value) for value in values] # type: ignore
+        except Exception as e:
+            logger.warning(f"Failed to load hints: {e}")
+            return [None] * len(hint_keys)
+
+    def set_hints(self, hints: dict[str, dict[str, Any]]) -> None:
+        """ Memoize UI hints by their keys in one round trip. """
+        if not USE_CACHE or not hints:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, hint in hints.items():
+                pipe.set(key, serialization.dumps(hint), ex=CACHE_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to set hints: {e}")
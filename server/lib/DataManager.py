@@ -1,19 +1,177 @@
-import pickle
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from uuid import uuid4
 
-from sqlalchemy import select
+from minio import Minio, S3Error
+from sqlalchemy import delete, exists, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from server import logger
-from server.models.data import Data
+from server.celery import celery_app
+from server.config import (
+    DATA_BLOB_BUCKET,
+    DATA_BLOB_INLINE_MAX_BYTES,
+    DATA_DISK_CACHE_DIR,
+    DATA_DISK_CACHE_MAX_BYTES,
+    MINIO_ACCESS_KEY,
+    MINIO_SECRET_KEY,
+    MINIO_SECURE,
+    MINIO_URL,
+)
+from server.lib import serialization
+from server.models.data import Data, Table
 from server.models.data_view import DataRef
-from server.models.database import NodeOutputRecord, ProjectRecord
+from server.models.database import DataBlobRecord, NodeOutputRecord, ProjectRecord, get_session
 from server.models.project import ProjWorkflow
 
 
+class DiskCache:
+    """
+    A size-bounded, LRU-evicting read cache of large blobs on the local disk, keyed by the blob hash.
+    Blobs are immutable, so entries never need invalidation. Files are written atomically,
+    so the cache directory can be shared by all processes on the host.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: int | None = None # bytes in the directory, counted on the first write
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> bytes | None:
+        if self.max_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path) # mark as recently used
+        except OSError:
+            return None
+        return data
+
+    def get_path(self, key: str) -> Path | None:
+        """ The path of a cached blob, to be read in place, e.g. memory mapped. Other processes may evict it. """
+        if self.max_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            os.utime(path) # mark as recently used
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = path.with_name(f"{key}.{uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write blob {key} to disk cache: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._scan())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> list[tuple[float, Path, int]]:
+        """ (last used time, path, size) of cached blobs, files being written by other processes are skipped """
+        entries = []
+        for sub_dir in os.scandir(self.directory):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, Path(entry.path), stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """ Remove least recently used blobs until the cache is below the bound, other processes may evict too """
+        entries = sorted(self._scan(), key=lambda entry: entry[0])
+        size = sum(entry_size for _, _, entry_size in entries)
+        for _, path, entry_size in entries:
+            if size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+        self._size = size
+
+
+@cache
+def _get_minio_client() -> Minio:
+    """ The MinIO client of large blobs, created on first use and shared in the process """
+    client = Minio(
+        endpoint=MINIO_URL,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=MINIO_SECURE
+    )
+    if not client.bucket_exists(DATA_BLOB_BUCKET):
+        client.make_bucket(DATA_BLOB_BUCKET)
+    return client
+
+
+def _fetch_external_blob(blob_hash: str) -> bytes:
+    """ Read a blob from MinIO, and put it in the disk cache """
+    response = _get_minio_client().get_object(bucket_name=DATA_BLOB_BUCKET, object_name=blob_hash)
+    try:
+        binary_data = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+    _disk_cache.put(blob_hash, binary_data)
+    return binary_data
+
+
+def _get_external_blob(blob_hash: str) -> bytes:
+    """ Read a blob stored in MinIO, through the disk cache """
+    binary_data = _disk_cache.get(blob_hash)
+    if binary_data is not None:
+        return binary_data
+    return _fetch_external_blob(blob_hash)
+
+
+def _get_external_blob_source(blob_hash: str) -> Path | bytes:
+    """ The path of a blob stored in MinIO in the disk cache, or its content if it can not be cached """
+    path = _disk_cache.get_path(blob_hash)
+    if path is not None:
+        return path
+    binary_data = _fetch_external_blob(blob_hash)
+    return _disk_cache.get_path(blob_hash) or binary_data
+
+
+# shared by all DataManager instances in the process
+_disk_cache = DiskCache(DATA_DISK_CACHE_DIR, DATA_DISK_CACHE_MAX_BYTES)
+
+
 class DataManager:
     """
     The class to manage data output from nodes.
+    Data are stored once per content hash in blobs, node output records are references to the blobs.
+    Small blobs are stored inline in the database, large ones in MinIO and read through a local disk cache.
     """
     def __init__(self, sync_db_session: Session | None = None, async_db_session: AsyncSession | None = None):
         if sync_db_session:
@@ -25,21 +183,29 @@ class DataManager:
         else:
             raise ValueError("Either sync_db_session or async_db_session must be provided")
 
-    def read_sync(self, data_ref: DataRef) -> Data:
-        """ Read data synchronously from database given a DataRef """
+    @staticmethod
+    def hash_blob(binary_data: bytes) -> str:
+        return hashlib.sha256(binary_data).hexdigest()
+
+    def read_binary_sync(self, data_ref: DataRef) -> bytes:
+        """ Read serialized data synchronously given a DataRef """
         if self.db_client is None:
             raise AssertionError("Synchronous DB client is not initialized")
 
-        data_record = self.db_client.query(NodeOutputRecord).filter(
-            NodeOutputRecord.id == data_ref.data_id
+        blob = self.db_client.execute(
+            select(DataBlobRecord.hash, DataBlobRecord.data, DataBlobRecord.external)
+            .join(NodeOutputRecord, NodeOutputRecord.blob_hash == DataBlobRecord.hash)
+            .where(NodeOutputRecord.id == data_ref.data_id)
         ).first()
-        if not data_record:
+        if blob is None:
             raise KeyError(f"Data not found for DataRef: {data_ref}")
+        return _get_external_blob(blob.hash) if blob.external else blob.data
 
+    def read_sync(self, data_ref: DataRef) -> Data:
+        """ Read data synchronously from database given a DataRef """
+        binary_data = self.read_binary_sync(data_ref)
         try:
-            payload = pickle.loads(data_record.data) # type: ignore
-            assert isinstance(payload, Data)
-            return payload
+            return serialization.loads_data(binary_data)
         except Exception as e:
             logger.error(f"Failed to deserialize data {data_ref.data_id}: {e}")
             raise
@@ -50,29 +216,104 @@ class DataManager:
             raise AssertionError("Asynchronous DB client is not initialized")
 
         result = await self.async_db_client.execute(
-            select(NodeOutputRecord).where(
-                NodeOutputRecord.id == data_ref.data_id
-            )
+            select(DataBlobRecord.hash, DataBlobRecord.data, DataBlobRecord.external)
+            .join(NodeOutputRecord, NodeOutputRecord.blob_hash == DataBlobRecord.hash)
+            .where(NodeOutputRecord.id == data_ref.data_id)
         )
-        data_record = result.scalars().first()
-        if not data_record:
+        blob = result.first()
+        if blob is None:
             raise KeyError(f"Data not found for DataRef: {data_ref}")
 
         try:
-            payload = pickle.loads(data_record.data)  # type: ignore
-            assert isinstance(payload, Data)
-            return payload
+            if blob.external:
+                # do not block the event loop on reading and deserializing large blobs
+                binary_data = await asyncio.to_thread(_get_external_blob, blob.hash)
+                return await asyncio.to_thread(serialization.loads_data, binary_data)
+            return serialization.loads_data(blob.data)
         except Exception as e:
             logger.error(f"Failed to deserialize data {data_ref.data_id}: {e}")
             raise
 
+    async def read_table_page_async(
+        self,
+        data_ref: DataRef,
+        offset: int,
+        limit: int,
+        columns: list[str] | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ) -> tuple[Table, int]:
+        """
+        Read a page of rows of a table given a DataRef, see serialization.read_table_page().
+        Return the page and the number of rows of the whole table.
+        """
+        if self.async_db_client is None:
+            raise AssertionError("Asynchronous DB client is not initialized")
+
+        result = await self.async_db_client.execute(
+            select(DataBlobRecord.hash, DataBlobRecord.data, DataBlobRecord.external)
+            .join(NodeOutputRecord, NodeOutputRecord.blob_hash == DataBlobRecord.hash)
+            .where(NodeOutputRecord.id == data_ref.data_id)
+        )
+        blob = result.first()
+        if blob is None:
+            raise KeyError(f"Data not found for DataRef: {data_ref}")
+
+        def read_page() -> tuple[Table, int]:
+            if not blob.external:
+                return serialization.read_table_page(blob.data, offset, limit, columns, sort, descending)
+            try:
+                source = _get_external_blob_source(blob.hash)
+                return serialization.read_table_page(source, offset, limit, columns, sort, descending)
+            except FileNotFoundError:
+                # evicted from the disk cache by another process
+                source = _fetch_external_blob(blob.hash)
+                return serialization.read_table_page(source, offset, limit, columns, sort, descending)
+
+        return await asyncio.to_thread(read_page)
+
+    def put_blob_sync(self, binary_data: bytes) -> str:
+        """
+        Store serialized data if no blob with the same content exists, return its hash.
+        The blob row stays locked until the session commits, so the blob cleanup can not delete it
+        before the node output referencing it is committed.
+        """
+        if self.db_client is None:
+            raise AssertionError("Synchronous DB client is not initialized")
+
+        blob_hash = self.hash_blob(binary_data)
+        external = len(binary_data) > DATA_BLOB_INLINE_MAX_BYTES
+        if external:
+            # the cleanup removes the MinIO object of a deleted blob under the exclusive lock
+            self.db_client.execute(select(func.pg_advisory_xact_lock_shared(func.hashtext(blob_hash))))
+        # concurrent tasks may write the same content, the no-op update locks the existing row
+        stmt = insert(DataBlobRecord).values(
+            hash=blob_hash, data=None if external else binary_data, size=len(binary_data), external=external
+        )
+        inserted = self.db_client.execute(
+            stmt.on_conflict_do_update(index_elements=["hash"], set_={"hash": stmt.excluded.hash})
+            .returning(literal_column("xmax = 0"))
+        ).scalar_one()
+        if external and inserted:
+            # a failed upload raises and rolls back the row
+            _get_minio_client().put_object(
+                bucket_name=DATA_BLOB_BUCKET,
+                object_name=blob_hash,
+                data=io.BytesIO(binary_data),
+                length=len(binary_data),
+            )
+            # the writer is likely to read it back, e.g. when the node is reused in the next run
+            _disk_cache.put(blob_hash, binary_data)
+        return blob_hash
+
     def write_sync(self, data: Data, node_id: str, project_id: int, port: str) -> DataRef:
         """ Write data synchronously to database, return a DataRef """
         # Notice: for cache system in frontend, if data not chaged, we should reuse old data_id
         if self.db_client is None:
             raise AssertionError("Synchronous DB client is not initialized")
-        
-        binary_data = pickle.dumps(data)
+
+        binary_data = serialization.dumps_data(data)
+        blob_hash = self.hash_blob(binary_data)
 
         # 1. get old data record in database
         old_data_record = self.db_client.query(NodeOutputRecord).filter_by(
@@ -81,21 +322,21 @@ class DataManager:
             port=port
         ).first()
 
-        # 2. if an old record exists, compare data
+        # 2. if an old record exists, compare content hashes, the blob is not read
         if old_data_record:
-            # Binary comparison, if same, return old DataRef
-            if old_data_record.data == binary_data: # type: ignore
+            if old_data_record.blob_hash == blob_hash: # type: ignore
                 return DataRef(data_id=old_data_record.id)  # type: ignore
 
             self.db_client.delete(old_data_record)
             self.db_client.flush()
 
-        # 3. Insert a new record for the new/changed data
+        # 3. Insert a new record referencing the blob of the new/changed data
+        self.put_blob_sync(binary_data)
         new_data_record = NodeOutputRecord(
             project_id=project_id,
             node_id=node_id,
             port=port,
-            data=binary_data
+            blob_hash=blob_hash
         )
         self.db_client.add(new_data_record)
         self.db_client.flush() # Flush to assign the new ID to the object
@@ -104,6 +345,30 @@ class DataManager:
         data_ref = DataRef(data_id=new_data_record.id) # type: ignore
         return data_ref
 
+    async def copy_refs_async(self, data_ids: list[int], project_id: int) -> dict[int, int]:
+        """
+        Copy node output records to another project, sharing their blobs.
+        Return the mapping from old data ids to new data ids, missing records are skipped.
+        """
+        if self.async_db_client is None:
+            raise AssertionError("Asynchronous DB client is not initialized")
+
+        result = await self.async_db_client.execute(
+            select(NodeOutputRecord).where(NodeOutputRecord.id.in_(data_ids))
+        )
+        new_records: dict[int, NodeOutputRecord] = {}
+        for data_record in result.scalars().all():
+            new_record = NodeOutputRecord(
+                project_id=project_id,
+                node_id=data_record.node_id,
+                port=data_record.port,
+                blob_hash=data_record.blob_hash,
+            )
+            self.async_db_client.add(new_record)
+            new_records[data_record.id] = new_record # type: ignore
+        await self.async_db_client.flush() # Flush to assign the new IDs
+        return {old_id: new_record.id for old_id, new_record in new_records.items()} # type: ignore
+
     def clean_orphan_data_sync(self, project_id: int) -> None:
         """ Clean data records with no project reference """
         if self.db_client is None:
@@ -125,11 +390,88 @@ class DataManager:
         data_records = self.db_client.query(NodeOutputRecord).filter(
             NodeOutputRecord.project_id == project_id
         ).all()
-        deleted_datas = []
+        deleted_count = 0
+        deleted_hashes = set()
         for data_record in data_records:
             if data_record.id not in referenced_data_ids:
-                deleted_datas.append(data_record.data)
+                deleted_count += 1
+                deleted_hashes.add(data_record.blob_hash)
                 self.db_client.delete(data_record)
-        self.db_client.commit()
-        logger.info(f"Cleaned {len(deleted_datas)} orphan data records for project {project_id}")
+        self.db_client.flush()
+        # 4. delete blobs no longer referenced by any project
+        deleted_blobs = self.delete_unreferenced_blobs_sync(deleted_hashes)
+        logger.info(f"Cleaned {deleted_count} orphan data records and {deleted_blobs} blobs for project {project_id}")
         return
+
+    def delete_unreferenced_blobs_sync(self, blob_hashes: set[str] | None = None) -> int:
+        """
+        Delete the given blobs, or all blobs if None, that no node output references. Return the number deleted.
+        Blobs locked by writers are skipped, they are about to be referenced.
+        The session is committed before blobs in MinIO are removed, so a rollback can not leave records without data.
+        """
+        if self.db_client is None:
+            raise AssertionError("Synchronous DB client is not initialized")
+        if blob_hashes is not None and not blob_hashes:
+            self.db_client.commit()
+            return 0
+        unreferenced = (
+            select(DataBlobRecord.hash)
+            .where(~exists().where(NodeOutputRecord.blob_hash == DataBlobRecord.hash))
+            .with_for_update(skip_locked=True)
+        )
+        if blob_hashes is not None:
+            unreferenced = unreferenced.where(DataBlobRecord.hash.in_(blob_hashes))
+        deleted = self.db_client.execute(
+            delete(DataBlobRecord)
+            .where(DataBlobRecord.hash.in_(unreferenced.scalar_subquery()))
+            .returning(DataBlobRecord.hash, DataBlobRecord.external)
+        ).all()
+        self.db_client.commit()
+        removed = 0
+        for blob_hash, external in deleted:
+            if not external:
+                continue
+            if self._remove_external_blob_sync(blob_hash):
+                removed += 1
+        logger.debug(f"Removed {removed} of {len(deleted)} deleted blobs from MinIO")
+        return len(deleted)
+
+    def _remove_external_blob_sync(self, blob_hash: str) -> bool:
+        """
+        Remove the MinIO object of a deleted blob, unless a writer stored the same content again meanwhile.
+        Writers hold the shared lock of the hash until they commit, an object left behind is overwritten by the next writer.
+        """
+        assert self.db_client is not None
+        try:
+            locked = self.db_client.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(blob_hash)))).scalar_one()
+            if not locked:
+                return False
+            stored = self.db_client.execute(
+                select(DataBlobRecord.hash).where(DataBlobRecord.hash == blob_hash)
+            ).first()
+            if stored is not None:
+                return False
+            _get_minio_client().remove_object(bucket_name=DATA_BLOB_BUCKET, object_name=blob_hash)
+            return True
+        except S3Error as e:
+            logger.warning(f"Failed to remove blob {blob_hash} from MinIO: {e}")
+            return False
+        finally:
+            self.db_client.commit() # release the lock
+
+@celery_app.task
+def cleanup_orphan_blobs_task():
+    """
+    A periodic Celery task to delete blobs left unreferenced, e.g. by deleted projects.
+    """
+    start_time = time.perf_counter()
+    db_client = next(get_session())
+    data_manager = DataManager(sync_db_session=db_client)
+    try:
+        deleted_count = data_manager.delete_unreferenced_blobs_sync()
+        logger.info(f"Blob cleanup completed. Deleted {deleted_count} blobs in {time.perf_counter() - start_time:.2f}s.")
+    except Exception as e:
+        db_client.rollback()
+        logger.exception(f"Failed to clean up orphan blobs: {e}")
+    finally:
+        db_client.close()
@@ -1,7 +1,6 @@
 import base64
 import io
 import json
-import pickle
 from datetime import datetime, timezone
 from uuid import uuid4
 
@@ -9,9 +8,11 @@ from loguru import logger
 from pydantic import BaseModel
 
 from server.config import EXAMPLE_USER_EMAIL, EXAMPLE_USER_USERNAME, EXAMPLES_DIR
+from server.lib import serialization
+from server.lib.DataManager import DataManager
 from server.lib.FileManager import FileManager
 from server.lib.utils import get_project_by_id_sync
-from server.models.data import Data
+from server.models.data_view import DataRef
 from server.models.database import (
     DatabaseTransaction,
     FileRecord,
@@ -37,7 +38,7 @@ class ExampleData(BaseModel):
     old_id: int
     node_id: str
     port: str
-    data: str  # base64 encoded pickled data
+    data: str  # base64 encoded serialized data
 
 
 class ExampleProject(BaseModel):
@@ -80,6 +81,7 @@ def initialize_example_projects() -> None:
             db.flush()
 
         file_manager = FileManager(sync_db_session=db)
+        data_manager = DataManager(sync_db_session=db)
 
         # 2. remove old example projects
         old_projects = db.query(ProjectRecord).filter_by(owner_id=user.id).all()
@@ -151,15 +153,15 @@ def initialize_example_projects() -> None:
 
                     # --- Fix: Update File Key in Data payload ---
                     try:
-                        data_obj = pickle.loads(data_bytes)
+                        data_obj = serialization.loads_data(data_bytes)
                         # Check if the payload is a File object and update its key
-                        if isinstance(data_obj, Data) and isinstance(data_obj.payload, File):
+                        if isinstance(data_obj.payload, File):
                             old_key = data_obj.payload.key
                             if old_key in file_key_map:
                                 new_key = file_key_map[old_key]
                                 # logger.info(f"Updating File key in Data payload: {old_key} -> {new_key}")
                                 data_obj.payload.key = new_key
-                                data_bytes = pickle.dumps(data_obj)
+                                data_bytes = serialization.dumps_data(data_obj)
                     except Exception as e:
                         logger.warning(f"Failed to inspect/update data payload for node {ex_data.node_id}: {e}")
                     # --------------------------------------------
@@ -168,7 +170,7 @@ def initialize_example_projects() -> None:
                         project_id=new_project.id,
                         node_id=ex_data.node_id,
                         port=ex_data.port,
-                        data=data_bytes,
+                        blob_hash=data_manager.put_blob_sync(data_bytes),
                     )
                     db.add(new_data_record)
                     db.flush()  # Get new ID
@@ -248,6 +250,7 @@ def persist_projects(project_name: str, new_name: str | None = None) -> None:
 
     # 3. Collect Data
     example_datas = []
+    data_manager = DataManager(sync_db_session=db_client)
     data_records = db_client.query(NodeOutputRecord).filter_by(project_id=project_id).all()
     for dr in data_records:
         example_datas.append(
@@ -255,7 +258,7 @@ def persist_projects(project_name: str, new_name: str | None = None) -> None:
                 old_id=dr.id,  # type: ignore
                 node_id=dr.node_id,  # type: ignore
                 port=dr.port,  # type: ignore
-                data=base64.b64encode(dr.data).decode("utf-8"),  # type: ignore
+                data=base64.b64encode(data_manager.read_binary_sync(DataRef(data_id=dr.id))).decode("utf-8"),  # type: ignore
             )
         )
 
@@ -0,0 +1,192 @@
+import io
+import json
+import pickle
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas import DataFrame
+
+from server.config import DATA_SERIALIZATION, DATA_TABLE_BATCH_ROWS
+from server.models.data import Data, Table
+from server.models.types import ColType
+
+"""
+Serialization for cached and persisted node outputs.
+The result is always a pickle stream, so old plain pickled records can still be loaded by loads().
+With the "arrow" format, DataFrames inside the object are stored as compressed Arrow IPC streams instead,
+which are much smaller than pickled object columns and cheaper to load.
+Models, scalars and DataFrames Arrow can not represent fall back to plain pickle.
+
+Persisted node outputs holding a table are stored as an Arrow IPC file instead, see dumps_data(),
+so a page of rows and columns can be read without loading the whole table.
+"""
+
+_ARROW_COMPRESSION = "zstd"
+
+
+def _frame_to_arrow(df: DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=None) # RangeIndex is kept as metadata only
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=_ARROW_COMPRESSION)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _frame_from_arrow(data: bytes) -> DataFrame:
+    table = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+    # avoid consolidating columns into blocks, and release arrow memory column by column
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class _ArrowPickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        if type(obj) is DataFrame and all(isinstance(col, str) for col in obj.columns):
+            try:
+                return _frame_from_arrow, (_frame_to_arrow(obj),)
+            except (pa.ArrowException, TypeError, ValueError):
+                # e.g. object columns with mixed types, keep them as pickle
+                return NotImplemented
+        return NotImplemented
+
+
+def dumps(obj: Any) -> bytes:
+    """ Serialize an object with node outputs, in the format set by DATA_SERIALIZATION. """
+    if DATA_SERIALIZATION == "pickle":
+        return pickle.dumps(obj)
+    buf = io.BytesIO()
+    _ArrowPickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buf.getvalue()
+
+
+def loads(data: bytes) -> Any:
+    """ Deserialize an object serialized by dumps(), in any format. """
+    return pickle.loads(data)
+
+
+_TABLE_FILE_MAGIC = b"ARROW1"
+_TABLE_METADATA_KEY = b"nodepy"
+
+
+def dumps_data(data: Data) -> bytes:
+    """
+    Serialize a persisted node output.
+    With the "arrow" format, a table is written as an Arrow IPC file of record batches of DATA_TABLE_BATCH_ROWS rows,
+    with its column types in the schema metadata, which read_table_page() reads partially.
+    """
+    table = data.payload
+    if DATA_SERIALIZATION == "arrow" and isinstance(table, Table) and all(isinstance(col, str) for col in table.df.columns):
+        try:
+            arrow_table = pa.Table.from_pandas(table.df, preserve_index=None)
+        except (pa.ArrowException, TypeError, ValueError):
+            return dumps(data)
+        metadata = dict(arrow_table.schema.metadata or {})
+        metadata[_TABLE_METADATA_KEY] = json.dumps({
+            "col_types": {col: col_type.value for col, col_type in table.col_types.items()},
+            "num_rows": arrow_table.num_rows,
+            "batch_rows": DATA_TABLE_BATCH_ROWS,
+        }).encode("utf-8")
+        arrow_table = arrow_table.replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        options = pa.ipc.IpcWriteOptions(compression=_ARROW_COMPRESSION)
+        with pa.ipc.new_file(sink, arrow_table.schema, options=options) as writer:
+            writer.write_table(arrow_table, max_chunksize=DATA_TABLE_BATCH_ROWS)
+        return sink.getvalue().to_pybytes()
+    return dumps(data)
+
+
+def loads_data(data: bytes) -> Data:
+    """ Deserialize a persisted node output serialized by dumps_data(), or by dumps() in any format. """
+    if data[:len(_TABLE_FILE_MAGIC)] == _TABLE_FILE_MAGIC:
+        reader = pa.ipc.open_file(pa.py_buffer(data))
+        metadata = json.loads(reader.schema.metadata[_TABLE_METADATA_KEY])
+        df = reader.read_all().to_pandas(split_blocks=True, self_destruct=True)
+        col_types = {col: ColType(col_type) for col, col_type in metadata["col_types"].items()}
+        return Data.trusted(Table.trusted(df, col_types))
+    payload = loads(data)
+    assert isinstance(payload, Data)
+    return payload
+
+
+def is_table_file(source: bytes | Path) -> bool:
+    """ Whether the serialized data is a table written by dumps_data(), which supports partial reads. """
+    if isinstance(source, Path):
+        with open(source, "rb") as f:
+            head = f.read(len(_TABLE_FILE_MAGIC))
+    else:
+        head = source[:len(_TABLE_FILE_MAGIC)]
+    return head == _TABLE_FILE_MAGIC
+
+
+def read_table_page(
+    source: bytes | Path,
+    offset: int,
+    limit: int,
+    columns: list[str] | None = None,
+    sort: str | None = None,
+    descending: bool = False,
+) -> tuple[Table, int]:
+    """
+    Read rows [offset, offset + limit) of the given columns, after sorting by a column, from a table written by
+    dumps_data(). A file on disk is memory mapped, and only the needed columns of the needed record batches are read,
+    plus the sort column if any. Nulls are sorted last. The index column is always read, like every table has it.
+    Return the page and the number of rows of the whole table. Tables in other formats are loaded fully.
+    """
+    if columns is not None and Table.INDEX_COL not in columns:
+        columns = [*columns, Table.INDEX_COL]
+    if not is_table_file(source):
+        # e.g. tables persisted as pickle, they are loaded fully
+        table = loads_data(source.read_bytes() if isinstance(source, Path) else source).payload
+        if not isinstance(table, Table):
+            raise TypeError("Data is not a table.")
+        if columns is None:
+            columns = list(table.df.columns)
+        for col in [*columns, *([sort] if sort is not None else [])]:
+            if col not in table.df.columns:
+                raise KeyError(f"Column '{col}' not found in table.")
+        df = table.df
+        if sort is not None:
+            df = df.sort_values(sort, ascending=not descending, kind="stable", na_position="last")
+        df = df[columns].iloc[offset:offset + limit].reset_index(drop=True)
+        return Table.trusted(df, {col: table.col_types[col] for col in columns}), len(table.df)
+
+    buffer = pa.memory_map(str(source)) if isinstance(source, Path) else pa.py_buffer(source)
+    schema = pa.ipc.open_file(buffer).schema
+    metadata = json.loads(schema.metadata[_TABLE_METADATA_KEY])
+    num_rows: int = metadata["num_rows"]
+    batch_rows: int = metadata["batch_rows"]
+    names = [name for name in schema.names if name in metadata["col_types"]] # without the pandas index if any
+    if columns is None:
+        columns = names
+    for col in [*columns, *([sort] if sort is not None else [])]:
+        if col not in names:
+            raise KeyError(f"Column '{col}' not found in table.")
+
+    def open_projected(cols: list[str]) -> pa.ipc.RecordBatchFileReader:
+        options = pa.ipc.IpcReadOptions(included_fields=[schema.get_field_index(col) for col in cols])
+        return pa.ipc.open_file(buffer, options=options)
+
+    reader = open_projected(columns)
+    start, stop = min(offset, num_rows), min(offset + limit, num_rows)
+    if sort is None:
+        # the contiguous batches covering the page
+        batches = [reader.get_batch(i) for i in range(start // batch_rows, -(-stop // batch_rows))]
+        page = pa.Table.from_batches(batches, schema=reader.schema).slice(start - start // batch_rows * batch_rows, stop - start)
+    else:
+        keys = open_projected([sort]).read_all()
+        order = "descending" if descending else "ascending"
+        rows = pc.sort_indices(keys, sort_keys=[(sort, order)]).to_numpy()[start:stop] # nulls are placed at the end
+        # take the rows from the batches holding them, then restore the sorted order
+        batch_ids = rows // batch_rows
+        pieces = []
+        for batch_id in np.unique(batch_ids):
+            in_batch = rows[batch_ids == batch_id] - batch_id * batch_rows
+            pieces.append(pa.Table.from_batches([reader.get_batch(int(batch_id))]).take(in_batch))
+        page = pa.concat_tables(pieces) if pieces else reader.schema.empty_table()
+        page = page.take(np.argsort(np.argsort(batch_ids, kind="stable"), kind="stable"))
+    df = page.select(columns).to_pandas() # included fields are read in the order of the schema
+    col_types = {col: ColType(metadata["col_types"][col]) for col in columns}
+    return Table.trusted(df, col_types), num_rows
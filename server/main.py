@@ -10,6 +10,7 @@ from server.lib.ExampleProjManager import initialize_example_projects
 from server.lib.FinancialDataManager import initialize_core_symbols
 
 # from server.lib.ApiLoggerMiddleware import ApiLoggerMiddleware
+from server.models.data import enable_copy_on_write
 from server.models.database import init_database
 
 from .api import router
@@ -37,6 +38,9 @@ app.add_middleware(
 # if DEBUG:
 #     app.add_middleware(ApiLoggerMiddleware)
 
+# tables read and written by the api share columns copy-on-write
+enable_copy_on_write()
+
 # init database
 init_database()
 
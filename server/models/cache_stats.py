@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+
+"""
+This file contains data models for cache statistics, used in admin page.
+"""
+
+
+class NodeTypeCacheStats(BaseModel):
+    node_type: str
+    hits: int  # including hits served by the in-process tier
+    l1_hits: int  # hits served by the in-process tier
+    misses: int
+    hit_rate: float
+    bytes_served: int  # serialized bytes fetched from Redis on hits
+    time_saved_ms: float  # sum of cached running time on hits
+    admitted: int  # results written to Redis
+    rejected: int  # results cheaper to recompute than to fetch, not written to Redis
+    costly: int  # admitted results with the longer TTL
+
+    @classmethod
+    def from_counts(cls, node_type: str, counts: dict[str, float]) -> "NodeTypeCacheStats":
+        hits = int(counts.get("hits", 0))
+        misses = int(counts.get("misses", 0))
+        return cls(
+            node_type=node_type,
+            hits=hits,
+            l1_hits=int(counts.get("l1_hits", 0)),
+            misses=misses,
+            hit_rate=hits / (hits + misses) if hits + misses > 0 else 0.0,
+            bytes_served=int(counts.get("bytes_served", 0)),
+            time_saved_ms=counts.get("time_saved_ms", 0.0),
+            admitted=int(counts.get("admitted", 0)),
+            rejected=int(counts.get("rejected", 0)),
+            costly=int(counts.get("costly", 0)),
+        )
+
+
+class CacheStatsView(BaseModel):
+    node_types: list[NodeTypeCacheStats]
@@ -2,6 +2,7 @@ import base64
 import hashlib
 import io
 import json
+import sys
 from datetime import datetime
 from math import isinf, isnan
 from typing import Any, ClassVar, Literal, Union, cast
@@ -10,10 +11,11 @@ import joblib
 import numpy as np
 import pandas as pd
 from pandas import DataFrame, Series, isna
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, PrivateAttr, model_validator
 from sklearn.base import BaseEstimator
 from typing_extensions import Self
 
+from server.config import VERIFY_TRUSTED_DATA
 from server.models.data_view import DataView, ModelView, TableView
 from server.models.file import File
 from server.models.schema import (
@@ -29,6 +31,14 @@ from server.models.types import ColType
 Runtime data passed between nodes.
 """
 
+def enable_copy_on_write() -> None:
+    """
+    Make tables derived from each other share column buffers, a column is only copied when it is written,
+    see Table.copy_df. Called once at startup by every server process handling tables:
+    the api, the celery worker and the loop pool workers.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
 class Table(BaseModel):
     """
     The Table data.
@@ -82,16 +92,36 @@ class Table(BaseModel):
             raise ValueError(f"Column names cannot start with reserved prefix '_' or be whitespace only: {list(self.col_types.keys())}")
         return self
 
+    @classmethod
+    def trusted(cls, df: DataFrame, col_types: dict[str, ColType]) -> 'Table':
+        """
+        Construct a table known to match its column types, e.g. slices of a verified table or columns derived from it,
+        skipping verify() in hot paths. The index column must be present, and col_types is not copied.
+        Tables are fully verified if VERIFY_TRUSTED_DATA is set, and tables with zero rows always are.
+        """
+        if VERIFY_TRUSTED_DATA or len(df) == 0:
+            if VERIFY_TRUSTED_DATA and cls.INDEX_COL not in df.columns:
+                raise TypeError(f"Trusted table is missing the index column '{cls.INDEX_COL}'.")
+            return cls(df=df, col_types=col_types)
+        return cls.model_construct(df=df, col_types=col_types)
+
     def extract_schema(self) -> TableSchema:
         return TableSchema(
             col_types=self.col_types
         )
 
+    def copy_df(self) -> DataFrame:
+        """
+        A copy of df to derive a new table from, e.g. by adding or replacing columns.
+        Columns are shared with this table copy-on-write, so only the columns written to are actually copied.
+        """
+        return self.df.copy(deep=False)
+
     def regenerate_index(self) -> 'Table':
-        new_df = self.df.copy()
+        new_df = self.copy_df()
         new_df[self.INDEX_COL] = range(len(new_df))
         self.col_types[self.INDEX_COL] = ColType.INT
-        return Table(df=new_df, col_types=self.col_types)
+        return Table.trusted(df=new_df, col_types=self.col_types.copy())
 
     def _append_col(self, new_col: str, col: Series, pos: int | None = None) -> 'Table':
         if new_col in self.col_types:
@@ -100,7 +130,7 @@ class Table(BaseModel):
             raise ValueError(f"Cannot add column '{new_col}': illegal name.")
         if len(self.df) != len(col):
             raise ValueError(f"Cannot add column '{new_col}': length mismatch {len(self.df)} vs {len(col)}.")
-        new_df = self.df.copy()
+        new_df = self.copy_df()
         if pos is None:
             new_df[new_col] = col.values
         else:
@@ -111,7 +141,7 @@ class Table(BaseModel):
         else:
             new_col_types = {new_col: ColType.from_ptype(col.dtype)}
             new_col_types.update(self.col_types)
-        return Table(df=new_df, col_types=new_col_types)
+        return Table.trusted(df=new_df, col_types=new_col_types)
 
     def fast_hash(self) -> str:
         from pandas.util import hash_pandas_object
@@ -251,6 +281,8 @@ class Model(BaseModel):
 class Data(BaseModel):
     payload: Union[Table, str, int, bool, float, File, datetime, Model]
 
+    _lineage_hash: str | None = PrivateAttr(None) # identity derived from the producer's cache key, see CacheManager
+
     @model_validator(mode="before")
     def convert_ptypes(cls, data: Any) -> Any:
         if 'payload' not in data:
@@ -269,6 +301,16 @@ class Data(BaseModel):
             data['payload'] = str(payload)
         return data
 
+    @classmethod
+    def trusted(cls, payload: Union[Table, str, int, bool, float, File, datetime, Model]) -> 'Data':
+        """
+        Wrap a payload already in native python types, e.g. a trusted table, skipping payload conversion and validation.
+        Data is fully validated if VERIFY_TRUSTED_DATA is set.
+        """
+        if VERIFY_TRUSTED_DATA:
+            return cls(payload=payload)
+        return cls.model_construct(payload=payload)
+
     def extract_schema(self) -> Schema:
         if isinstance(self.payload, Table):
             return Schema(
@@ -296,7 +338,7 @@ class Data(BaseModel):
         if not isinstance(self.payload, Table):
             raise ValueError("Can only append column to Table data.")
         new_table = self.payload._append_col(new_col, ser, pos)
-        return Data(payload=new_table)
+        return Data.trusted(payload=new_table)
 
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, Data):
@@ -313,6 +355,24 @@ class Data(BaseModel):
         else:
             return hashlib.md5(repr(self.payload).encode("utf-8")).hexdigest()
 
+    def memory_size(self) -> int:
+        """ A cheap, shallow estimate of the memory held by the payload in bytes. """
+        if isinstance(self.payload, Table):
+            return int(self.payload.df.memory_usage(index=True, deep=False).sum())
+        return sys.getsizeof(self.payload)
+
+    def lineage_hash(self) -> str:
+        """ The identity of the data in cache keys, fall back to the content hash if no lineage is attached. """
+        if self._lineage_hash is not None:
+            return self._lineage_hash
+        return self.fast_hash()
+
+    def with_lineage_hash(self, lineage_hash: str) -> 'Data':
+        """ Return a shallow copy with the lineage hash attached, the payload is shared. """
+        data = self.model_copy()
+        data._lineage_hash = lineage_hash
+        return data
+
     def to_view(self) -> "DataView":
         if isinstance(self.payload, Table):
             table_view = self.payload.to_view()
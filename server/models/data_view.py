@@ -39,6 +39,15 @@ class TableView(BaseModel):
             result["cols"][col_name] = normalized
         return result
 
+class TablePageView(BaseModel):
+    """
+    A page of rows of a table, for viewing large tables.
+    """
+
+    table: TableView
+    offset: int  # index of the first row of the page in the (sorted) table
+    total_rows: int  # number of rows of the whole table
+
 class ModelView(BaseModel):
     model: str  # base64 encoded model bytes
     metadata: ModelSchema
@@ -80,9 +80,21 @@ class ProjectRecord(Base):
         UniqueConstraint('owner_id', 'name', name='_owner_name_uc'),
     )
 
+class DataBlobRecord(Base):
+    """
+    The serialized output data, stored once per content hash and shared by all node outputs with the same content.
+    Blobs larger than DATA_BLOB_INLINE_MAX_BYTES are stored in MinIO instead.
+    """
+    __tablename__ = "data_blobs"
+
+    hash = Column(String, primary_key=True) # sha256 hex digest of data
+    data = Column(LargeBinary, nullable=True) # Serialized Data object, None if external
+    size = Column(BigInteger, nullable=False) # Byte
+    external = Column(Boolean, default=False, nullable=False) # large blobs are stored in MinIO, keyed by hash
+
 class NodeOutputRecord(Base):
     """
-    The output data generated by nodes.
+    The output data generated by nodes, a reference to the blob of its content.
     """
     __tablename__ = "data"
     
@@ -93,7 +105,7 @@ class NodeOutputRecord(Base):
     )
     node_id = Column(String, nullable=False, index=True) # reference the node id in project.graph.nodes[i].id
     port = Column(String, nullable=False, index=True)  # output port name
-    data = Column(LargeBinary, nullable=False) # Serialized Data object
+    blob_hash = Column(String, ForeignKey("data_blobs.hash"), nullable=False, index=True) # content of the data
 
     __table_args__ = (
         UniqueConstraint('project_id', 'node_id', 'port', name='_project_node_port_uc'),
@@ -197,14 +209,47 @@ def file_size_trigger(conn) -> None:
     )
     conn.commit()
 
+# migrations
+def data_blob_migration(conn) -> None:
+    """ Move data stored inline in node output records into content addressed blobs, and allow external blobs. """
+    conn.execute(
+        text("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'data' AND column_name = 'data'
+            ) THEN
+                ALTER TABLE data ADD COLUMN IF NOT EXISTS blob_hash VARCHAR;
+                UPDATE data SET blob_hash = encode(sha256(data), 'hex');
+                INSERT INTO data_blobs (hash, data, size)
+                    SELECT DISTINCT ON (blob_hash) blob_hash, data, length(data) FROM data
+                    ON CONFLICT DO NOTHING;
+                ALTER TABLE data DROP COLUMN data;
+                ALTER TABLE data ALTER COLUMN blob_hash SET NOT NULL;
+                ALTER TABLE data ADD FOREIGN KEY (blob_hash) REFERENCES data_blobs (hash);
+                CREATE INDEX IF NOT EXISTS ix_data_blob_hash ON data (blob_hash);
+            END IF;
+        END $$;
+    """)
+    )
+    conn.execute(
+        text("""
+        ALTER TABLE data_blobs ADD COLUMN IF NOT EXISTS external BOOLEAN NOT NULL DEFAULT FALSE;
+        ALTER TABLE data_blobs ALTER COLUMN data DROP NOT NULL;
+    """)
+    )
+    conn.commit()
+
 def init_database() -> None:
-    """ Initialize the database: create tables and triggers """
+    """ Initialize the database: create tables and triggers, migrate old tables """
     global engine
     # Create database tables
     Base.metadata.create_all(bind=engine)
-    # Create triggers
+    # Create triggers and migrate
     with engine.connect() as conn:
         file_size_trigger(conn)
+        data_blob_migration(conn)
 
 class DatabaseTransaction:
     """
@@ -53,6 +53,7 @@ class ProjNode(BaseModel):
 
     schema_out: dict[str, Schema] = {}
     data_out: dict[str, DataRef] = {}
+    is_preview: bool = False  # whether data_out holds results of a preview run on sampled inputs
 
     hint: dict[str, Any] = {}
 
@@ -113,13 +114,16 @@ class ProjWorkflow(BaseModel):
         else:
             setattr(target, last_key, patch.value)
 
-    def generate_del_error_patches(self) -> list["ProjWorkflowPatch"]:
+    def generate_del_error_patches(self, exclude: list[int] = []) -> list["ProjWorkflowPatch"]:
+        """
+        If exclude is provided, keep node errors for those nodes.
+        """
         result = []
         # 1. del error_message
         result.append(ProjWorkflowPatch(key=["error_message"], value=None))
         # 2. del node errors
-        for node in self.nodes:
-            if node.error is not None:
+        for index, node in enumerate(self.nodes):
+            if node.error is not None and (index not in exclude):
                 result.append(
                     ProjWorkflowPatch(
                         key=[
@@ -170,10 +174,13 @@ class ProjWorkflow(BaseModel):
                 )
         return result
 
-    def generate_del_runningtime_patches(self) -> list["ProjWorkflowPatch"]:
+    def generate_del_runningtime_patches(self, exclude: list[int] = []) -> list["ProjWorkflowPatch"]:
+        """
+        If exclude is provided, keep runningtime for those nodes.
+        """
         result = []
-        for node in self.nodes:
-            if node.runningtime is not None:
+        for index, node in enumerate(self.nodes):
+            if node.runningtime is not None and (index not in exclude):
                 result.append(
                     ProjWorkflowPatch(
                         key=[
@@ -186,6 +193,39 @@ class ProjWorkflow(BaseModel):
                 )
         return result
 
+    def generate_del_preview_patches(self) -> list["ProjWorkflowPatch"]:
+        """
+        Delete data_out of nodes still holding preview results, which were not replaced by the full run.
+        """
+        result = []
+        for index, node in enumerate(self.nodes):
+            if node.is_preview:
+                result.append(ProjWorkflowPatch(key=["nodes", index, "data_out"], value={}))
+                result.append(ProjWorkflowPatch(key=["nodes", index, "is_preview"], value=False))
+        return result
+
+    def reuse_results_from(self, old: "ProjWorkflow", exclude: set[str]) -> list[str]:
+        """
+        Copy schemas, data refs and running times from the old workflow for nodes not in exclude.
+        Only nodes with complete results in the old workflow are reused.
+        Return the ids of reused nodes.
+        """
+        old_nodes = {node.id: node for node in old.nodes if not node.is_virtual_node}
+        reused: list[str] = []
+        for node in self.nodes:
+            if node.is_virtual_node or node.id in exclude:
+                continue
+            old_node = old_nodes.get(node.id)
+            if old_node is None or old_node.error is not None or old_node.is_preview:
+                continue
+            if not old_node.data_out or old_node.runningtime is None:
+                continue
+            node.schema_out = old_node.schema_out
+            node.data_out = old_node.data_out
+            node.runningtime = old_node.runningtime
+            reused.append(node.id)
+        return reused
+
 NodeUIState = dict[str, Any]  # e.g., position: (x, y)
 
 class ProjUIState(BaseModel):
@@ -250,3 +290,17 @@ class ProjectSetting(BaseModel):
     show_to_explore: bool = False  
     # whether the project is shown in explore list to other users
     project_name: str
+
+class ProjNodeAnalysis(BaseModel):
+    """
+    Static analysis result of a node, same fields as in ProjNode.
+    """
+    schema_out: dict[str, Schema] = {}
+    hint: dict[str, Any] = {}
+    error: ProjNodeError | None = None
+
+class ProjAnalysis(BaseModel):
+    """
+    Static analysis result of a workflow, without executing it.
+    """
+    nodes: dict[str, ProjNodeAnalysis] = {}  # node id -> analysis result
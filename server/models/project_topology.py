@@ -70,3 +70,79 @@ class WorkflowTopology(BaseModel):
             if node is not None and node.id == node_id:
                 return index
         return None
+
+    def get_dirty_node_ids(self, old: "WorkflowTopology") -> set[str]:
+        """
+        Compare with an old topology and get ids of nodes need to be re-executed.
+        Dirty nodes are nodes which are new, have changed type/params or input edges, plus all their descendants.
+        """
+        old_nodes = {node.id: node for node in old.nodes if node is not None}
+        old_in_edges: dict[str, set[tuple[str, str, str]]] = {}
+        for edge in old.edges:
+            old_in_edges.setdefault(edge.tar, set()).add((edge.src, edge.src_port, edge.tar_port))
+        new_in_edges: dict[str, set[tuple[str, str, str]]] = {}
+        successors: dict[str, set[str]] = {}
+        for edge in self.edges:
+            new_in_edges.setdefault(edge.tar, set()).add((edge.src, edge.src_port, edge.tar_port))
+            successors.setdefault(edge.src, set()).add(edge.tar)
+
+        # 1. find changed nodes
+        dirty: set[str] = set()
+        for node in self.nodes:
+            if node is None:
+                continue
+            old_node = old_nodes.get(node.id)
+            if (
+                old_node is None
+                or old_node.type != node.type
+                or old_node.params != node.params
+                or old_in_edges.get(node.id, set()) != new_in_edges.get(node.id, set())
+            ):
+                dirty.add(node.id)
+
+        # 2. propagate to descendants
+        stack = list(dirty)
+        while stack:
+            node_id = stack.pop()
+            for succ in successors.get(node_id, set()):
+                if succ not in dirty:
+                    dirty.add(succ)
+                    stack.append(succ)
+        return dirty
+
+    def get_ancestor_closure(self, target_ids: set[str]) -> set[str]:
+        """
+        Get ids of target nodes and all nodes they depend on.
+        Control structures are kept complete: if one node of a begin/end pair is included, so is the other.
+        """
+        predecessors: dict[str, set[str]] = {}
+        for edge in self.edges:
+            predecessors.setdefault(edge.tar, set()).add(edge.src)
+        pairs: dict[Any, set[str]] = {}
+        for node in self.nodes:
+            if node is not None and "pair_id" in node.params:
+                pairs.setdefault(node.params["pair_id"], set()).add(node.id)
+        node_pair = {node_id: pair_id for pair_id, node_ids in pairs.items() for node_id in node_ids}
+
+        closure: set[str] = set()
+        stack = [node_id for node_id in target_ids if self.get_index_by_node_id(node_id) is not None]
+        while stack:
+            node_id = stack.pop()
+            if node_id in closure:
+                continue
+            closure.add(node_id)
+            stack.extend(predecessors.get(node_id, set()) - closure)
+            if node_id in node_pair:
+                stack.extend(pairs[node_pair[node_id]] - closure)
+        return closure
+
+    def restrict_to(self, node_ids: set[str]) -> "WorkflowTopology":
+        """
+        Get a sub topology containing only the given nodes and edges between them.
+        Other nodes are replaced by None placeholders, so node indices stay the same.
+        """
+        return WorkflowTopology(
+            project_id=self.project_id,
+            nodes=[node if node is not None and node.id in node_ids else None for node in self.nodes],
+            edges=[edge for edge in self.edges if edge.src in node_ids and edge.tar in node_ids],
+        )
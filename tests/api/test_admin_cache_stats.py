@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# the api needs the full server stack (auth, database drivers), skip where it is not installed
+pytest.importorskip("jose")
+admin_api = pytest.importorskip("server.api.admin")
+
+from fastapi import HTTPException  # noqa: E402
+
+from server.models.cache_stats import CacheStatsView  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def admins(monkeypatch):
+    monkeypatch.setattr(admin_api, "ADMIN_USERNAMES", {"root"})
+
+
+def test_admin_user_passes():
+    user = SimpleNamespace(username="root")
+    assert asyncio.run(admin_api.get_admin_user(current_user=user)) is user
+
+
+def test_other_user_is_403():
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(admin_api.get_admin_user(current_user=SimpleNamespace(username="alice")))
+    assert exc_info.value.status_code == 403
+
+
+def test_cache_stats_are_read_from_the_cache_manager(monkeypatch):
+    stats = CacheStatsView(node_types=[])
+
+    class _CacheManager:
+        def get_stats(self):
+            return stats
+
+    monkeypatch.setattr(admin_api, "CacheManager", _CacheManager)
+    assert asyncio.run(admin_api.get_cache_stats(admin_user=SimpleNamespace(username="root"))) is stats
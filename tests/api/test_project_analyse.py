@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# the api needs the full server stack (auth, database drivers), skip where it is not installed
+pytest.importorskip("jose")
+project_api = pytest.importorskip("server.api.project")
+
+from fastapi import HTTPException  # noqa: E402
+
+from server.models.project import ProjWorkflow  # noqa: E402
+
+_USER = SimpleNamespace(id=7)
+_DB = object()
+
+
+@pytest.fixture
+def analysed(monkeypatch) -> list[tuple[int, int]]:
+    """Replace the analysis by a recorder of (project_id, user_id)."""
+    calls: list[tuple[int, int]] = []
+
+    def analyse_workflow(workflow, project_id, user_id):
+        calls.append((project_id, user_id))
+        return "analysis"
+
+    monkeypatch.setattr(project_api, "analyse_workflow", analyse_workflow)
+    return calls
+
+
+def _with_project(monkeypatch, result) -> list[tuple[object, int, int]]:
+    lookups: list[tuple[object, int, int]] = []
+
+    async def get_project_by_id(db, project_id, user_id):
+        lookups.append((db, project_id, user_id))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(project_api, "get_project_by_id", get_project_by_id)
+    return lookups
+
+
+def _analyse(project_id: int = 3):
+    return asyncio.run(
+        project_api.analyse_workflow_sync(project_id, ProjWorkflow.get_empty_workflow(), db_client=_DB, user_record=_USER)
+    )
+
+
+def test_analyse_checks_access_before_analysing(monkeypatch, analysed):
+    lookups = _with_project(monkeypatch, SimpleNamespace(project_id=3))
+    assert _analyse() == "analysis"
+    assert lookups == [(_DB, 3, 7)]
+    assert analysed == [(3, 7)]
+
+
+def test_analyse_missing_project_is_404(monkeypatch, analysed):
+    _with_project(monkeypatch, None)
+    with pytest.raises(HTTPException) as exc_info:
+        _analyse()
+    assert exc_info.value.status_code == 404
+    assert analysed == []
+
+
+def test_analyse_project_of_another_user_is_403(monkeypatch, analysed):
+    _with_project(monkeypatch, PermissionError("User does not have access to this project."))
+    with pytest.raises(HTTPException) as exc_info:
+        _analyse()
+    assert exc_info.value.status_code == 403
+    assert analysed == []
@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import os
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+
+# the data manager needs the full server stack (database drivers, MinIO, Celery), skip where it is not installed
+data_manager = pytest.importorskip("server.lib.DataManager")
+
+from sqlalchemy import create_engine, func, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from server.lib import serialization  # noqa: E402
+from server.models.data import Data, Table  # noqa: E402
+from server.models.data_view import DataRef  # noqa: E402
+from server.models.database import (  # noqa: E402
+    Base,
+    DataBlobRecord,
+    NodeOutputRecord,
+    ProjectRecord,
+    UserRecord,
+    data_blob_migration,
+)
+from server.models.types import ColType  # noqa: E402
+
+DataManager = data_manager.DataManager
+DiskCache = data_manager.DiskCache
+
+
+def _table(n: int = 10) -> Table:
+    return Table(
+        df=pd.DataFrame({"a": list(range(n)), "_index": list(range(n))}),
+        col_types={"a": ColType.INT, "_index": ColType.INT},
+    )
+
+
+# --- disk cache ---
+
+
+@pytest.fixture
+def disk_cache(tmp_path) -> DiskCache:
+    return DiskCache(tmp_path, max_bytes=100)
+
+
+def _set_last_used(cache: DiskCache, key: str, seconds_ago: float) -> None:
+    last_used = time.time() - seconds_ago
+    os.utime(cache._path(key), (last_used, last_used))
+
+
+def _cached_files(cache: DiskCache) -> list[str]:
+    return sorted(path.name for path in cache.directory.rglob("*") if path.is_file())
+
+
+def test_disk_cache_evicts_least_recently_used(disk_cache):
+    disk_cache.put("aa01", b"a" * 40)
+    disk_cache.put("bb02", b"b" * 40)
+    _set_last_used(disk_cache, "aa01", 20)
+    _set_last_used(disk_cache, "bb02", 10)
+    # reading a blob makes it the most recently used
+    assert disk_cache.get("aa01") == b"a" * 40
+    disk_cache.put("cc03", b"c" * 40)
+    assert disk_cache.get("bb02") is None
+    assert disk_cache.get("aa01") == b"a" * 40
+    assert disk_cache.get("cc03") == b"c" * 40
+    assert disk_cache._size == 80
+
+
+def test_disk_cache_skips_blobs_larger_than_the_bound(disk_cache):
+    disk_cache.put("aa01", b"a" * 101)
+    assert disk_cache.get("aa01") is None
+    assert _cached_files(disk_cache) == []
+
+
+def test_disabled_disk_cache_reads_nothing(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=0)
+    cache.put("aa01", b"")
+    assert cache.get("aa01") is None
+    assert cache.get_path("aa01") is None
+
+
+def test_disk_cache_writes_atomically(disk_cache, monkeypatch):
+    disk_cache.put("aa01", b"a" * 40)
+    assert _cached_files(disk_cache) == ["aa01"]
+
+    def replace(src, dst):
+        raise OSError("disk full")
+
+    # a failed write leaves neither the blob nor its temporary file
+    monkeypatch.setattr(data_manager.os, "replace", replace)
+    disk_cache.put("bb02", b"b" * 40)
+    assert disk_cache.get("bb02") is None
+    assert _cached_files(disk_cache) == ["aa01"]
+
+
+def test_disk_cache_ignores_files_being_written(disk_cache):
+    """Temporary files of other processes are neither counted nor evicted, they are renamed when complete."""
+    tmp_file = disk_cache.directory / "bb" / "bb02.0123.tmp"
+    tmp_file.parent.mkdir(parents=True)
+    tmp_file.write_bytes(b"b" * 90)
+    disk_cache.put("aa01", b"a" * 40)
+    assert disk_cache._size == 40
+    assert tmp_file.exists()
+    assert disk_cache.get("bb02") is None
+
+
+# --- reading blobs ---
+
+
+class _AsyncBlobSession:
+    """An async session whose queries all return the given blob row."""
+
+    def __init__(self, blob: SimpleNamespace) -> None:
+        self.blob = blob
+
+    async def execute(self, statement):
+        return SimpleNamespace(first=lambda: self.blob)
+
+
+def test_table_page_of_evicted_blob_is_fetched_again(monkeypatch, tmp_path):
+    """Another process may evict the cached file between finding and reading it, the blob is fetched from MinIO."""
+    binary_data = serialization.dumps_data(Data(payload=_table()))
+    fetched: list[str] = []
+
+    def fetch_external_blob(blob_hash):
+        fetched.append(blob_hash)
+        return binary_data
+
+    monkeypatch.setattr(data_manager, "_get_external_blob_source", lambda blob_hash: tmp_path / "evicted")
+    monkeypatch.setattr(data_manager, "_fetch_external_blob", fetch_external_blob)
+    manager = DataManager(async_db_session=_AsyncBlobSession(SimpleNamespace(hash="h", data=None, external=True)))  # type: ignore[arg-type]
+    page, num_rows = asyncio.run(manager.read_table_page_async(DataRef(data_id=1), offset=2, limit=3))
+    assert fetched == ["h"]
+    assert num_rows == 10
+    assert page.df["a"].tolist() == [2, 3, 4]
+
+
+# --- writing blobs ---
+
+
+class _BlobSession:
+    """A sync session recording statements, the upsert reports whether the blob row was inserted."""
+
+    def __init__(self, inserted: bool) -> None:
+        self.inserted = inserted
+        self.statements: list = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(scalar_one=lambda: self.inserted)
+
+
+class _MinioClient:
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+
+    def put_object(self, bucket_name, object_name, data, length):
+        self.objects[object_name] = data.read(length)
+
+
+@pytest.fixture
+def minio_client(monkeypatch, tmp_path) -> _MinioClient:
+    """Blobs larger than 16 bytes are external, uploaded to a recording client and cached in a temporary directory."""
+    client = _MinioClient()
+    monkeypatch.setattr(data_manager, "_get_minio_client", lambda: client)
+    monkeypatch.setattr(data_manager, "_disk_cache", DiskCache(tmp_path, max_bytes=1024))
+    monkeypatch.setattr(data_manager, "DATA_BLOB_INLINE_MAX_BYTES", 16)
+    return client
+
+
+def test_new_external_blob_is_uploaded_and_cached(minio_client):
+    binary_data = b"x" * 32
+    blob_hash = DataManager(sync_db_session=_BlobSession(inserted=True)).put_blob_sync(binary_data)  # type: ignore[arg-type]
+    assert blob_hash == hashlib.sha256(binary_data).hexdigest()
+    assert minio_client.objects == {blob_hash: binary_data}
+    assert data_manager._disk_cache.get(blob_hash) == binary_data
+
+
+def test_existing_external_blob_is_not_uploaded_again(minio_client):
+    session = _BlobSession(inserted=False)
+    blob_hash = DataManager(sync_db_session=session).put_blob_sync(b"x" * 32)  # type: ignore[arg-type]
+    assert minio_client.objects == {}
+    assert data_manager._disk_cache.get(blob_hash) is None
+    # the shared lock of the hash, then the upsert
+    assert len(session.statements) == 2
+
+
+def test_inline_blob_is_not_uploaded(minio_client):
+    session = _BlobSession(inserted=True)
+    DataManager(sync_db_session=session).put_blob_sync(b"x" * 16)  # type: ignore[arg-type]
+    assert minio_client.objects == {}
+    # no lock, only the upsert
+    assert len(session.statements) == 1
+
+
+# --- with a database ---
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+needs_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a PostgreSQL database")
+
+
+@pytest.fixture
+def schema():
+    """A schema of its own for each test, dropped afterwards."""
+    engine = create_engine(TEST_DATABASE_URL)
+    name = f"test_{uuid4().hex}"
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA "{name}"'))
+    yield name
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA "{name}" CASCADE'))
+    engine.dispose()
+
+
+@pytest.fixture
+def engine(schema):
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def project_ids(db) -> list[int]:
+    user = UserRecord(username="user", email="user@example.com")
+    db.add(user)
+    db.flush()
+    projects = [ProjectRecord(name=f"project {i}", owner_id=user.id, workflow={}, ui_state={}) for i in range(2)]
+    db.add_all(projects)
+    db.commit()
+    return [project.id for project in projects]  # type: ignore[misc]
+
+
+@needs_database
+def test_equal_outputs_share_one_blob(db, project_ids):
+    manager = DataManager(sync_db_session=db)
+    data = Data(payload=_table())
+    refs = [manager.write_sync(data, node_id, project_id, "table") for node_id, project_id in zip(("n1", "n2"), project_ids)]
+    other_ref = manager.write_sync(Data(payload=_table(3)), "n3", project_ids[0], "table")
+    db.commit()
+    assert db.execute(select(func.count()).select_from(DataBlobRecord)).scalar_one() == 2
+    blob_hashes = [db.get(NodeOutputRecord, ref.data_id).blob_hash for ref in [*refs, other_ref]]
+    assert blob_hashes[0] == blob_hashes[1] != blob_hashes[2]
+    for ref in refs:
+        pd.testing.assert_frame_equal(manager.read_sync(ref).payload.df, data.payload.df)
+
+
+@needs_database
+def test_rewriting_equal_output_keeps_its_data_id(db, project_ids):
+    manager = DataManager(sync_db_session=db)
+    ref = manager.write_sync(Data(payload=_table()), "n1", project_ids[0], "table")
+    assert manager.write_sync(Data(payload=_table()), "n1", project_ids[0], "table") == ref
+    assert manager.write_sync(Data(payload=_table(3)), "n1", project_ids[0], "table") != ref
+
+
+@needs_database
+def test_concurrent_writers_upload_an_external_blob_once(db, engine, minio_client):
+    """The second writer of the same content finds the row, it is not uploaded again."""
+    binary_data = b"x" * 32
+    assert DataManager(sync_db_session=db).put_blob_sync(binary_data) == hashlib.sha256(binary_data).hexdigest()
+    db.commit()
+    minio_client.objects.clear()
+    with Session(engine) as other_db:
+        DataManager(sync_db_session=other_db).put_blob_sync(binary_data)
+        other_db.commit()
+    assert minio_client.objects == {}
+    blob = db.execute(select(DataBlobRecord)).scalar_one()
+    assert blob.external and blob.data is None and blob.size == 32
+
+
+@needs_database
+def test_copy_refs_maps_old_ids_to_new_records(db, schema, project_ids):
+    manager = DataManager(sync_db_session=db)
+    refs = [manager.write_sync(Data(payload=_table(n)), f"n{n}", project_ids[0], "table") for n in (1, 2)]
+    db.commit()
+    old_ids = [ref.data_id for ref in refs]
+
+    async def copy_refs() -> dict[int, int]:
+        async_engine = create_async_engine(
+            TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
+            connect_args={"server_settings": {"search_path": schema}},
+        )
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                mapping = await DataManager(async_db_session=session).copy_refs_async([*old_ids, 10**9], project_ids[1])
+                await session.commit()
+                return mapping
+        finally:
+            await async_engine.dispose()
+
+    mapping = asyncio.run(copy_refs())
+    assert set(mapping) == set(old_ids)  # the missing record is skipped
+    assert not set(mapping.values()) & set(old_ids)
+    for old_id, new_id in mapping.items():
+        old, new = db.get(NodeOutputRecord, old_id), db.get(NodeOutputRecord, new_id)
+        assert new.project_id == project_ids[1]
+        assert (new.node_id, new.port, new.blob_hash) == (old.node_id, old.port, old.blob_hash)
+    assert db.execute(select(func.count()).select_from(DataBlobRecord)).scalar_one() == 2
+
+
+@needs_database
+def test_data_blob_migration_moves_inline_data_to_blobs(engine):
+    """Tables of the old layout, node outputs holding their data, are migrated once, a second run changes nothing."""
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE data_blobs (hash VARCHAR PRIMARY KEY, data BYTEA NOT NULL, size BIGINT NOT NULL)"))
+        conn.execute(text(
+            "CREATE TABLE data (id SERIAL PRIMARY KEY, project_id INTEGER NOT NULL, node_id VARCHAR NOT NULL, "
+            "port VARCHAR NOT NULL, data BYTEA NOT NULL)"
+        ))
+        conn.execute(
+            text("INSERT INTO data (project_id, node_id, port, data) VALUES (1, 'a', 'out', :x), (1, 'b', 'out', :x), (1, 'c', 'out', :y)"),
+            {"x": b"same", "y": b"other"},
+        )
+        conn.commit()
+        data_blob_migration(conn)
+        data_blob_migration(conn)
+
+        assert "data" not in conn.execute(text(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = 'data'"
+        )).scalars().all()
+        outputs = dict(conn.execute(text("SELECT node_id, blob_hash FROM data")).all())
+        assert outputs == {
+            "a": hashlib.sha256(b"same").hexdigest(),
+            "b": hashlib.sha256(b"same").hexdigest(),
+            "c": hashlib.sha256(b"other").hexdigest(),
+        }
+        blobs = {row.hash: row for row in conn.execute(text("SELECT hash, data, size, external FROM data_blobs"))}
+        assert set(blobs) == set(outputs.values())
+        assert bytes(blobs[outputs["a"]].data) == b"same" and blobs[outputs["a"]].size == 4
+        assert not any(blob.external for blob in blobs.values())
+        # external blobs have no inline data
+        conn.execute(text("INSERT INTO data_blobs (hash, data, size, external) VALUES ('e', NULL, 1, TRUE)"))
+        conn.commit()
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from server.lib import serialization
+from server.models.data import Data, Table
+from server.models.types import ColType
+
+_ROWS = 18
+_BATCH_ROWS = 4
+_COL_TYPES = {"i": ColType.INT, "f": ColType.FLOAT, "s": ColType.STR, Table.INDEX_COL: ColType.INT}
+
+
+def _table() -> Table:
+    """Nullable int, float with NaN and str columns over several record batches, with a non-Range index."""
+    df = pd.DataFrame(
+        {
+            "i": pd.array([(i * 7) % _ROWS if i % 5 else None for i in range(_ROWS)], dtype="Int64"),
+            "f": [float("nan") if i % 4 == 1 else (i * 5) % 11 / 2 for i in range(_ROWS)],
+            "s": [None if i % 6 == 2 else f"s{(i * 11) % _ROWS:02d}" for i in range(_ROWS)],
+            Table.INDEX_COL: list(range(_ROWS)),
+        },
+        index=[100 + 3 * i for i in range(_ROWS)],
+    )
+    return Table(df=df, col_types=_COL_TYPES)
+
+
+@pytest.fixture
+def source(monkeypatch) -> bytes:
+    monkeypatch.setattr(serialization, "DATA_TABLE_BATCH_ROWS", _BATCH_ROWS)
+    source = serialization.dumps_data(Data(payload=_table()))
+    assert serialization.is_table_file(source)
+    return source
+
+
+def _page_columns(columns: list[str] | None) -> list[str]:
+    """The columns of a page, the index column is always read."""
+    if columns is None:
+        return list(_COL_TYPES)
+    return columns if Table.INDEX_COL in columns else [*columns, Table.INDEX_COL]
+
+
+def _expected(offset: int, limit: int, columns: list[str] | None = None, sort: str | None = None, descending: bool = False) -> pd.DataFrame:
+    df = _table().df
+    if sort is not None:
+        df = df.sort_values(sort, ascending=not descending, kind="stable", na_position="last")
+    return df[_page_columns(columns)].iloc[offset:offset + limit].reset_index(drop=True)
+
+
+def _assert_page(source, offset: int, limit: int, columns: list[str] | None = None, sort: str | None = None, descending: bool = False) -> None:
+    page, num_rows = serialization.read_table_page(source, offset, limit, columns, sort, descending)
+    assert num_rows == _ROWS
+    assert page.col_types == {col: _COL_TYPES[col] for col in _page_columns(columns)}
+    pd.testing.assert_frame_equal(page.df, _expected(offset, limit, columns, sort, descending))
+
+
+@pytest.mark.parametrize("offset, limit", [(0, 3), (2, 4), (3, 6), (4, 4), (5, 13), (0, _ROWS), (17, 10)])
+def test_page_across_batches(source, offset, limit):
+    _assert_page(source, offset, limit)
+
+
+@pytest.mark.parametrize("sort", ["i", "f", "s"])
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("offset, limit", [(0, 5), (6, 7), (13, 10)])
+def test_sorted_page_puts_nulls_last(source, sort, descending, offset, limit):
+    _assert_page(source, offset, limit, sort=sort, descending=descending)
+
+
+def test_projected_page_keeps_the_requested_order(source):
+    _assert_page(source, 3, 6, columns=["s", "i"])
+    _assert_page(source, 3, 6, columns=[Table.INDEX_COL, "f"])
+    _assert_page(source, 3, 6, columns=["f"], sort="i", descending=True)
+
+
+@pytest.mark.parametrize("sort", [None, "f"])
+def test_page_past_the_end_is_empty(source, sort):
+    page, num_rows = serialization.read_table_page(source, _ROWS + 5, 10, ["i", "s"], sort)
+    assert num_rows == _ROWS
+    assert len(page.df) == 0
+    assert list(page.df.columns) == ["i", "s", Table.INDEX_COL]
+
+
+def test_page_of_memory_mapped_file(source, tmp_path):
+    path = tmp_path / "table.arrow"
+    path.write_bytes(source)
+    _assert_page(path, 5, 6, columns=["i", "f"], sort="s")
+
+
+def test_unknown_column_is_rejected(source):
+    with pytest.raises(KeyError):
+        serialization.read_table_page(source, 0, 5, columns=["missing"])
+    with pytest.raises(KeyError):
+        serialization.read_table_page(source, 0, 5, sort="missing")
+
+
+def test_pickled_table_is_paged_like_a_table_file():
+    """Tables persisted as pickle are loaded fully, and give the same pages."""
+    pickled = serialization.dumps(Data(payload=_table()))
+    assert not serialization.is_table_file(pickled)
+    _assert_page(pickled, 2, 5, columns=["s", "f"], sort="f", descending=True)
+    _assert_page(pickled, 16, 5)
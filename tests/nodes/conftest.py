@@ -1,5 +1,6 @@
 import atexit
 import importlib
+import os
 import shutil
 import sys
 import tempfile
@@ -15,6 +16,10 @@ if str(_PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(_PROJECT_ROOT))
 
 
+# Fully verify tables and data built by the trusted constructors in tests
+os.environ.setdefault("VERIFY_TRUSTED_DATA", "true")
+
+
 # --- Create lightweight fake modules to avoid Docker/minio/redis/db imports at test-import time ---
 _TEST_FILE_ROOT = tempfile.mkdtemp(prefix="nodepy_test_files_", dir=str(_PROJECT_ROOT))
 
@@ -120,6 +125,40 @@ def _install_fake_modules() -> None:
         def set(self, *args, **kwargs):
             return None
 
+        @staticmethod
+        def attach_lineage(node_type, params, inputs, outputs, deterministic):
+            return outputs
+
+        @staticmethod
+        def get_cache_key(node_type, params, input_lineages):
+            return ""
+
+        @staticmethod
+        def lineage_of(cache_key, port):
+            return ""
+
+        def prefetch(self, cache_keys):
+            return None
+
+        def discard_prefetched(self):
+            return None
+
+        def get_plan(self, topology_hash):
+            return None
+
+        def set_plan(self, topology_hash, plan):
+            return None
+
+        @staticmethod
+        def get_hint_key(node_type, params, input_schemas):
+            return ""
+
+        def get_hints(self, hint_keys):
+            return [None] * len(hint_keys)
+
+        def set_hints(self, hints):
+            return None
+
     cm_mod.CacheManager = _FakeCacheManager  # type: ignore[attr-defined]
     sys.modules["server.lib.CacheManager"] = cm_mod
 
@@ -131,7 +170,19 @@ def _install_fake_modules() -> None:
         utils_mod: Any = types.ModuleType("server.lib.utils")
 
         def _noop_safe_hash(obj):
-            return ""
+            # equal objects must hash equal and different ones differently, the interpreter merges nodes by it
+            import hashlib
+
+            def _serialize(o):
+                if isinstance(o, dict):
+                    return "{" + ",".join(f"{_serialize(k)}:{_serialize(v)}" for k, v in sorted(o.items(), key=lambda kv: str(kv[0]))) + "}"
+                if isinstance(o, (list, tuple)):
+                    return "[" + ",".join(_serialize(item) for item in o) + "]"
+                if callable(getattr(o, "fast_hash", None)):
+                    return str(o.fast_hash())
+                return repr(o)
+
+            return hashlib.sha256(_serialize(obj).encode()).hexdigest()
 
         def _noop_time_check(seconds, callback):
             def _decorator(f):
@@ -147,6 +198,12 @@ def _install_fake_modules() -> None:
 _install_fake_modules()
 
 
+# like the server processes at startup, share columns between tables copy-on-write
+from server.models.data import enable_copy_on_write  # noqa: E402
+
+enable_copy_on_write()
+
+
 @pytest.fixture(scope="session")
 def test_file_root() -> Generator[str, None, None]:
     """Return the temp directory shared with fake managers for tests that need it."""
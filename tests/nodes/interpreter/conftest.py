@@ -0,0 +1,21 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+@pytest.fixture(scope="session")
+def real_cache_manager_module():
+    """The real `server.lib.CacheManager` module, loaded aside the fake one injected by the parent conftest.
+
+    Redis is never connected unless a test calls a method that talks to it.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "server.lib.real_cache_manager", _PROJECT_ROOT / "server" / "lib" / "CacheManager.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
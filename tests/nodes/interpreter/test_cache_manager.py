@@ -0,0 +1,259 @@
+from types import SimpleNamespace
+
+import pytest
+
+from server.lib import serialization
+from server.models.data import Data
+
+_NODE_TYPE = "NumberBinOpNode"
+
+
+@pytest.fixture
+def cache_module(real_cache_manager_module, monkeypatch):
+    """The real CacheManager module, with an empty in-process tier and statistics which are never due to flush."""
+    module = real_cache_manager_module
+    monkeypatch.setattr(module, "_local_cache", module.LocalCache(1024 * 1024))
+    monkeypatch.setattr(module, "_stats", module.CacheStats(flush_interval=3600))
+    return module
+
+
+class _Pipeline:
+    """Records the commands of a pipeline, its execute() returns the next canned reply of the client."""
+
+    def __init__(self, client: "_RedisClient") -> None:
+        self.client = client
+        self.commands: list[tuple] = []
+
+    def __getattr__(self, name: str):
+        def command(*args):
+            self.commands.append((name, *args))
+            return self
+        return command
+
+    def execute(self):
+        self.client.executed.append(self.commands)
+        return self.client.replies.pop(0)
+
+
+class _RedisClient:
+    def __init__(self, *replies) -> None:
+        self.replies = list(replies)
+        self.executed: list[list[tuple]] = [] # commands of each executed pipeline
+        self.stored: dict[str, tuple[bytes, int]] = {} # key -> (value, ttl) set outside pipelines
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    def set(self, key: str, value: bytes, ex: int) -> None:
+        self.stored[key] = (value, ex)
+
+
+def _manager(cache_module, redis_client: _RedisClient):
+    manager = cache_module.CacheManager()
+    manager.redis_client = redis_client
+    return manager
+
+
+def _key(manager, value: int) -> str:
+    return manager._get_cache_key(_NODE_TYPE, {"value": value}, {})
+
+
+def _cached(result: int, running_time: float = 5.0) -> bytes:
+    return serialization.dumps(({"result": Data(payload=result)}, running_time, None))
+
+
+def _get(manager, value: int):
+    return manager.get(_NODE_TYPE, {"value": value}, {})
+
+
+def _counts(cache_module) -> dict[str, float]:
+    return cache_module._stats._counts.get(_NODE_TYPE, {})
+
+
+# --- in-process tier ---
+
+
+def test_local_cache_evicts_least_recently_used(cache_module):
+    cache = cache_module.LocalCache(max_bytes=30)
+    cache.put("a", "A", size=10, ttl=60)
+    cache.put("b", "B", size=10, ttl=60)
+    cache.put("c", "C", size=10, ttl=60)
+    assert cache.get("a") == "A" # a is now the most recently used
+    cache.put("d", "D", size=10, ttl=60)
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+
+
+def test_local_cache_is_bounded_by_bytes(cache_module):
+    cache = cache_module.LocalCache(max_bytes=30)
+    cache.put("a", "A", size=10, ttl=60)
+    cache.put("b", "B", size=10, ttl=60)
+    cache.put("c", "C", size=25, ttl=60)
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == "C"
+    assert cache._size == 25
+    # replacing an entry counts its size once
+    cache.put("c", "C2", size=20, ttl=60)
+    assert cache._size == 20
+
+
+def test_local_cache_expires_entries(cache_module, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    cache = cache_module.LocalCache(max_bytes=30)
+    cache.put("a", "A", size=10, ttl=60)
+    clock[0] = 160.0
+    assert cache.get("a") == "A"
+    clock[0] = 160.5
+    assert cache.get("a") is None
+    assert cache._size == 0
+
+
+def test_local_cache_oversize_put_replaces_the_old_value(cache_module):
+    cache = cache_module.LocalCache(max_bytes=30)
+    cache.put("a", "old", size=10, ttl=60)
+    cache.put("a", "new", size=31, ttl=60)
+    assert cache.get("a") is None
+    assert cache._size == 0
+
+
+# --- admission and TTL policy ---
+
+
+@pytest.mark.parametrize("running_time, size, expected", [
+    (0.5, 0, None), # cheaper than a round trip
+    (5.0, 100 * 1024 * 1024, None), # cheaper than fetching 100 MB
+    (5.0, 0, "CACHE_TTL_SECONDS"),
+    (1000.0, 100 * 1024 * 1024, "CACHE_TTL_SECONDS"),
+    ("CACHE_COSTLY_RUNNING_TIME_MS", 0, "CACHE_COSTLY_TTL_SECONDS"),
+    (60 * 1000.0, 0, "CACHE_COSTLY_TTL_SECONDS"),
+])
+def test_ttl_policy(cache_module, running_time, size, expected):
+    if isinstance(running_time, str):
+        running_time = getattr(cache_module, running_time)
+    if isinstance(expected, str):
+        expected = getattr(cache_module, expected)
+    assert cache_module.CacheManager._get_ttl(running_time, size) == expected
+
+
+def test_rejected_result_is_kept_in_process_only(cache_module):
+    redis_client = _RedisClient()
+    manager = _manager(cache_module, redis_client)
+    manager.set(_NODE_TYPE, {"value": 1}, {}, {"result": Data(payload=1)}, running_time=0.0)
+    assert redis_client.stored == {}
+    assert cache_module._local_cache.get(_key(manager, 1)) is not None
+    assert _counts(cache_module) == {"rejected": 1}
+
+
+def test_admitted_result_is_stored_with_its_ttl(cache_module):
+    redis_client = _RedisClient()
+    manager = _manager(cache_module, redis_client)
+    manager.set(_NODE_TYPE, {"value": 1}, {}, {"result": Data(payload=1)}, running_time=100.0)
+    assert redis_client.stored[_key(manager, 1)][1] == cache_module.CACHE_TTL_SECONDS
+    assert cache_module._local_cache.get(_key(manager, 1)) is not None
+    assert _counts(cache_module) == {"admitted": 1, "costly": 0}
+
+
+# --- lookups ---
+
+
+def test_get_hit_is_kept_in_process(cache_module):
+    redis_client = _RedisClient([_cached(3), 100])
+    manager = _manager(cache_module, redis_client)
+    outputs, running_time, extra = _get(manager, 1)
+    assert outputs["result"].payload == 3 and running_time == 5.0 and extra is None
+    assert redis_client.executed == [[("get", _key(manager, 1)), ("ttl", _key(manager, 1))]]
+    # the second lookup needs no round trip
+    assert _get(manager, 1)[0]["result"].payload == 3
+    assert len(redis_client.executed) == 1
+    assert _counts(cache_module) == {"hits": 2, "l1_hits": 1, "bytes_served": len(_cached(3)), "time_saved_ms": 10.0}
+
+
+def test_get_miss(cache_module):
+    manager = _manager(cache_module, _RedisClient([None, -2]))
+    assert _get(manager, 1) is None
+    assert _counts(cache_module) == {"misses": 1}
+
+
+def test_get_corrupt_value_is_a_miss(cache_module):
+    manager = _manager(cache_module, _RedisClient([b"corrupt", 100]))
+    assert _get(manager, 1) is None
+    assert _counts(cache_module) == {"misses": 1}
+    assert cache_module._local_cache.get(_key(manager, 1)) is None
+
+
+# --- statistics ---
+
+
+def test_stats_are_flushed_in_one_pipeline(cache_module):
+    stats = cache_module.CacheStats(flush_interval=3600)
+    assert stats.add("A", hits=1, time_saved_ms=2.5) is False
+    stats.add("A", hits=2, time_saved_ms=1.0)
+    stats.add("B", misses=1)
+    redis_client = _RedisClient([[]])
+    stats.flush(redis_client)
+    assert redis_client.executed == [[
+        ("hincrby", "cache_stat:A", "hits", 3),
+        ("hincrbyfloat", "cache_stat:A", "time_saved_ms", 3.5),
+        ("hincrby", "cache_stat:B", "misses", 1),
+    ]]
+    # counts are reset, nothing is sent until new counts are added
+    stats.flush(redis_client)
+    assert len(redis_client.executed) == 1
+
+
+def test_stats_are_flushed_once_the_interval_passed(cache_module, monkeypatch):
+    monkeypatch.setattr(cache_module, "_stats", cache_module.CacheStats(flush_interval=0))
+    manager = _manager(cache_module, _RedisClient([None, -2], [[]]))
+    assert _get(manager, 1) is None
+    assert manager.redis_client.executed[-1] == [("hincrby", f"cache_stat:{_NODE_TYPE}", "misses", 1)]
+    assert _counts(cache_module) == {}
+
+
+# --- prefetch ---
+
+
+def test_prefetch_fetches_all_keys_in_one_round_trip(cache_module):
+    manager = _manager(cache_module, _RedisClient())
+    keys = [_key(manager, value) for value in (1, 2, 3)]
+    # the hit has no expiry, so it is not put in the in-process tier and is served from the prefetched result
+    manager.redis_client.replies.append([[_cached(1), None, b"corrupt"], -1, -2, 100])
+    manager.prefetch([*keys, keys[0]])
+    assert manager.redis_client.executed == [[("mget", keys), *[("ttl", key) for key in keys]]]
+
+    assert _get(manager, 1)[0]["result"].payload == 1
+    # a miss, and a value which can not be decoded
+    assert _get(manager, 2) is None
+    assert _get(manager, 3) is None
+    assert len(manager.redis_client.executed) == 1
+    assert _counts(cache_module) == {"hits": 1, "bytes_served": len(_cached(1)), "time_saved_ms": 5.0, "misses": 2}
+    assert manager._prefetched == {} and manager._prefetched_misses == set()
+
+
+def test_prefetched_hit_is_kept_in_process(cache_module):
+    manager = _manager(cache_module, _RedisClient([[_cached(1)], 100]))
+    manager.prefetch([_key(manager, 1)])
+    manager._prefetched[_key(manager, 1)].result() # wait for the decoding
+    assert cache_module._local_cache.get(_key(manager, 1)) is not None
+    assert _get(manager, 1)[0]["result"].payload == 1
+    assert _counts(cache_module) == {"hits": 1, "l1_hits": 1, "time_saved_ms": 5.0}
+    assert manager._prefetched == {}
+
+
+def test_prefetch_skips_keys_in_process(cache_module):
+    manager = _manager(cache_module, _RedisClient([[None], -2]))
+    cache_module._local_cache.put(_key(manager, 1), ({"result": Data(payload=1)}, 5.0, None), size=64, ttl=60)
+    manager.prefetch([_key(manager, 1), _key(manager, 2)])
+    assert manager.redis_client.executed == [[("mget", [_key(manager, 2)]), ("ttl", _key(manager, 2))]]
+    manager.prefetch([_key(manager, 1)])
+    assert len(manager.redis_client.executed) == 1
+
+
+def test_discarded_prefetch_is_fetched_again(cache_module):
+    manager = _manager(cache_module, _RedisClient([[_cached(1), None], 100, -2]))
+    manager.prefetch([_key(manager, 1), _key(manager, 2)])
+    manager.discard_prefetched()
+    assert manager._prefetched == {} and manager._prefetched_misses == set()
+    manager.redis_client.replies.append([_cached(2), 100])
+    assert _get(manager, 2)[0]["result"].payload == 2
+    assert len(manager.redis_client.executed) == 2
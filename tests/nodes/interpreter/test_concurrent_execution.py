@@ -0,0 +1,182 @@
+import threading
+import time
+
+from server.interpreter.nodes.compute.prim import NumberBinOpNode
+from server.interpreter.nodes.input.const import ConstNode
+from tests.nodes.utils import make_topology, run_workflow
+
+
+def _wide_topology():
+    """Four independent branches: k{i} -> add{i} (k{i} + k{i}) -> mul{i} (add{i} * k{i})."""
+    nodes = []
+    edges = []
+    for i in range(4):
+        nodes += [
+            (f"k{i}", "ConstNode", {"value": i + 1, "data_type": "int"}),
+            (f"add{i}", "NumberBinOpNode", {"op": "ADD"}),
+            (f"mul{i}", "NumberBinOpNode", {"op": "MUL"}),
+        ]
+        edges += [
+            (f"k{i}", "const", f"add{i}", "x"),
+            (f"k{i}", "const", f"add{i}", "y"),
+            (f"add{i}", "result", f"mul{i}", "x"),
+            (f"k{i}", "const", f"mul{i}", "y"),
+        ]
+    return make_topology(nodes, edges)
+
+
+def _slow_process(monkeypatch, cls, delay: float, record: list | None = None):
+    """Slow down process() of a node class, recording (node id, thread name) of each call."""
+    original = cls.process
+
+    def process(self, input):
+        if record is not None:
+            record.append((self.id, threading.current_thread().name))
+        time.sleep(delay)
+        return original(self, input)
+
+    monkeypatch.setattr(cls, "process", process)
+
+
+def test_concurrent_results_match_sequential():
+    """Concurrent execution reports the same results as sequential execution."""
+    sequential = run_workflow(_wide_topology(), max_workers=1)
+    concurrent = run_workflow(_wide_topology(), max_workers=4)
+    assert not concurrent.errors
+    assert set(concurrent.outputs) == set(sequential.outputs)
+    for node_id, outputs in sequential.outputs.items():
+        assert {port: data.payload for port, data in concurrent.outputs[node_id].items()} == {
+            port: data.payload for port, data in outputs.items()
+        }
+    assert concurrent.outputs["mul3"]["result"].payload == 32
+
+
+def test_concurrent_reports_nodes_after_their_inputs(monkeypatch):
+    """Every node starts and finishes only after all its inputs are finished."""
+    _slow_process(monkeypatch, NumberBinOpNode, 0.01)
+    topology = _wide_topology()
+    run = run_workflow(topology, max_workers=4)
+    for edge in topology.edges:
+        assert run.finished.index(edge.src) < run.started.index(edge.tar)
+        assert run.finished.index(edge.src) < run.finished.index(edge.tar)
+    assert sorted(run.finished) == sorted(node.id for node in topology.nodes)
+
+
+def test_concurrent_runs_independent_nodes_in_workers(monkeypatch):
+    """Thread safe nodes run in worker threads, while callbacks stay in the main thread."""
+    record: list = []
+    _slow_process(monkeypatch, NumberBinOpNode, 0.05, record)
+    run = run_workflow(_wide_topology(), max_workers=4)
+    assert not run.errors
+    assert all(thread_name.startswith("nodepy-exec") for _, thread_name in record)
+    assert len({thread_name for _, thread_name in record}) > 1
+    assert run.callback_threads == {threading.main_thread().name}
+
+
+def test_concurrent_error_propagates_to_descendants():
+    """A failing node is reported, its descendants are unreached, other branches still run."""
+    topology = make_topology(
+        [
+            ("one", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("zero", "ConstNode", {"value": 0, "data_type": "int"}),
+            ("div", "NumberBinOpNode", {"op": "DIV"}),
+            ("after_div", "NumberBinOpNode", {"op": "ADD"}),
+            ("other", "NumberBinOpNode", {"op": "ADD"}),
+        ],
+        [
+            ("one", "const", "div", "x"),
+            ("zero", "const", "div", "y"),
+            ("div", "result", "after_div", "x"),
+            ("div", "result", "after_div", "y"),
+            ("one", "const", "other", "x"),
+            ("one", "const", "other", "y"),
+        ],
+    )
+    run = run_workflow(topology, max_workers=4)
+    assert set(run.errors) == {"div"}
+    assert "after_div" not in run.started
+    assert "after_div" not in run.finished
+    assert run.outputs["other"]["result"].payload == 2
+    unreached = {topology.nodes[index].id for index in run.interpreter.get_unreached_nodes()}
+    assert unreached == {"div", "after_div"}
+
+
+def test_concurrent_stop_waits_for_running_nodes(monkeypatch):
+    """After a stop, no new node is started and no worker is still running when execute returns."""
+    active = 0
+    lock = threading.Lock()
+    original = ConstNode.process
+
+    def process(self, input):
+        nonlocal active
+        with lock:
+            active += 1
+        time.sleep(0.05)
+        try:
+            return original(self, input)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(ConstNode, "process", process)
+    run = run_workflow(_wide_topology(), max_workers=2, stop_after="k0")
+    assert active == 0
+    assert run.finished[-1] == "k0"
+    assert not any(node_id.startswith(("add", "mul")) for node_id in run.started)
+    time.sleep(0.1)
+    assert active == 0 # cancelled nodes are never started later
+
+
+class _FakeSession:
+    def __init__(self, sessions: list):
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        sessions.append(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_session_bound_nodes_use_worker_sessions(monkeypatch):
+    """SESSION_BOUND nodes run in workers on managers of their own thread's session, committed per node."""
+    sessions: list[_FakeSession] = []
+    contexts: dict[str, tuple[str, object]] = {}
+    original = ConstNode.process
+
+    def process(self, input):
+        contexts[self.id] = (threading.current_thread().name, self.context.file_manager)
+        return original(self, input)
+
+    monkeypatch.setattr(ConstNode, "SESSION_BOUND", True)
+    monkeypatch.setattr(ConstNode, "process", process)
+    run = run_workflow(_wide_topology(), max_workers=4, worker_session_factory=lambda: _FakeSession(sessions))
+    assert not run.errors
+    main_file_manager = run.interpreter._context.file_manager
+    assert all(thread_name.startswith("nodepy-exec") for thread_name, _ in contexts.values())
+    assert all(file_manager is not main_file_manager for _, file_manager in contexts.values())
+    assert 1 <= len(sessions) <= 4
+    assert sum(session.commits for session in sessions) == 4
+    assert all(session.closed for session in sessions)
+
+
+def test_session_bound_nodes_stay_in_main_thread_without_factory(monkeypatch):
+    """Without a worker session factory, SESSION_BOUND nodes run in the main thread on the main context."""
+    threads: list[str] = []
+    original = ConstNode.process
+
+    def process(self, input):
+        threads.append(threading.current_thread().name)
+        return original(self, input)
+
+    monkeypatch.setattr(ConstNode, "SESSION_BOUND", True)
+    monkeypatch.setattr(ConstNode, "process", process)
+    run = run_workflow(_wide_topology(), max_workers=4)
+    assert not run.errors
+    assert threads == [threading.main_thread().name] * 4
@@ -0,0 +1,112 @@
+import pytest
+
+import server.interpreter.interpreter as interpreter_module
+from server.interpreter.data_cache import DataCache
+from server.models.data import Data
+from tests.nodes.utils import make_topology, run_workflow
+
+
+def test_entries_without_consumers_are_not_stored():
+    """Outputs nobody consumes are skipped, they are persisted by the callafter already."""
+    cache = DataCache({("a", "x"): 1})
+    cache.store("a", {"x": Data(payload=1), "y": Data(payload=2)})
+    assert ("a", "x") in cache
+    assert ("a", "y") not in cache
+
+
+def test_entry_is_released_after_its_last_consumer():
+    """An entry stays until every consumer has collected it."""
+    cache = DataCache({("a", "x"): 2})
+    cache.store("a", {"x": Data(payload=1)})
+    cache.consume([("a", "x")])
+    assert cache[("a", "x")].payload == 1
+    cache.consume([("a", "x")])
+    assert ("a", "x") not in cache
+
+
+def test_peak_size_tracks_live_entries():
+    """The peak size covers entries alive at the same time, not all entries ever stored."""
+    cache = DataCache({("a", "x"): 1, ("b", "x"): 1})
+    cache.store("a", {"x": Data(payload="a" * 1000)})
+    size_a = cache.peak_size
+    cache.consume([("a", "x")])
+    cache.store("b", {"x": Data(payload="b" * 1000)})
+    assert size_a > 0
+    assert cache.peak_size == size_a
+
+
+def test_storing_twice_raises():
+    """Each output is stored once."""
+    cache = DataCache({("a", "x"): 1})
+    cache.store("a", {"x": Data(payload=1)})
+    with pytest.raises(RuntimeError):
+        cache.store("a", {"x": Data(payload=1)})
+
+
+class _RecordingDataCache(DataCache):
+    """Records the keys released from the cache during execution, in order."""
+
+    instances: list["_RecordingDataCache"] = []
+
+    def __init__(self, consumer_counts):
+        super().__init__(consumer_counts)
+        self.released: list[tuple[str, str]] = []
+        _RecordingDataCache.instances.append(self)
+
+    def consume(self, keys):
+        alive = [key for key in keys if key in self]
+        super().consume(keys)
+        self.released += [key for key in alive if key not in self]
+
+
+@pytest.fixture
+def recording_cache(monkeypatch):
+    _RecordingDataCache.instances = []
+    monkeypatch.setattr(interpreter_module, "DataCache", _RecordingDataCache)
+    return _RecordingDataCache.instances
+
+
+def test_interpreter_releases_inputs_after_last_consumer(recording_cache):
+    """a feeds b and c, b feeds c: a is released once c collects it, after b, and nothing is left at the end."""
+    topology = make_topology(
+        [
+            ("a", "ConstNode", {"value": 2, "data_type": "int"}),
+            ("b", "NumberBinOpNode", {"op": "MUL"}),
+            ("c", "NumberBinOpNode", {"op": "ADD"}),
+        ],
+        [
+            ("a", "const", "b", "x"),
+            ("a", "const", "b", "y"),
+            ("a", "const", "c", "x"),
+            ("b", "result", "c", "y"),
+        ],
+    )
+    run = run_workflow(topology)
+    assert run.outputs["c"]["result"].payload == 6
+    (cache,) = recording_cache
+    assert cache.released == [("a", "const"), ("b", "result")]
+    assert ("c", "result") not in cache
+    assert cache.peak_size > 0
+
+
+def test_interpreter_releases_inputs_of_unreached_nodes(recording_cache):
+    """When a node fails, inputs its descendants would have collected are released too."""
+    topology = make_topology(
+        [
+            ("one", "ConstNode", {"value": 1.0, "data_type": "float"}),
+            ("zero", "ConstNode", {"value": 0.0, "data_type": "float"}),
+            ("div", "NumberBinOpNode", {"op": "DIV"}),
+            ("after", "NumberBinOpNode", {"op": "ADD"}),
+        ],
+        [
+            ("one", "const", "div", "x"),
+            ("zero", "const", "div", "y"),
+            ("div", "result", "after", "x"),
+            ("one", "const", "after", "y"),
+        ],
+    )
+    run = run_workflow(topology)
+    assert set(run.errors) == {"div"}
+    (cache,) = recording_cache
+    assert ("one", "const") in cache.released
+    assert ("one", "const") not in cache
@@ -0,0 +1,136 @@
+import pytest
+
+from server.interpreter.nodes.compute.prim import NumberBinOpNode
+from server.models.exception import NodeExecutionError
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow
+
+
+@pytest.fixture
+def processed(monkeypatch) -> list[str]:
+    """Ids of the NumberBinOpNode nodes whose process() ran, in order."""
+    calls: list[str] = []
+    original = NumberBinOpNode.process
+
+    def process(self, input):
+        calls.append(self.id)
+        return original(self, input)
+
+    monkeypatch.setattr(NumberBinOpNode, "process", process)
+    return calls
+
+
+def _twin_chains(op: str = "ADD", b_value: int = 2):
+    """a, b -> add1 -> neg1 and a, b -> add2 -> neg2, where add2 and neg2 repeat add1 and neg1."""
+    return make_topology(
+        [
+            ("a", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("b", "ConstNode", {"value": b_value, "data_type": "int"}),
+            ("add1", "NumberBinOpNode", {"op": op}),
+            ("add2", "NumberBinOpNode", {"op": op}),
+            ("neg1", "NumberUnaryOpNode", {"op": "NEG"}),
+            ("neg2", "NumberUnaryOpNode", {"op": "NEG"}),
+        ],
+        [
+            ("a", "const", "add1", "x"),
+            ("b", "const", "add1", "y"),
+            ("a", "const", "add2", "x"),
+            ("b", "const", "add2", "y"),
+            ("add1", "result", "neg1", "x"),
+            ("add2", "result", "neg2", "x"),
+        ],
+    )
+
+
+def test_duplicates_execute_once_and_are_reported_for_every_copy(processed):
+    run = run_workflow(_twin_chains())
+    assert not run.errors
+    assert processed == ["add1"]
+    assert set(run.started) == set(run.finished) == {"a", "b", "add1", "add2", "neg1", "neg2"}
+    assert run.outputs["add1"]["result"].payload == run.outputs["add2"]["result"].payload == 3
+    assert run.outputs["neg1"]["result"].payload == run.outputs["neg2"]["result"].payload == -3
+    # the copy is reported right after the node it repeats, with its running time
+    assert run.finished.index("add2") == run.finished.index("add1") + 1
+    assert run.running_times["add2"] == run.running_times["add1"]
+
+
+def test_duplicated_chains_are_merged_as_a_whole():
+    """neg2 has other sources than neg1, but they are duplicates, so neg2 is a duplicate too."""
+    interpreter = run_workflow(_twin_chains()).interpreter
+    assert interpreter._duplicate_of == {"add2": "add1", "neg2": "neg1"}
+    assert interpreter._duplicates == {"add1": ["add2"], "neg1": ["neg2"]}
+
+
+def test_nodes_with_other_params_or_sources_are_not_merged(processed):
+    topology = make_topology(
+        [
+            ("a", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("b", "ConstNode", {"value": 2, "data_type": "int"}),
+            ("add", "NumberBinOpNode", {"op": "ADD"}),
+            ("sub", "NumberBinOpNode", {"op": "SUB"}),
+            ("swapped", "NumberBinOpNode", {"op": "SUB"}),
+        ],
+        [
+            ("a", "const", "add", "x"),
+            ("b", "const", "add", "y"),
+            ("a", "const", "sub", "x"),
+            ("b", "const", "sub", "y"),
+            ("b", "const", "swapped", "x"),
+            ("a", "const", "swapped", "y"),
+        ],
+    )
+    run = run_workflow(topology)
+    assert run.interpreter._duplicate_of == {}
+    assert sorted(processed) == ["add", "sub", "swapped"]
+    assert run.outputs["swapped"]["result"].payload == 1
+
+
+def test_failure_is_reported_for_every_copy(processed):
+    """A failed node fails its copies too, each with an error of its own id, and their descendants are not run."""
+    run = run_workflow(_twin_chains(op="DIV", b_value=0))
+    assert processed == ["add1"]
+    assert set(run.errors) == {"add1", "add2"}
+    for node_id in ("add1", "add2"):
+        assert isinstance(run.errors[node_id], NodeExecutionError)
+        assert run.errors[node_id].node_id == node_id
+    assert "neg1" not in run.started and "neg2" not in run.started
+
+
+def test_non_repeatable_nodes_are_never_merged():
+    """Random tables and plots are different each time, so every copy is executed."""
+    topology = make_topology(
+        [
+            ("n", "ConstNode", {"value": 5, "data_type": "int"}),
+            ("lo", "ConstNode", {"value": 0, "data_type": "int"}),
+            ("hi", "ConstNode", {"value": 1000, "data_type": "int"}),
+            ("rand1", "RandomNode", {"col_name": "r", "col_type": "int"}),
+            ("rand2", "RandomNode", {"col_name": "r", "col_type": "int"}),
+            ("tab", "TableNode", {"rows": [{"x": 1, "y": 2}], "col_names": ["x", "y"], "col_types": {"x": ColType.INT, "y": ColType.INT}}),
+            ("plot1", "QuickPlotNode", {"x_col": "x", "y_col": ["y"], "plot_type": ["bar"]}),
+            ("plot2", "QuickPlotNode", {"x_col": "x", "y_col": ["y"], "plot_type": ["bar"]}),
+        ],
+        [
+            *[(src, "const", rand, port) for rand in ("rand1", "rand2") for src, port in (("n", "row_count"), ("lo", "min_value"), ("hi", "max_value"))],
+            ("tab", "table", "plot1", "input"),
+            ("tab", "table", "plot2", "input"),
+        ],
+    )
+    run = run_workflow(topology)
+    assert not run.errors
+    assert run.interpreter._duplicate_of == {}
+    assert run.outputs["plot1"]["plot"].payload.key != run.outputs["plot2"]["plot"].payload.key
+
+
+def test_repeatable_flag_disables_merging(monkeypatch, processed):
+    monkeypatch.setattr(NumberBinOpNode, "REPEATABLE", False)
+    run = run_workflow(_twin_chains())
+    assert "add2" not in run.interpreter._duplicate_of
+    assert processed == ["add1", "add2"]
+
+
+@pytest.mark.parametrize("type_name", [
+    "RandomNode", "InsertRandomColNode", "TableToFileNode", "CustomScriptNode",
+    "QuickPlotNode", "DualAxisPlotNode", "StatisticalPlotNode", "KlinePlotNode", "WordcloudNode",
+])
+def test_nodes_with_side_effects_or_randomness_are_not_repeatable(node_registry, type_name):
+    assert node_registry[type_name].REPEATABLE is False
@@ -0,0 +1,89 @@
+from server.interpreter.execution_plan import ExecutionPlan
+from server.lib import serialization
+from server.lib.CacheManager import CacheManager
+from tests.nodes.utils import make_topology, run_workflow
+
+
+class _PlanCacheManager(CacheManager):
+    """The fake CacheManager with a dict-backed plan cache, counting lookups by topology hash."""
+
+    def __init__(self):
+        super().__init__()
+        self.plans: dict[str, ExecutionPlan] = {}
+        self.hits: list[str] = []
+
+    def get_plan(self, topology_hash):
+        plan = self.plans.get(topology_hash)
+        if plan is not None:
+            self.hits.append(topology_hash)
+        return plan
+
+    def set_plan(self, topology_hash, plan):
+        self.plans[topology_hash] = plan
+
+
+def _topology(op: str = "ADD", extra_edge: bool = False):
+    edges = [("a", "const", "add", "x"), ("b", "const", "add", "y")]
+    if extra_edge:
+        edges.append(("add", "result", "neg", "x"))
+    return make_topology(
+        [
+            ("a", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("b", "ConstNode", {"value": 2, "data_type": "int"}),
+            ("add", "NumberBinOpNode", {"op": op}),
+            ("neg", "NumberUnaryOpNode", {"op": "NEG"}),
+        ],
+        edges,
+    )
+
+
+def _hash(topology) -> str:
+    return ExecutionPlan.topology_hash(topology.nodes, topology.edges)
+
+
+def test_topology_hash_ignores_params_but_not_structure():
+    """Plans are shared by graphs with the same nodes and edges, whatever their params."""
+    assert _hash(_topology("ADD")) == _hash(_topology("SUB"))
+    assert _hash(_topology()) != _hash(_topology(extra_edge=True))
+
+
+def test_compile_orders_nodes_and_indexes_edges():
+    """A plan lists nodes in topological order, with in/out edges, descendants and ancestors."""
+    topology = _topology(extra_edge=True)
+    plan = ExecutionPlan.compile(topology.nodes, topology.edges)
+    assert plan.node_ids.index("add") > max(plan.node_ids.index("a"), plan.node_ids.index("b"))
+    assert plan.node_ids.index("neg") > plan.node_ids.index("add")
+    assert sorted(plan.in_edges_of("add")) == [("a", "const", "x"), ("b", "const", "y")]
+    assert plan.out_edges_of("add") == [("neg", "result", "x")]
+    assert plan.descendants_of("a") == {"add", "neg"}
+    assert plan.ancestors_of("neg") == {"a", "b", "add"}
+    assert plan.has_path("b", "neg") and not plan.has_path("neg", "b")
+
+
+def test_plan_survives_serialization():
+    """Plans are cached in Redis, so they must round trip through the cache serialization."""
+    topology = _topology(extra_edge=True)
+    plan = ExecutionPlan.compile(topology.nodes, topology.edges)
+    assert serialization.loads(serialization.dumps(plan)) == plan
+
+
+def test_interpreter_reuses_plan_by_topology_hash(monkeypatch):
+    """The second run of the same graph, even with other params, reuses the plan instead of compiling it."""
+    compiled: list[str] = []
+    original = ExecutionPlan.compile.__func__
+
+    def compile(cls, nodes, edges):
+        compiled.append(ExecutionPlan.topology_hash(nodes, edges))
+        return original(cls, nodes, edges)
+
+    monkeypatch.setattr(ExecutionPlan, "compile", classmethod(compile))
+    cache_manager = _PlanCacheManager()
+    first = run_workflow(_topology("ADD"), cache_manager=cache_manager)
+    second = run_workflow(_topology("SUB"), cache_manager=cache_manager)
+    assert compiled == [_hash(_topology())]
+    assert cache_manager.hits == [_hash(_topology())]
+    assert first.outputs["add"]["result"].payload == 3
+    assert second.outputs["add"]["result"].payload == -1
+
+    run_workflow(_topology(extra_edge=True), cache_manager=cache_manager)
+    assert compiled == [_hash(_topology()), _hash(_topology(extra_edge=True))]
@@ -0,0 +1,97 @@
+from server.models.data import Data, Table
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow, table_from_dict
+
+
+def _chain(a_value: int = 1, b_value: int = 2, op: str = "ADD", extra_edge: bool = False):
+    """a, b -> add (a op b) -> double (add + add); c is an independent source."""
+    edges = [
+        ("a", "const", "add", "x"),
+        ("b", "const", "add", "y"),
+        ("add", "result", "double", "x"),
+        ("add", "result", "double", "y"),
+    ]
+    if extra_edge:
+        edges[1] = ("c", "const", "add", "y")
+    return make_topology(
+        [
+            ("a", "ConstNode", {"value": a_value, "data_type": "int"}),
+            ("b", "ConstNode", {"value": b_value, "data_type": "int"}),
+            ("c", "ConstNode", {"value": 3, "data_type": "int"}),
+            ("add", "NumberBinOpNode", {"op": op}),
+            ("double", "NumberBinOpNode", {"op": "ADD"}),
+        ],
+        edges,
+    )
+
+
+def test_unchanged_topology_has_no_dirty_nodes():
+    """Comparing a topology with an equal one gives no dirty nodes."""
+    assert _chain().get_dirty_node_ids(_chain()) == set()
+
+
+def test_params_change_dirties_node_and_descendants():
+    """A node with changed params and its descendants are dirty, its siblings and ancestors are not."""
+    assert _chain(a_value=5).get_dirty_node_ids(_chain()) == {"a", "add", "double"}
+    assert _chain(op="SUB").get_dirty_node_ids(_chain()) == {"add", "double"}
+
+
+def test_edge_change_dirties_target_and_descendants():
+    """Rewiring an input dirties the target and its descendants, not the new or old source."""
+    assert _chain(extra_edge=True).get_dirty_node_ids(_chain()) == {"add", "double"}
+
+
+def test_new_node_is_dirty():
+    """A node which did not exist in the old topology is dirty."""
+    old = make_topology([("a", "ConstNode", {"value": 1, "data_type": "int"})], [])
+    assert _chain().get_dirty_node_ids(old) == {"b", "c", "add", "double"}
+
+
+def test_reused_nodes_are_not_executed_and_loaded_lazily():
+    """Reused nodes are skipped, and only outputs consumed by executed nodes are loaded."""
+    loaded: list[str] = []
+
+    def loader(node_id: str) -> dict[str, Data]:
+        loaded.append(node_id)
+        return {"const" if node_id in ("a", "b", "c") else "result": Data(payload=10)}
+
+    dirty = _chain(op="SUB").get_dirty_node_ids(_chain())
+    topology = _chain(op="SUB")
+    run = run_workflow(topology, reuse=({"a", "b", "c", "add", "double"} - dirty, loader))
+    assert run.interpreter.get_reused_node_ids() == {"a", "b", "c"}
+    assert run.started == ["add", "double"]
+    assert sorted(loaded) == ["a", "b"]
+    assert run.outputs["add"]["result"].payload == 0
+    assert run.outputs["double"]["result"].payload == 0
+
+
+def test_reused_set_shrinks_to_nodes_with_reused_ancestors():
+    """A node whose upstream is executed again can not be reused, even if it was asked to be."""
+    run = run_workflow(_chain(), reuse=({"b", "c", "double"}, lambda node_id: {"const": Data(payload=0)}))
+    assert run.interpreter.get_reused_node_ids() == {"b", "c"}
+    assert "double" in run.started
+    assert run.outputs["double"]["result"].payload == 2 * (1 + 0)
+
+
+def test_preview_cuts_reused_tables_to_preview_rows():
+    """In a preview, a reused table is an input like a source output, its consumers see at most preview_rows rows."""
+    topology = make_topology(
+        [
+            ("src", "TableNode", {"rows": [], "col_names": ["a"], "col_types": {"a": ColType.INT}}),
+            ("one", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("inc", "ColWithNumberBinOpNode", {"op": "ADD", "col": "a", "result_col": "b"}),
+        ],
+        [("src", "table", "inc", "table"), ("one", "const", "inc", "num")],
+    )
+
+    def loader(node_id: str) -> dict[str, Data]:
+        return {"table": table_from_dict({"a": list(range(50))})}
+
+    run = run_workflow(topology, reuse=({"src"}, loader), preview_rows=10)
+    assert not run.errors
+    table = run.outputs["inc"]["table"].payload
+    assert isinstance(table, Table)
+    assert table.df["b"].tolist() == list(range(1, 11))
+
+    full = run_workflow(topology, reuse=({"src"}, loader))
+    assert len(full.outputs["inc"]["table"].payload.df) == 50
@@ -0,0 +1,69 @@
+from server.models.data import Data
+from tests.nodes.utils import table_from_dict
+
+
+def test_cache_key_is_stable_for_equal_params_and_lineages(real_cache_manager_module):
+    """Equal params and input lineages give the same key, whatever the dict order."""
+    manager = real_cache_manager_module.CacheManager()
+    key = manager.get_cache_key("NodeA", {"p": 1, "q": "x"}, {"a": "h1", "b": "h2"})
+    assert manager.get_cache_key("NodeA", {"q": "x", "p": 1}, {"b": "h2", "a": "h1"}) == key
+    assert real_cache_manager_module.CacheManager().get_cache_key("NodeA", {"p": 1, "q": "x"}, {"a": "h1", "b": "h2"}) == key
+
+
+def test_cache_key_changes_with_type_params_lineages_and_namespace(real_cache_manager_module):
+    """Any part of the identity of a result changes its key."""
+    manager = real_cache_manager_module.CacheManager()
+    key = manager.get_cache_key("NodeA", {"p": 1}, {"a": "h1"})
+    assert manager.get_cache_key("NodeB", {"p": 1}, {"a": "h1"}) != key
+    assert manager.get_cache_key("NodeA", {"p": 2}, {"a": "h1"}) != key
+    assert manager.get_cache_key("NodeA", {"p": 1}, {"a": "h2"}) != key
+    assert manager.get_cache_key("NodeA", {"p": 1}, {"b": "h1"}) != key
+    preview = real_cache_manager_module.CacheManager(namespace="preview")
+    assert preview.get_cache_key("NodeA", {"p": 1}, {"a": "h1"}) != key
+
+
+def test_lineage_of_differs_per_port(real_cache_manager_module):
+    """Outputs of the same node on different ports have different lineages."""
+    lineage_of = real_cache_manager_module.CacheManager.lineage_of
+    assert lineage_of("key", "a") == lineage_of("key", "a")
+    assert lineage_of("key", "a") != lineage_of("key", "b")
+
+
+def test_deterministic_outputs_get_lineage_from_equal_inputs(real_cache_manager_module):
+    """Equal input contents give equal output lineages, derived from the key without hashing the outputs."""
+    manager = real_cache_manager_module.CacheManager()
+    first = manager.attach_lineage(
+        "NodeA", {"p": 1}, {"table": table_from_dict({"a": [1, 2]})}, {"out": Data(payload=1)}, deterministic=True
+    )
+    second = manager.attach_lineage(
+        "NodeA", {"p": 1}, {"table": table_from_dict({"a": [1, 2]})}, {"out": Data(payload=2)}, deterministic=True
+    )
+    other = manager.attach_lineage(
+        "NodeA", {"p": 1}, {"table": table_from_dict({"a": [1, 3]})}, {"out": Data(payload=1)}, deterministic=True
+    )
+    assert first["out"].lineage_hash() == second["out"].lineage_hash()
+    assert first["out"].lineage_hash() != other["out"].lineage_hash()
+    key = manager.get_cache_key("NodeA", {"p": 1}, {"table": table_from_dict({"a": [1, 2]}).lineage_hash()})
+    assert first["out"].lineage_hash() == real_cache_manager_module.CacheManager.lineage_of(key, "out")
+
+
+def test_downstream_keys_follow_upstream_lineage(real_cache_manager_module):
+    """A downstream key only depends on upstream lineages, so a chain gives the same keys for equal sources."""
+    manager = real_cache_manager_module.CacheManager()
+
+    def chain_key(values: list[int]) -> str:
+        source = manager.attach_lineage("Source", {}, {}, {"table": table_from_dict({"a": values})}, deterministic=False)
+        middle = manager.attach_lineage("Middle", {"p": 1}, source, {"table": source["table"]}, deterministic=True)
+        return manager._get_cache_key("Last", {}, middle)
+
+    assert chain_key([1, 2, 3]) == chain_key([1, 2, 3])
+    assert chain_key([1, 2, 3]) != chain_key([3, 2, 1])
+
+
+def test_non_deterministic_outputs_are_identified_by_content(real_cache_manager_module):
+    """Outputs of non-deterministic nodes carry their content hash, and share the payload."""
+    manager = real_cache_manager_module.CacheManager()
+    table = table_from_dict({"a": [1, 2]})
+    outputs = manager.attach_lineage("RandomNode", {}, {}, {"table": table}, deterministic=False)
+    assert outputs["table"].lineage_hash() == table_from_dict({"a": [1, 2]}).lineage_hash()
+    assert outputs["table"].payload is table.payload
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from server.interpreter.interpreter import ProjectInterpreter
+from server.models.data import Data, Table
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow
+
+_COL_TYPES = {"i": ColType.INT, "f": ColType.FLOAT, "s": ColType.STR, "t": ColType.DATETIME}
+
+
+def _source_table() -> Data:
+    """Nullable Int64, float with NaN, str and tz-aware datetime columns, with a non-default index."""
+    df = pd.DataFrame(
+        {
+            "i": pd.array([1, None, 3, 4], dtype="Int64"),
+            "f": [0.5, float("nan"), 2.5, -1.0],
+            "s": ["a", "b", None, "d"],
+            "t": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"]).tz_localize("Asia/Shanghai"),
+            Table.INDEX_COL: [0, 1, 2, 3],
+        },
+        index=[10, 11, 12, 13],
+    )
+    return Data(payload=Table(df=df, col_types={**_COL_TYPES, Table.INDEX_COL: ColType.INT}))
+
+
+def _loop_topology():
+    """src -> ForEachRow(body: insert const column k, then p = i * 3 and q = f + 3) -> end."""
+    return make_topology(
+        [
+            ("src", "TableNode", {"rows": [], "col_names": list(_COL_TYPES), "col_types": _COL_TYPES}),
+            ("three", "ConstNode", {"value": 3, "data_type": "int"}),
+            ("three_f", "ConstNode", {"value": 3.0, "data_type": "float"}),
+            ("begin", "ForEachRowBeginNode", {"pair_id": 1}),
+            ("ins", "InsertConstColNode", {"col_name": "k", "col_type": "int"}),
+            ("mul", "ColWithNumberBinOpNode", {"op": "MUL", "col": "i", "result_col": "p"}),
+            ("add", "ColWithNumberBinOpNode", {"op": "ADD", "col": "f", "result_col": "q"}),
+            ("end", "ForEachRowEndNode", {"pair_id": 1}),
+        ],
+        [
+            ("src", "table", "begin", "table"),
+            ("begin", "row", "ins", "table"),
+            ("three", "const", "ins", "const_value"),
+            ("ins", "table", "mul", "table"),
+            ("three", "const", "mul", "num"),
+            ("mul", "table", "add", "table"),
+            ("three_f", "const", "add", "num"),
+            ("add", "table", "end", "row"),
+        ],
+    )
+
+
+def _run(monkeypatch, batch: bool):
+    batched: list[bool] = []
+    original = ProjectInterpreter._execute_loop_in_batch
+
+    def _execute_loop_in_batch(self, *args, **kwargs):
+        outputs = original(self, *args, **kwargs)
+        batched.append(outputs is not None)
+        return outputs
+
+    monkeypatch.setattr(ProjectInterpreter, "_execute_loop_in_batch", _execute_loop_in_batch)
+    if not batch:
+        monkeypatch.setattr(ProjectInterpreter, "_can_batch_loop", lambda self, begin_node_id: False)
+    run = run_workflow(_loop_topology(), reuse=({"src"}, lambda node_id: {"table": _source_table()}))
+    monkeypatch.undo()
+    assert not run.errors
+    assert batched == ([True] if batch else [])
+    return run
+
+
+def _assert_tables_equal(left: Data, right: Data) -> None:
+    assert isinstance(left.payload, Table) and isinstance(right.payload, Table)
+    assert left.payload.col_types == right.payload.col_types
+    pd.testing.assert_frame_equal(left.payload.df, right.payload.df)
+
+
+def test_batch_loop_gives_the_same_table_as_iterating(monkeypatch):
+    """The end table of a batched ForEachRow loop equals the one built row by row."""
+    batched = _run(monkeypatch, batch=True)
+    iterated = _run(monkeypatch, batch=False)
+    _assert_tables_equal(batched.outputs["end"]["table"], iterated.outputs["end"]["table"])
+    table = batched.outputs["end"]["table"].payload
+    assert table.df["p"].tolist()[0] == 3 and pd.isna(table.df["p"].tolist()[1])
+    assert table.df["k"].tolist() == [3, 3, 3, 3]
+    assert str(table.df["t"].dtype) == "datetime64[ns, Asia/Shanghai]"
+
+
+@pytest.mark.parametrize("node_id", ["begin", "ins", "mul", "add"])
+def test_batch_loop_reports_the_same_last_iteration(monkeypatch, node_id):
+    """Body nodes report the results of the last row, whether the loop is batched or iterated."""
+    batched = _run(monkeypatch, batch=True)
+    iterated = _run(monkeypatch, batch=False)
+    assert set(batched.outputs[node_id]) == set(iterated.outputs[node_id])
+    for port in batched.outputs[node_id]:
+        _assert_tables_equal(batched.outputs[node_id][port], iterated.outputs[node_id][port])
+
+
+def test_loop_with_non_row_wise_body_is_iterated(monkeypatch):
+    """A body node depending on the row which is not row-wise, e.g. a random column, disables batching."""
+    topology = _loop_topology()
+    run = run_workflow(topology)
+    interpreter = run.interpreter
+    assert interpreter._can_batch_loop("begin")
+    monkeypatch.setattr(type(interpreter._node_objects["mul"]), "ROW_WISE", False)
+    assert not interpreter._can_batch_loop("begin")
@@ -0,0 +1,197 @@
+import pickle
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pytest
+
+from server.interpreter import interpreter as interpreter_module
+from server.interpreter import loop_pool
+from server.interpreter.nodes.compute.table import ColWithNumberBinOpNode
+from server.models.data import Data, Table
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow, table_from_dict
+
+_ROWS = 23
+
+
+def _source() -> Data:
+    return table_from_dict({"a": list(range(_ROWS)), "f": [i / 4 for i in range(_ROWS)]})
+
+
+def _iterated(node, inputs: dict[str, Data]) -> list[pd.DataFrame]:
+    """The loop variables of all iterations, as frames."""
+    return [
+        next(iter(loop_vars.values())).payload.df
+        for loop_vars in node.iter_loop(inputs)
+    ]
+
+
+def _iterated_shards(node, shards: list[dict[str, Data]]) -> list[pd.DataFrame]:
+    return [df for shard in shards for df in _iterated(node, shard)]
+
+
+def _assert_same_iterations(left: list[pd.DataFrame], right: list[pd.DataFrame]) -> None:
+    assert len(left) == len(right)
+    for left_df, right_df in zip(left, right):
+        pd.testing.assert_frame_equal(left_df, right_df)
+
+
+def test_for_each_row_shards_are_consecutive_rows(node_ctor):
+    node = node_ctor("ForEachRowBeginNode", id="begin", pair_id=1)
+    inputs = {"table": _source()}
+    shards = node.split_loop(inputs, max_shards=3, min_shard_size=5)
+    assert shards is not None
+    assert [len(shard["table"].payload.df) for shard in shards] == [7, 8, 8]
+    pd.testing.assert_frame_equal(pd.concat([shard["table"].payload.df for shard in shards]), inputs["table"].payload.df)
+    _assert_same_iterations(_iterated_shards(node, shards), _iterated(node, inputs))
+
+
+def test_for_each_row_shards_respect_min_shard_size(node_ctor):
+    node = node_ctor("ForEachRowBeginNode", id="begin", pair_id=1)
+    inputs = {"table": _source()}
+    shards = node.split_loop(inputs, max_shards=8, min_shard_size=10)
+    assert shards is not None and len(shards) == _ROWS // 10
+    assert node.split_loop(inputs, max_shards=8, min_shard_size=12) is None
+    assert node.split_loop(inputs, max_shards=1, min_shard_size=1) is None
+
+
+@pytest.mark.parametrize("window_size", [1, 4, 9])
+def test_rolling_window_shards_overlap_by_window_size_minus_one(node_ctor, window_size):
+    node = node_ctor("ForRollingWindowBeginNode", id="begin", pair_id=1, window_size=window_size)
+    inputs = {"table": _source()}
+    shards = node.split_loop(inputs, max_shards=3, min_shard_size=2)
+    assert shards is not None and len(shards) == 3
+    num_windows = _ROWS - window_size + 1
+    starts = [num_windows * i // 3 for i in range(4)]
+    for shard, start, end in zip(shards, starts[:-1], starts[1:]):
+        df = shard["table"].payload.df
+        # windows starting in [start, end), the last one ends window_size - 1 rows after the last start
+        assert df["a"].tolist() == list(range(start, end + window_size - 1))
+    _assert_same_iterations(_iterated_shards(node, shards), _iterated(node, inputs))
+
+
+def test_rolling_window_too_large_is_not_split(node_ctor):
+    node = node_ctor("ForRollingWindowBeginNode", id="begin", pair_id=1, window_size=_ROWS + 1)
+    assert node.split_loop({"table": _source()}, max_shards=3, min_shard_size=1) is None
+    node = node_ctor("ForRollingWindowBeginNode", id="begin", pair_id=1, window_size=_ROWS - 2)
+    # 3 windows are not enough for 2 shards of 2
+    assert node.split_loop({"table": _source()}, max_shards=3, min_shard_size=2) is None
+
+
+def _loop_topology(begin_type: str):
+    """src -> loop(body: g = f * 2, then h = a + 1) -> end -> after (h - 1)."""
+    begin_params = {"pair_id": 1, "window_size": 4} if begin_type == "ForRollingWindowBeginNode" else {"pair_id": 1}
+    end_type = begin_type.replace("Begin", "End")
+    loop_var = "window" if begin_type == "ForRollingWindowBeginNode" else "row"
+    return make_topology(
+        [
+            ("src", "TableNode", {"rows": [], "col_names": ["a", "f"], "col_types": {"a": ColType.INT, "f": ColType.FLOAT}}),
+            ("two", "ConstNode", {"value": 2.0, "data_type": "float"}),
+            ("one", "ConstNode", {"value": 1, "data_type": "int"}),
+            # a const feeding the body is a body node, the node after the loop needs its own
+            ("one_after", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("begin", begin_type, begin_params),
+            ("mul", "ColWithNumberBinOpNode", {"op": "MUL", "col": "f", "result_col": "g"}),
+            ("inc", "ColWithNumberBinOpNode", {"op": "ADD", "col": "a", "result_col": "h"}),
+            ("end", end_type, {"pair_id": 1}),
+            ("after", "ColWithNumberBinOpNode", {"op": "COL_SUB_NUM", "col": "h", "result_col": "k"}),
+        ],
+        [
+            ("src", "table", "begin", "table"),
+            ("begin", loop_var, "mul", "table"),
+            ("two", "const", "mul", "num"),
+            ("mul", "table", "inc", "table"),
+            ("one", "const", "inc", "num"),
+            ("inc", "table", "end", loop_var),
+            ("end", "table", "after", "table"),
+            ("one_after", "const", "after", "num"),
+        ],
+    )
+
+
+def _in_process_shards(executed: list[int]):
+    """execute_shards iterating shards in this process, after a pickle round trip like the process pool does."""
+    def execute_shards(body, shards, max_processes):
+        executed.append(len(shards))
+        body, shards = pickle.loads(pickle.dumps((body, shards)))
+        return [loop_pool.execute_shard(body, shard) for shard in shards]
+    return execute_shards
+
+
+def _run(monkeypatch, begin_type: str, parallel: bool, execute_shards=None):
+    monkeypatch.setattr(interpreter_module, "LOOP_MAX_PROCESSES", 3 if parallel else 1)
+    monkeypatch.setattr(interpreter_module, "LOOP_MIN_ITERATIONS_PER_PROCESS", 2)
+    # iterate ForEachRow loops instead of executing them in batch
+    monkeypatch.setattr(interpreter_module.ProjectInterpreter, "_can_batch_loop", lambda self, begin_node_id: False)
+    if execute_shards is not None:
+        monkeypatch.setattr(interpreter_module, "execute_shards", execute_shards)
+    run = run_workflow(_loop_topology(begin_type), reuse=({"src"}, lambda node_id: {"table": _source()}))
+    monkeypatch.undo()
+    assert not run.errors
+    return run
+
+
+def _assert_same_results(left, right) -> None:
+    for node_id in ("begin", "mul", "inc", "end", "after"):
+        assert set(left.outputs[node_id]) == set(right.outputs[node_id])
+        for port, data in left.outputs[node_id].items():
+            assert isinstance(data.payload, Table)
+            assert data.payload.col_types == right.outputs[node_id][port].payload.col_types
+            pd.testing.assert_frame_equal(data.payload.df, right.outputs[node_id][port].payload.df)
+
+
+@pytest.mark.parametrize("begin_type", ["ForEachRowBeginNode", "ForRollingWindowBeginNode"])
+def test_sharded_loop_gives_the_same_results_as_iterating(monkeypatch, begin_type):
+    """The end table, the last iteration of every body node and the nodes after the loop are the same."""
+    executed: list[int] = []
+    sharded = _run(monkeypatch, begin_type, parallel=True, execute_shards=_in_process_shards(executed))
+    assert executed == [3]
+    iterated = _run(monkeypatch, begin_type, parallel=False)
+    _assert_same_results(sharded, iterated)
+    assert set(sharded.running_times) == set(iterated.running_times)
+
+
+@pytest.mark.parametrize("error", [BrokenProcessPool("worker died"), RuntimeError("pickling failed")])
+def test_failed_pool_falls_back_to_iterating(monkeypatch, error):
+    def execute_shards(body, shards, max_processes):
+        raise error
+
+    failed = _run(monkeypatch, "ForRollingWindowBeginNode", parallel=True, execute_shards=execute_shards)
+    iterated = _run(monkeypatch, "ForRollingWindowBeginNode", parallel=False)
+    _assert_same_results(failed, iterated)
+
+
+def test_loop_of_non_process_safe_nodes_is_not_sharded(monkeypatch):
+    executed: list[int] = []
+    monkeypatch.setattr(ColWithNumberBinOpNode, "PROCESS_SAFE", False)
+    monkeypatch.setattr(interpreter_module, "LOOP_MAX_PROCESSES", 3)
+    monkeypatch.setattr(interpreter_module, "LOOP_MIN_ITERATIONS_PER_PROCESS", 2)
+    monkeypatch.setattr(interpreter_module, "execute_shards", _in_process_shards(executed))
+    run = run_workflow(_loop_topology("ForRollingWindowBeginNode"), reuse=({"src"}, lambda node_id: {"table": _source()}))
+    assert not run.errors
+    assert executed == []
+
+
+class _BrokenPool:
+    """A process pool whose workers died, every submitted future fails."""
+
+    def __init__(self):
+        self.shutdown_calls: list[tuple[bool, bool]] = []
+
+    def submit(self, fn, *args):
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+
+
+def test_broken_pool_is_replaced_for_later_loops(monkeypatch):
+    broken = _BrokenPool()
+    monkeypatch.setattr(loop_pool, "_pool", broken)
+    with pytest.raises(BrokenProcessPool):
+        loop_pool.execute_shards(None, [{}, {}], max_processes=2)  # type: ignore[arg-type]
+    assert broken.shutdown_calls == [(False, True)]
+    assert loop_pool._pool is None
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from server.interpreter.interpreter import ProjectInterpreter
+from server.models.data import Data, Table
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow
+
+_COL_TYPES = {"i": ColType.INT, "f": ColType.FLOAT}
+_STATS_PORTS = ["mean", "count", "std", "sum", "min", "max", "quantile_25", "quantile_50", "quantile_75"]
+
+
+def _source_table(int_nulls: bool = False) -> Data:
+    i = [7, -3, 12, 5, 0, 9, -8, 4, 11, 2]
+    f = [0.5, float("nan"), 2.25, -1.0, 3.5, float("nan"), float("nan"), 6.0, -2.5, 1.0]
+    df = pd.DataFrame(
+        {
+            "i": pd.array([None if int_nulls and k == 4 else v for k, v in enumerate(i)], dtype="Int64" if int_nulls else "int64"),
+            "f": f,
+            Table.INDEX_COL: list(range(len(i))),
+        }
+    )
+    return Data(payload=Table(df=df, col_types={**_COL_TYPES, Table.INDEX_COL: ColType.INT}))
+
+
+def _loop_topology():
+    """src -> ForRollingWindow(body: stats of i and f, packed into a row) -> end."""
+    packed_ports = [(f"{col}_{port}", col, port) for col in _COL_TYPES for port in ("mean", "count", "sum", "min", "max", "std")]
+    return make_topology(
+        [
+            ("src", "TableNode", {"rows": [], "col_names": list(_COL_TYPES), "col_types": _COL_TYPES}),
+            ("begin", "ForRollingWindowBeginNode", {"pair_id": 1, "window_size": 4}),
+            ("stats_i", "StatsNode", {"col": "i"}),
+            ("stats_f", "StatsNode", {"col": "f"}),
+            ("pack", "PackNode", {"cols": [name for name, _, _ in packed_ports]}),
+            ("end", "ForRollingWindowEndNode", {"pair_id": 1}),
+        ],
+        [
+            ("src", "table", "begin", "table"),
+            ("begin", "window", "stats_i", "table"),
+            ("begin", "window", "stats_f", "table"),
+            *[(f"stats_{col}", port, "pack", name) for name, col, port in packed_ports],
+            ("pack", "packed_row", "end", "window"),
+        ],
+    )
+
+
+def _run(monkeypatch, aggregate: bool, int_nulls: bool = False):
+    aggregated: list[bool] = []
+    original = ProjectInterpreter._execute_windows_in_aggregate
+
+    def _execute_windows_in_aggregate(self, *args, **kwargs):
+        outputs = original(self, *args, **kwargs)
+        aggregated.append(outputs is not None)
+        return outputs
+
+    monkeypatch.setattr(ProjectInterpreter, "_execute_windows_in_aggregate", _execute_windows_in_aggregate)
+    if not aggregate:
+        monkeypatch.setattr(ProjectInterpreter, "_can_aggregate_windows", lambda self, begin_node_id: False)
+    run = run_workflow(_loop_topology(), reuse=({"src"}, lambda node_id: {"table": _source_table(int_nulls)}))
+    monkeypatch.undo()
+    assert not run.errors
+    return run, aggregated
+
+
+def _assert_tables_equal(left: Data, right: Data) -> None:
+    assert isinstance(left.payload, Table) and isinstance(right.payload, Table)
+    assert left.payload.col_types == right.payload.col_types
+    pd.testing.assert_frame_equal(left.payload.df, right.payload.df)
+
+
+def test_aggregated_windows_give_the_same_table_as_iterating(monkeypatch):
+    aggregated, calls = _run(monkeypatch, aggregate=True)
+    assert calls == [True]
+    iterated, calls = _run(monkeypatch, aggregate=False)
+    assert calls == []
+    _assert_tables_equal(aggregated.outputs["end"]["table"], iterated.outputs["end"]["table"])
+    table = aggregated.outputs["end"]["table"].payload
+    assert len(table.df) == 7
+    assert table.col_types["i_sum"] == ColType.INT and table.col_types["f_sum"] == ColType.FLOAT
+    assert table.df["i_sum"].tolist() == [21, 14, 26, 6, 5, 16, 9]
+
+
+@pytest.mark.parametrize("node_id", ["stats_i", "stats_f"])
+def test_aggregated_windows_report_the_same_last_iteration(monkeypatch, node_id):
+    """Body nodes report the results of the last window, whether the windows are aggregated or iterated."""
+    aggregated, _ = _run(monkeypatch, aggregate=True)
+    iterated, _ = _run(monkeypatch, aggregate=False)
+    assert set(aggregated.outputs[node_id]) == set(iterated.outputs[node_id]) == set(_STATS_PORTS)
+    for port in _STATS_PORTS:
+        left, right = aggregated.outputs[node_id][port].payload, iterated.outputs[node_id][port].payload
+        assert type(left) is type(right)
+        assert left == pytest.approx(right, nan_ok=True)
+
+
+@pytest.mark.parametrize("node_id", ["begin", "pack"])
+def test_aggregated_windows_report_the_same_last_tables(monkeypatch, node_id):
+    aggregated, _ = _run(monkeypatch, aggregate=True)
+    iterated, _ = _run(monkeypatch, aggregate=False)
+    assert set(aggregated.outputs[node_id]) == set(iterated.outputs[node_id])
+    for port in aggregated.outputs[node_id]:
+        _assert_tables_equal(aggregated.outputs[node_id][port], iterated.outputs[node_id][port])
+
+
+def test_int_column_with_nulls_falls_back_to_iterating(monkeypatch):
+    """INT windows are aggregated in int64, which has no nulls, so the loop is iterated instead."""
+    fallback, calls = _run(monkeypatch, aggregate=True, int_nulls=True)
+    assert calls == [False]
+    iterated, _ = _run(monkeypatch, aggregate=False, int_nulls=True)
+    _assert_tables_equal(fallback.outputs["end"]["table"], iterated.outputs["end"]["table"])
+    assert fallback.running_times.keys() == iterated.running_times.keys()
@@ -0,0 +1,119 @@
+import pytest
+
+from tests.nodes.utils import make_topology, run_workflow
+
+
+@pytest.fixture
+def recording_cache_manager(real_cache_manager_module):
+    """A real CacheManager computing keys and lineages, recording prefetched and looked up keys instead of using Redis."""
+
+    class _RecordingCacheManager(real_cache_manager_module.CacheManager):
+        def __init__(self):
+            super().__init__()
+            self.prefetched: list[list[str]] = []
+            self.looked_up: dict[str, str] = {} # node type + params -> key used by get()
+            self.discarded = 0
+
+        def prefetch(self, cache_keys):
+            self.prefetched.append(list(cache_keys))
+
+        def discard_prefetched(self):
+            self.discarded += 1
+            super().discard_prefetched()
+
+        def get(self, node_type, params, inputs):
+            self.looked_up[f"{node_type}:{sorted(params.items())}"] = self._get_cache_key(node_type, params, inputs)
+            return None
+
+        def set(self, *args, **kwargs):
+            return None
+
+        def get_plan(self, topology_hash):
+            return None
+
+        def set_plan(self, topology_hash, plan):
+            return None
+
+        def get_hints(self, hint_keys):
+            return [None] * len(hint_keys)
+
+        def set_hints(self, hints):
+            return None
+
+    return _RecordingCacheManager()
+
+
+def _topology():
+    """Deterministic a, b -> add -> double, and a random table -> shifted (its column + a)."""
+    return make_topology(
+        [
+            ("a", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("b", "ConstNode", {"value": 2, "data_type": "int"}),
+            ("add", "NumberBinOpNode", {"op": "ADD"}),
+            ("double", "NumberBinOpNode", {"op": "MUL"}),
+            ("rand", "RandomNode", {"col_name": "r", "col_type": "int"}),
+            ("shifted", "ColWithNumberBinOpNode", {"op": "ADD", "col": "r", "result_col": "s"}),
+        ],
+        [
+            ("a", "const", "add", "x"),
+            ("b", "const", "add", "y"),
+            ("add", "result", "double", "x"),
+            ("b", "const", "double", "y"),
+            ("b", "const", "rand", "row_count"),
+            ("a", "const", "rand", "min_value"),
+            ("b", "const", "rand", "max_value"),
+            ("rand", "table", "shifted", "table"),
+            ("a", "const", "shifted", "num"),
+        ],
+    )
+
+
+def test_prefetch_is_one_batch_of_keys_known_before_execution(recording_cache_manager):
+    """Keys of sources and their deterministic descendants are prefetched at once, in topological order."""
+    run = run_workflow(_topology(), cache_manager=recording_cache_manager)
+    assert not run.errors
+    assert len(recording_cache_manager.prefetched) == 1
+    (prefetched,) = recording_cache_manager.prefetched
+    looked_up = recording_cache_manager.looked_up
+    expected = [
+        looked_up["ConstNode:[('data_type', 'int'), ('value', 1)]"],
+        looked_up["ConstNode:[('data_type', 'int'), ('value', 2)]"],
+        looked_up["NumberBinOpNode:[('op', 'ADD')]"],
+        looked_up["NumberBinOpNode:[('op', 'MUL')]"],
+    ]
+    assert [key for key in prefetched if key in expected] == expected
+
+
+def test_prefetch_skips_nodes_downstream_of_non_deterministic_ones(recording_cache_manager):
+    """The key of a node after a random one is only known once the random output exists, it is not prefetched."""
+    run_workflow(_topology(), cache_manager=recording_cache_manager)
+    (prefetched,) = recording_cache_manager.prefetched
+    looked_up = recording_cache_manager.looked_up
+    shifted_key = looked_up["ColWithNumberBinOpNode:[('col', 'r'), ('op', 'ADD'), ('result_col', 's')]"]
+    rand_key = looked_up["RandomNode:[('col_name', 'r'), ('col_type', 'int')]"]
+    assert rand_key in prefetched # its own inputs are deterministic
+    assert shifted_key not in prefetched
+    assert len(prefetched) == 5
+
+
+def test_prefetch_skips_unscheduled_nodes(recording_cache_manager):
+    """Reused nodes are not executed, so their keys are not prefetched."""
+    from server.models.data import Data
+
+    run = run_workflow(
+        _topology(),
+        cache_manager=recording_cache_manager,
+        reuse=({"a", "b"}, lambda node_id: {"const": Data(payload=1 if node_id == "a" else 2)}),
+    )
+    assert "a" not in run.started and "b" not in run.started
+    (prefetched,) = recording_cache_manager.prefetched
+    assert all(not key.startswith("cache:ConstNode:") for key in prefetched)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+@pytest.mark.parametrize("stop_after", [None, "add"])
+def test_prefetched_results_are_discarded_when_execution_ends(recording_cache_manager, max_workers, stop_after):
+    """Results prefetched for nodes never looked up, e.g. after a stop, are not kept for the rest of the task."""
+    run = run_workflow(_topology(), cache_manager=recording_cache_manager, max_workers=max_workers, stop_after=stop_after)
+    assert ("double" in run.started) == (stop_after is None)
+    assert recording_cache_manager.discarded == 1
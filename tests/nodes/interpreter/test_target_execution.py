@@ -0,0 +1,67 @@
+from server.models.schema import ColType
+from tests.nodes.utils import make_topology, run_workflow
+
+
+def _loop_topology():
+    """tab -> ForEachRow(body: a * k) -> after (+ k2), and an independent branch z -> z2."""
+    return make_topology(
+        [
+            ("tab", "TableNode", {"rows": [{"a": 1}, {"a": 2}, {"a": 3}], "col_names": ["a"], "col_types": {"a": ColType.INT}}),
+            ("k", "ConstNode", {"value": 10, "data_type": "int"}),
+            ("k2", "ConstNode", {"value": 1, "data_type": "int"}),
+            ("begin", "ForEachRowBeginNode", {"pair_id": 1}),
+            ("body", "ColWithNumberBinOpNode", {"op": "MUL", "col": "a", "result_col": "b"}),
+            ("end", "ForEachRowEndNode", {"pair_id": 1}),
+            ("after", "ColWithNumberBinOpNode", {"op": "ADD", "col": "b", "result_col": "c"}),
+            ("z", "ConstNode", {"value": 5, "data_type": "int"}),
+            ("z2", "NumberBinOpNode", {"op": "ADD"}),
+        ],
+        [
+            ("tab", "table", "begin", "table"),
+            ("begin", "row", "body", "table"),
+            ("k", "const", "body", "num"),
+            ("body", "table", "end", "row"),
+            ("end", "table", "after", "table"),
+            ("k2", "const", "after", "num"),
+            ("z", "const", "z2", "x"),
+            ("z", "const", "z2", "y"),
+        ],
+    )
+
+
+def test_closure_of_target_after_loop_includes_whole_loop():
+    """A target downstream of a loop needs the loop and everything it depends on."""
+    closure = _loop_topology().get_ancestor_closure({"after"})
+    assert closure == {"tab", "k", "k2", "begin", "body", "end", "after"}
+
+
+def test_closure_of_body_node_keeps_loop_pair_complete():
+    """Targeting a body node pulls in both nodes of the pair, and through the end node the rest of the body."""
+    assert _loop_topology().get_ancestor_closure({"body"}) == {"tab", "k", "begin", "body", "end"}
+    assert _loop_topology().get_ancestor_closure({"begin"}) == {"tab", "k", "begin", "body", "end"}
+
+
+def test_closure_ignores_unknown_targets():
+    """Unknown target ids are ignored instead of failing."""
+    assert _loop_topology().get_ancestor_closure({"missing", "z2"}) == {"z", "z2"}
+
+
+def test_restrict_to_keeps_indices_and_inner_edges():
+    """Nodes out of scope become placeholders at the same index, edges leaving the scope are dropped."""
+    topology = _loop_topology()
+    restricted = topology.restrict_to({"z", "z2", "k"})
+    assert [node.id if node is not None else None for node in restricted.nodes] == [
+        None, "k", None, None, None, None, None, "z", "z2",
+    ]
+    assert [(edge.src, edge.tar) for edge in restricted.edges] == [("z", "z2"), ("z", "z2")]
+    assert restricted.get_index_by_node_id("z2") == topology.get_index_by_node_id("z2")
+
+
+def test_restricted_topology_executes_only_the_scope():
+    """Executing the closure of a target runs the target and its ancestors only."""
+    topology = _loop_topology()
+    run = run_workflow(topology.restrict_to(topology.get_ancestor_closure({"after"})))
+    assert not run.errors
+    assert set(run.finished) == {"tab", "k", "k2", "begin", "body", "end", "after"}
+    after_table = run.outputs["after"]["table"].payload
+    assert after_table.df["c"].tolist() == [11, 21, 31]
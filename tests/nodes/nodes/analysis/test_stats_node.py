@@ -45,3 +45,46 @@ def test_stats_node_process_bad_payload_asserts(node_ctor, context):
     # call process directly with non-Table payload should assert
     with pytest.raises(AssertionError):
         node.process({"table": Data(payload=123)})
+
+
+def test_stats_node_process_windows_matches_each_window(node_ctor, context):
+    df = pd.DataFrame({"a": [1.0, None, 4.0, 2.0, None, None, 7.0]})
+    table = make_table(df, {"a": ColType.FLOAT})
+    node = node_ctor("StatsNode", id="n_stats5", col="a")
+    node.infer_schema({"table": Data(payload=table).extract_schema()})
+
+    windows = node.process_windows({"table": Data(payload=table)}, 3)
+    assert all(len(values) == 5 for values in windows.values())
+    for i in range(5):
+        window = make_table(table.df.iloc[i:i + 3], table.col_types)
+        outputs = node.execute({"table": Data(payload=window)})
+        for port, data in outputs.items():
+            assert Data(payload=windows[port].iloc[i]).payload == pytest.approx(data.payload, nan_ok=True)
+
+
+def test_stats_node_process_windows_is_exact_for_large_ints(node_ctor, context):
+    """Integers above 2**53 are not exact in float64, windows of INT columns are aggregated in int64."""
+    df = pd.DataFrame({"a": [2**53 + 1, 1, 2, 3, -(2**62), 5]})
+    table = make_table(df, {"a": ColType.INT})
+    node = node_ctor("StatsNode", id="n_stats6", col="a")
+    node.infer_schema({"table": Data(payload=table).extract_schema()})
+
+    windows = node.process_windows({"table": Data(payload=table)}, 4)
+    assert windows["sum"].tolist()[0] == 2**53 + 7
+    for port in ("sum", "min", "max"):
+        assert str(windows[port].dtype) == "int64"
+    for i in range(3):
+        window = make_table(table.df.iloc[i:i + 4], table.col_types)
+        outputs = node.execute({"table": Data(payload=window)})
+        for port in ("sum", "min", "max", "count"):
+            assert windows[port].iloc[i] == outputs[port].payload
+
+
+def test_stats_node_process_windows_rejects_int_nulls(node_ctor, context):
+    """The interpreter iterates the windows instead."""
+    df = pd.DataFrame({"a": pd.array([1, None, 3, 4], dtype="Int64")})
+    table = make_table(df, {"a": ColType.INT})
+    node = node_ctor("StatsNode", id="n_stats7", col="a")
+    node.infer_schema({"table": Data(payload=table).extract_schema()})
+    with pytest.raises(ValueError):
+        node.process_windows({"table": Data(payload=table)}, 2)
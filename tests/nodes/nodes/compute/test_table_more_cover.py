@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -60,3 +61,101 @@ def test_validate_parameter_empty_names(node_ctor):
         node_ctor('NumberColWithColBinOpNode', id='v1', op='ADD', col1='', col2='b', result_col='r')
     with pytest.raises(Exception):
         node_ctor('NumberColUnaryOpNode', id='v2', op='ABS', col='', result_col='r')
+
+
+def test_column_expr_chain_matches_process(node_ctor):
+    df = pd.DataFrame({'a': pd.Series([1, 2, 3], dtype='Int64'), 'b': pd.Series([4, 5, 6], dtype='Int64')})
+    table = Table(df=df, col_types={'a': ColType.INT, 'b': ColType.INT})
+    schema_table = Schema(type=Schema.Type.TABLE, tab=TableSchema(col_types={'a': ColType.INT, 'b': ColType.INT}))
+    add = node_ctor('NumberColWithColBinOpNode', id='add', op='ADD', col1='a', col2='b', result_col='s')
+    cmp = node_ctor('ColCompareNode', id='cmp', op='GT', col1='s', col2='b', result_col='c')
+    assert add.COLUMN_EXPR and cmp.COLUMN_EXPR
+    mid_schema = add.infer_schema({'table': schema_table})['table']
+    cmp.infer_schema({'table': mid_schema})
+
+    expected = cmp.process(add.process({'table': Data(payload=table)}))['table'].payload
+
+    columns = list(table.df.columns)
+    cols = dict(table.df.items())
+    add.execute_col(cols, {})
+    out = cmp.execute_col(cols, {})['table'].payload
+    assert out.col_types == expected.col_types
+    pd.testing.assert_frame_equal(out.df, expected.df)
+    # the input table is left untouched
+    assert list(table.df.columns) == columns
+
+
+
+@pytest.mark.parametrize('op,col_types,result_type', [
+    ('EXP', {'a': ColType.INT}, ColType.FLOAT),
+    ('EXP', {'a': ColType.FLOAT}, ColType.FLOAT),
+    ('ABS', {'a': ColType.INT}, ColType.INT),
+])
+def test_unary_exp_schema_matches_fused_result(node_ctor, op, col_types, result_type):
+    df = pd.DataFrame({'a': pd.Series([0, 1, 2], dtype=col_types['a'].to_ptype()())})
+    table = Table(df=df, col_types=col_types)
+    node = node_ctor('NumberColUnaryOpNode', id='u', op=op, col='a', result_col='r')
+    out_schema = node.infer_schema({'table': Schema(type=Schema.Type.TABLE, tab=TableSchema(col_types=col_types))})['table']
+    assert out_schema.tab.col_types['r'] == result_type
+    fused = node.execute_col(dict(table.df.items()), {})['table'].payload
+    # the fused table is trusted, re-verify it against its col types
+    Table(df=fused.df, col_types=fused.col_types)
+    pd.testing.assert_frame_equal(fused.df, node.process({'table': Data(payload=table)})['table'].payload.df)
+
+
+def test_pow_of_int_columns_is_float(node_ctor):
+    df = pd.DataFrame({'a': pd.Series([2, 3], dtype='Int64'), 'b': pd.Series([3, 2], dtype='Int64')})
+    col_types = {'a': ColType.INT, 'b': ColType.INT}
+    table = Table(df=df, col_types=col_types)
+    node = node_ctor('NumberColWithColBinOpNode', id='pow', op='POW', col1='a', col2='b', result_col='r')
+    out_schema = node.infer_schema({'table': Schema(type=Schema.Type.TABLE, tab=TableSchema(col_types=col_types))})['table']
+    assert out_schema.tab.col_types['r'] == ColType.FLOAT
+    out = node.process({'table': Data(payload=table)})['table'].payload
+    assert list(out.df['r']) == [8.0, 9.0]
+    fused = node.execute_col(dict(table.df.items()), {})['table'].payload
+    assert ColType.from_ptype(fused.df['r'].dtype) == ColType.FLOAT
+
+
+def test_execute_col_rejects_mislabelled_result(node_ctor, monkeypatch):
+    from server.interpreter.nodes.compute.table import NumberColUnaryOpNode
+    from server.models.exception import NodeExecutionError
+
+    df = pd.DataFrame({'a': pd.Series([1, 2], dtype='Int64')})
+    table = Table(df=df, col_types={'a': ColType.INT})
+    node = node_ctor('NumberColUnaryOpNode', id='neg', op='NEG', col='a', result_col='r')
+    node.infer_schema({'table': Schema(type=Schema.Type.TABLE, tab=TableSchema(col_types={'a': ColType.INT}))})
+    # a compute_col disagreeing with the inferred schema, like EXP on INT used to
+    monkeypatch.setattr(NumberColUnaryOpNode, 'compute_col', lambda self, cols, input: ('r', np.exp(cols['a'])))
+    with pytest.raises(NodeExecutionError):
+        node.execute_col(dict(table.df.items()), {})
+
+
+def test_output_shares_columns_copy_on_write(node_ctor):
+    df = pd.DataFrame({'a': pd.Series([1.0, 2.0], dtype='Float64')})
+    table = Table(df=df, col_types={'a': ColType.FLOAT})
+    schema_table = Schema(type=Schema.Type.TABLE, tab=TableSchema(col_types={'a': ColType.FLOAT}))
+    node = node_ctor('NumberColUnaryOpNode', id='abs', op='ABS', col='a', result_col='r')
+    node.infer_schema({'table': schema_table})
+    out = node.process({'table': Data(payload=table)})['table'].payload
+    # the input column is shared, not copied
+    assert np.shares_memory(out.df['a'].array._data, table.df['a'].array._data)
+    # writing to the output copies the column and leaves the input untouched
+    out.df.loc[0, 'a'] = 5.0
+    assert list(table.df['a']) == [1.0, 2.0]
+
+
+def test_importing_data_does_not_set_pandas_options():
+    """Copy-on-write is enabled by the server processes at startup, importing the models leaves pandas untouched."""
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = (
+        "import pandas as pd\n"
+        "from server.models.data import enable_copy_on_write\n"
+        "assert pd.get_option('mode.copy_on_write') is False\n"
+        "enable_copy_on_write()\n"
+        "assert pd.get_option('mode.copy_on_write') is True\n"
+    )
+    root = Path(__file__).resolve().parents[4]
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
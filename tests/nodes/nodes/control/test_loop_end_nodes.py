@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from server.interpreter.nodes.control.accumulator import TableAccumulator
+from server.models.data import Data, Table
+from server.models.types import ColType
+
+
+def make_rows(n):
+    return [
+        Table(
+            df=pd.DataFrame({
+                "a": [i],
+                "b": [i / 2 if i % 3 else np.nan],
+                "c": ["x" * i if i % 4 else None],
+                "d": [i % 2 == 0],
+                "t": pd.to_datetime([1_700_000_000 + i], unit="s", utc=True),
+                "_index": [i],
+            }),
+            col_types={
+                "a": ColType.INT,
+                "b": ColType.FLOAT,
+                "c": ColType.STR,
+                "d": ColType.BOOL,
+                "t": ColType.DATETIME,
+                "_index": ColType.INT,
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def test_for_each_row_end_node_accumulates_like_concat(node_ctor, context):
+    rows = make_rows(100)
+    node = node_ctor("ForEachRowEndNode", id="n_end", pair_id=1)
+    for row in rows:
+        node.end_iter_loop({"row": Data(payload=row)})
+    table = node.finalize_loop()["table"].payload
+    assert isinstance(table, Table)
+    expected = pd.concat([row.df for row in rows], ignore_index=True)
+    pd.testing.assert_frame_equal(table.df, expected)
+    assert table.col_types == rows[0].col_types
+
+
+def test_for_rolling_window_end_node_spills_changed_dtype(node_ctor, context):
+    windows = [
+        Table(df=pd.DataFrame({"a": [1, 2]}), col_types={"a": ColType.INT}),
+        Table(df=pd.DataFrame({"a": pd.array([3, None], dtype="Int64")}), col_types={"a": ColType.INT}),
+    ]
+    node = node_ctor("ForRollingWindowEndNode", id="n_end2", pair_id=2)
+    for window in windows:
+        node.end_iter_loop({"window": Data(payload=window)})
+    table = node.finalize_loop()["table"].payload
+    assert isinstance(table, Table)
+    expected = pd.concat([window.df for window in windows], ignore_index=True)
+    pd.testing.assert_frame_equal(table.df, expected)
+
+
+def test_loop_end_node_without_iterations_outputs_empty_table(node_ctor, context):
+    node = node_ctor("ForEachRowEndNode", id="n_end3", pair_id=3)
+    table = node.finalize_loop()["table"].payload
+    assert isinstance(table, Table)
+    assert len(table.df) == 0
+
+
+@pytest.fixture
+def unverified(monkeypatch):
+    """Trusted tables are not verified, like in production."""
+    monkeypatch.setattr("server.models.data.VERIFY_TRUSTED_DATA", False)
+
+
+def test_accumulator_verifies_spilled_columns(unverified):
+    accumulator = TableAccumulator()
+    accumulator.append(Table.trusted(df=pd.DataFrame({"a": [1, 2], "_index": [0, 1]}), col_types={"a": ColType.INT, "_index": ColType.INT}))
+    # a trusted chunk whose column does not match its type makes the concatenated column float
+    accumulator.append(Table.trusted(df=pd.DataFrame({"a": [0.5], "_index": [2]}), col_types={"a": ColType.INT, "_index": ColType.INT}))
+    with pytest.raises(TypeError):
+        accumulator.finalize()
+
+
+def test_accumulator_keeps_compatible_spilled_columns(unverified):
+    accumulator = TableAccumulator()
+    accumulator.append(Table.trusted(df=pd.DataFrame({"a": [1, 2], "_index": [0, 1]}), col_types={"a": ColType.INT, "_index": ColType.INT}))
+    accumulator.append(Table.trusted(df=pd.DataFrame({"a": pd.array([None], dtype="Int64"), "_index": [2]}), col_types={"a": ColType.INT, "_index": ColType.INT}))
+    table = accumulator.finalize()
+    assert str(table.df["a"].dtype) == "Int64"
+    assert table.col_types == {"a": ColType.INT, "_index": ColType.INT}
+
+
+def test_accumulator_trusts_unspilled_columns(unverified):
+    accumulator = TableAccumulator()
+    # every chunk keeps the dtype of the first one, so the result is trusted as the chunks were
+    for _ in range(2):
+        accumulator.append(Table.trusted(df=pd.DataFrame({"a": [0.5], "_index": [0]}), col_types={"a": ColType.INT, "_index": ColType.INT}))
+    table = accumulator.finalize()
+    assert table.df["a"].tolist() == [0.5, 0.5]
@@ -63,6 +63,28 @@ def test_klinenode_execute_calls_financial_manager(node_ctor, monkeypatch):
     assert "kline_data" in out
 
 
+def test_klinenode_execute_fetches_first_intervals_in_preview(node_ctor, monkeypatch):
+    node = node_ctor("KlineNode", id="k5-preview", data_type="stock", symbol="A", interval="1h")
+    node._start_time_dt = datetime.now(tz=timezone.utc)
+    node._end_time_dt = node._start_time_dt + timedelta(days=30)
+    requested = {}
+
+    def fake_get_data(symbol, data_type, start_time, end_time, interval):
+        requested["end_time"] = end_time
+        df = DataFrame([
+            {"Open Time": start_time + timedelta(hours=i), "Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 0.0}
+            for i in range(4)
+        ])
+        return Table(df=df, col_types={"Open Time": ColType.DATETIME, "Open": ColType.FLOAT, "High": ColType.FLOAT, "Low": ColType.FLOAT, "Close": ColType.FLOAT, "Volume": ColType.FLOAT})
+
+    monkeypatch.setattr(node.context, "preview_rows", 3)
+    monkeypatch.setattr(node.context.financial_data_manager, "get_data", fake_get_data, raising=False)
+
+    out = node.process({})
+    assert requested["end_time"] == node._start_time_dt + timedelta(hours=3)
+    assert len(out["kline_data"].payload.df) == 3
+
+
 def test_klinenode_execute_rejects_start_after_end(node_ctor):
     node = node_ctor("KlineNode", id="k6", data_type="stock", symbol="A")
     node._start_time_dt = datetime.now(tz=timezone.utc)
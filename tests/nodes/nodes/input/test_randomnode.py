@@ -69,6 +69,15 @@ def test_randomnode_execute_generates_table(node_ctor):
     assert "table" in outputs
 
 
+def test_randomnode_execute_caps_rows_in_preview(node_ctor, monkeypatch):
+    """Execute stage: in a preview run, at most preview_rows rows are generated."""
+    node = node_ctor("RandomNode", id="r-exec-preview", col_name="c", col_type="int")
+    node.infer_schema({"row_count": Schema(type=Schema.Type.INT), "min_value": Schema(type=Schema.Type.INT), "max_value": Schema(type=Schema.Type.INT)})
+    monkeypatch.setattr(node.context, "preview_rows", 5)
+    outputs = node.process({"row_count": Data(payload=100), "min_value": Data(payload=1), "max_value": Data(payload=10)})
+    assert len(outputs["table"].payload.df) == 5
+
+
 def test_randomnode_execute_rejects_large_row_count(node_ctor, monkeypatch):
     """Execute stage: too large row_count raises NodeExecutionError."""
     node = node_ctor("RandomNode", id="r-exec-big", col_name="c", col_type="int")
@@ -28,3 +28,15 @@ def test_const_node_smoke(node_ctor):
     assert "const" in outputs
     assert isinstance(outputs["const"], Data)
     assert outputs["const"].payload == 42
+
+
+def test_thread_safe_flags(node_registry):
+    """Nodes relying on signals or pyplot must not run in worker threads, nodes using db sessions need their own."""
+    for type_name in ("CustomScriptNode", "QuickPlotNode", "KlinePlotNode"):
+        assert node_registry[type_name].THREAD_SAFE is False
+    for type_name in ("ConstNode", "ColWithNumberBinOpNode", "SelectColNode", "TableFromFileNode", "KlineNode"):
+        assert node_registry[type_name].THREAD_SAFE is True
+    for type_name in ("TableFromFileNode", "TableToFileNode", "TextFromFileNode", "UploadNode", "KlineNode"):
+        assert node_registry[type_name].SESSION_BOUND is True
+    for type_name in ("ConstNode", "ColWithNumberBinOpNode", "SelectColNode"):
+        assert node_registry[type_name].SESSION_BOUND is False
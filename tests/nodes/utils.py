@@ -1,3 +1,4 @@
+import threading
 from typing import Any, Dict, Iterable, List
 
 import pandas as pd
@@ -77,3 +78,82 @@ def table_from_records(records: Iterable[Dict[str, Any]]) -> Data:
     for k in recs[0].keys():
         cols[k] = [r.get(k) for r in recs]
     return table_from_dict(cols)
+
+
+def make_topology(
+    nodes: List[tuple[str, str, Dict[str, Any]]],
+    edges: List[tuple[str, str, str, str]],
+    project_id: int = 1,
+) -> Any:
+    """Create a `WorkflowTopology` from (id, type, params) nodes and (src, src_port, tar, tar_port) edges."""
+    from server.models.project_topology import TopoEdge, TopoNode, WorkflowTopology
+
+    return WorkflowTopology(
+        project_id=project_id,
+        nodes=[TopoNode(id=node_id, type=type_name, params=params) for node_id, type_name, params in nodes],
+        edges=[TopoEdge(src=src, src_port=src_port, tar=tar, tar_port=tar_port) for src, src_port, tar, tar_port in edges],
+    )
+
+
+class WorkflowRun:
+    """The callbacks received while running a workflow with `run_workflow`."""
+
+    def __init__(self, interpreter: Any) -> None:
+        self.interpreter = interpreter
+        self.started: List[str] = []                    # node ids passed to callbefore, in order
+        self.finished: List[str] = []                   # node ids passed to callafter, in order
+        self.outputs: Dict[str, Dict[str, Data]] = {}  # node id -> outputs of successful nodes
+        self.errors: Dict[str, Exception] = {}          # node id -> exception of failed nodes
+        self.running_times: Dict[str, float | None] = {}
+        self.callback_threads: set[str] = set()         # names of threads callafter was called in
+
+
+def run_workflow(
+    topology: Any,
+    cache_manager: Any = None,
+    max_workers: int = 1,
+    stop_after: str | None = None,
+    reuse: tuple[set[str], Any] | None = None,
+    **interpreter_kwargs: Any,
+) -> WorkflowRun:
+    """Construct, analyse and execute a topology with the fake managers, recording all callbacks.
+
+    - `stop_after`: callafter returns False for this node id, stopping the execution.
+    - `reuse`: (node ids, loader) passed to `ProjectInterpreter.reuse_results`.
+    """
+    from server.interpreter.interpreter import ProjectInterpreter
+    from server.lib.CacheManager import CacheManager
+    from server.lib.FileManager import FileManager
+    from server.lib.FinancialDataManager import FinancialDataManager
+
+    interpreter = ProjectInterpreter(
+        topology=topology,
+        file_manager=FileManager(),
+        cache_manager=cache_manager if cache_manager is not None else CacheManager(),
+        financial_data_manager=FinancialDataManager(),
+        user_id=1,
+        **interpreter_kwargs,
+    )
+    run = WorkflowRun(interpreter)
+    if reuse is not None:
+        interpreter.reuse_results(*reuse)
+
+    def _record_error(node_id: str, status: str, result: Any) -> bool:
+        if status == "error":
+            run.errors[node_id] = result
+        return True
+
+    def _callafter(node_id: str, status: str, result: Any, running_time: float | None) -> bool:
+        run.finished.append(node_id)
+        run.running_times[node_id] = running_time
+        run.callback_threads.add(threading.current_thread().name)
+        if status == "error":
+            run.errors[node_id] = result
+        else:
+            run.outputs[node_id] = result
+        return node_id != stop_after
+
+    interpreter.construct_nodes(lambda node_id, status, exception: _record_error(node_id, status, exception))
+    interpreter.static_analyse(_record_error)
+    interpreter.execute(run.started.append, _callafter, max_workers=max_workers)
+    return run